@@ -0,0 +1,53 @@
+"""
+Replay recorded API traffic against a server and report latency and divergence.
+
+Record a session first (python tests/test_runner.py --record), then from the
+Part A directory:
+    python -m benchmarks.replay recordings/requests.jsonl --speed 0 --concurrency 8
+"""
+import argparse
+import glob
+from tests.utils import config, inprocess, memory_server
+from tests.utils.replay import load, replay
+
+def trace_files(paths):
+    """Expand each path to its rotated files too, oldest first."""
+    files = []
+    for path in paths:
+        rotated = sorted(glob.glob(f"{glob.escape(path)}.[0-9]*"), key=lambda name: -int(name.rsplit(".", 1)[1]))
+        files.extend(rotated + [path])
+    return files
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("traces", nargs="+", help="NDJSON files written by tests.utils.recorder")
+    parser.add_argument("--url", default=config.BASE_URL, help="server to replay against")
+    parser.add_argument("--in-process", action="store_true", help="replay against a fresh in-process stand-in")
+    parser.add_argument("--speed", type=float, default=0,
+                        help="0 for as fast as possible, 1 for the recorded pace, N to compress gaps N times")
+    parser.add_argument("--concurrency", type=int, default=8, help="most requests in flight at once")
+    parser.add_argument("--show", type=int, default=10, help="divergent requests to list")
+    args = parser.parse_args()
+
+    records = load(trace_files(args.traces))
+    url = inprocess.serve(memory_server.App()) if args.in_process else args.url
+    print(f"replaying {len(records)} requests against {url} "
+          f"({'as fast as possible' if not args.speed else f'{args.speed:g}x recorded pace'}, "
+          f"concurrency {args.concurrency})")
+    report = replay(records, url, speed=args.speed, concurrency=args.concurrency)
+
+    print(f"{report.requests} requests in {report.seconds:.2f}s "
+          f"({report.requests / report.seconds if report.seconds else 0:.0f} req/s), {report.errors} errors")
+    print("latency: " + ", ".join(f"p{p} {report.percentile(p) * 1000:.1f}ms" for p in (50, 90, 95, 99))
+          + f", max {max(report.latencies, default=0) * 1000:.1f}ms")
+    print(f"divergent: {report.status_divergences} status, {report.body_divergences} body")
+    for (method, route), count, median, p95, slowest in report.route_summary()[:15]:
+        print(f"{method:7} {route:40} {count:5}x  p50 {median * 1000:.1f}ms  p95 {p95 * 1000:.1f}ms  "
+              f"max {slowest * 1000:.1f}ms")
+    for divergence in sorted(report.divergences)[:args.show]:
+        print(f"#{divergence.index} {divergence.method} {divergence.route}: "
+              f"status {divergence.recorded_status} -> {divergence.status}"
+              f"{', body differs' if divergence.body_differs else ''}")
+
+if __name__ == "__main__":
+    main()
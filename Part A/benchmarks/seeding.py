@@ -0,0 +1,46 @@
+"""
+Compare seeding todos one POST at a time against tests.utils.bulk.
+
+Run from the Part A directory with the API server already running:
+    python -m benchmarks.seeding --count 10000 --concurrency 16
+"""
+import argparse
+import time
+from tests.utils import config
+from tests.utils.api_client import delete, post
+from tests.utils.bulk import bulk_create, run_concurrently
+from tests.utils.warmup import warm_up
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--count", type=int, default=10000, help="todos to create per mode")
+    parser.add_argument("--concurrency", type=int, default=16,
+                        help="bulk worker threads (at most API_POOL_MAXSIZE)")
+    parser.add_argument("--no-warmup", action="store_true", help="time a cold server as it is")
+    args = parser.parse_args()
+    if not args.no_warmup:
+        report = warm_up()
+        print(f"warm-up               : {report.rounds} rounds, {report.seconds:.1f}s"
+              f"{'' if report.steady else ' (not steady)'}")
+    args.concurrency = min(args.concurrency, config.POOL_MAXSIZE)
+    payloads = [{"title": f"Seed {i}", "description": "benchmark"} for i in range(args.count)]
+
+    start = time.perf_counter()
+    serial_ids = [post("/todos", payload, headers={"Content-Type": "application/json"}).json()["id"]
+                  for payload in payloads]
+    serial = time.perf_counter() - start
+
+    start = time.perf_counter()
+    results = bulk_create("todos", payloads, concurrency=args.concurrency)
+    bulk = time.perf_counter() - start
+
+    failed = sum(not result.ok for result in results)
+    print(f"serial POSTs          : {serial:.2f}s")
+    print(f"bulk_create ({args.concurrency:>3} thr) : {bulk:.2f}s ({failed} failed)")
+    print(f"speed-up              : {serial / bulk:.2f}x")
+
+    ids = serial_ids + [result.id for result in results if result.ok]
+    run_concurrently([lambda todo_id=todo_id: delete(f"/todos/{todo_id}") for todo_id in ids], args.concurrency)
+
+if __name__ == "__main__":
+    main()
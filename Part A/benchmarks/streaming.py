@@ -0,0 +1,120 @@
+"""
+Compare peak RSS of whole-body decoding against streaming collection decoding.
+
+Serves synthetic {"todos": [...]} and <todos>...</todos> bodies from a local
+HTTP server, then reads them in a fresh process per mode so each peak RSS is
+measured on its own:
+    python -m benchmarks.streaming --count 100000
+"""
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import threading
+import time
+import xml.etree.ElementTree as ET
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+def make_bodies(count):
+    todos = [{
+        "id": str(i),
+        "title": f"Seeded todo {i}",
+        "doneStatus": "false",
+        "description": "Generated for the streaming benchmark",
+        "tasksof": [{"id": "1"}],
+    } for i in range(count)]
+    json_body = json.dumps({"todos": todos}).encode("utf-8")
+    xml_body = "".join(
+        f"<todo><doneStatus>{t['doneStatus']}</doneStatus><description>{t['description']}</description>"
+        f"<tasksof><id>1</id></tasksof><id>{t['id']}</id><title>{t['title']}</title></todo>"
+        for t in todos
+    )
+    return json_body, f"<todos>{xml_body}</todos>".encode("utf-8")
+
+def serve(json_body, xml_body):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            xml = "xml" in self.headers.get("Accept", "")
+            body = xml_body if xml else json_body
+            self.send_response(200)
+            self.send_header("Content-Type", "application/xml" if xml else "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def peak_rss_mb():
+    # On Linux ru_maxrss survives fork/exec, so prefer this process's own high-water mark
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def child(mode, url):
+    from tests.utils.api_client import session
+    from tests.utils.streaming import stream_collection
+
+    xml_headers = {"Accept": "application/xml"}
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+    if mode == "json":
+        data = session.get(url).json()
+        todos = data["todos"] if isinstance(data, dict) else data
+        count = sum(1 for _ in todos)
+    elif mode == "xml":
+        root = ET.fromstring(session.get(url, headers=xml_headers).content)
+        count = sum(1 for _ in root)
+    elif mode == "xml-stream":
+        count = sum(1 for _ in stream_collection(url, headers=xml_headers))
+    else:
+        count = sum(1 for _ in stream_collection(url))
+    elapsed = time.perf_counter() - start
+    print(json.dumps({"count": count, "seconds": elapsed, "baseline_mb": baseline, "peak_mb": peak_rss_mb()}))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--count", type=int, default=100000, help="entities in the collection")
+    parser.add_argument("--child", choices=["json", "stream", "xml", "xml-stream"], help=argparse.SUPPRESS)
+    parser.add_argument("--url", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.url)
+        return
+
+    json_body, xml_body = make_bodies(args.count)
+    server = serve(json_body, xml_body)
+    url = f"http://127.0.0.1:{server.server_port}/todos"
+    print(f"{args.count} todos, {len(json_body) / (1024 * 1024):.1f} MB JSON body, "
+          f"{len(xml_body) / (1024 * 1024):.1f} MB XML body")
+    try:
+        for label, mode in (("response.json()", "json"), ("stream_collection", "stream"),
+                            ("ET.fromstring()", "xml"), ("stream_collection xml", "xml-stream")):
+            output = subprocess.run(
+                [sys.executable, "-m", "benchmarks.streaming", "--child", mode, "--url", url],
+                capture_output=True, text=True, check=True,
+            ).stdout
+            result = json.loads(output)
+            print(f"{label:22}: peak RSS {result['peak_mb']:.1f} MB "
+                  f"(+{result['peak_mb'] - result['baseline_mb']:.1f} MB over baseline), "
+                  f"{result['seconds']:.2f}s, {result['count']} entities")
+    finally:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Benchmark a full Part A run with and without pooled keep-alive connections.
+
+Run from the Part A directory with the API server already running:
+    python -m benchmarks.suite --repeat 3
+or without a JVM, against the in-memory stand-in served over real sockets:
+    python -m benchmarks.suite --repeat 3 --in-memory
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from tests.utils.warmup import warm_up
+
+PART_A_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def time_suite(keep_alive, in_memory=False):
+    """Run tests/test_runner.py once and return its wall-clock time."""
+    env = dict(os.environ, API_KEEP_ALIVE="1" if keep_alive else "0")
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, os.path.join("tests", "test_runner.py")] + (["--in-memory"] if in_memory else []),
+        cwd=PART_A_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3, help="runs per mode")
+    parser.add_argument("--no-warmup", action="store_true", help="time a cold server as it is")
+    parser.add_argument("--in-memory", action="store_true",
+                        help="have each run start the in-memory stand-in instead of using a running server")
+    args = parser.parse_args()
+    if not args.no_warmup and not args.in_memory:
+        report = warm_up()
+        print(f"warm-up: {report.rounds} rounds, {report.seconds:.1f}s{'' if report.steady else ' (not steady)'}")
+
+    results = {}
+    for label, keep_alive in (("before (connection per request)", False),
+                              ("after (pooled keep-alive)", True)):
+        runs = [time_suite(keep_alive, args.in_memory) for _ in range(args.repeat)]
+        results[label] = statistics.median(runs)
+        print(f"{label:35}: median {results[label]:.2f}s over {args.repeat} runs "
+              f"({', '.join(f'{r:.2f}' for r in runs)})")
+
+    before, after = results.values()
+    print(f"{'speed-up':35}: {before / after:.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -5,10 +5,6 @@ class TestCategoriesAPI(unittest.TestCase):
 
     def setUp(self):
         """Ensure a clean state before each test"""
-        # Verify system is running
-        response = get("/")
-        self.assertEqual(response.status_code, 200)
-
         # Save initial state
         self.initial_state = get("/todos").json()
 
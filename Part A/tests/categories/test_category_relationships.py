@@ -1,24 +1,23 @@
 import unittest
 from tests.utils.api_client import get, post, put, delete, head
+from tests.utils.bulk import create_entities
 
 class TestCategoryRelationships(unittest.TestCase):
 
     def setUp(self):
         """Ensure a clean state before each test"""
         self.test_category = {"title": "Work", "description": "Test"}
-        category_response = post("/categories", self.test_category, headers={"Content-Type": "application/json"})
-        self.assertEqual(category_response.status_code, 201)
-        self.category_id = category_response.json()["id"]
-
         self.test_project = {"title": "Project1", "description": "Test Project"}
-        project_response = post("/projects", self.test_project, headers={"Content-Type": "application/json"})
-        self.assertEqual(project_response.status_code, 201)
-        self.project_id = project_response.json()["id"]
-
         self.test_todo = {"title": "todo1", "description": "Test todo"}
-        todo_response = post("/todos", self.test_todo, headers={"Content-Type": "application/json"})
-        self.assertEqual(todo_response.status_code, 201)
-        self.todo_id = todo_response.json()["id"]
+        category, project, todo = create_entities([
+            ("categories", self.test_category),
+            ("projects", self.test_project),
+            ("todos", self.test_todo),
+        ])
+        self.assertEqual([category.status_code, project.status_code, todo.status_code], [201, 201, 201])
+        self.category_id = category.id
+        self.project_id = project.id
+        self.todo_id = todo.id
 
     def tearDown(self):
         """Cleanup test data after each test"""
@@ -1,19 +1,14 @@
 import unittest
 import subprocess
+from tests.utils import config
 
 class TestCommandLineQueries(unittest.TestCase):
     """Tests for command line interface queries"""
 
-    def setUp(self):
-        """Verify API is running"""
-        result = subprocess.run(['curl', 'http://localhost:4567'],
-                              capture_output=True, text=True)
-        self.assertEqual(result.returncode, 0)
-
     def test_cli_get_todos(self):
         """Test GET /todos via curl"""
         result = subprocess.run(
-            ['curl', 'http://localhost:4567/todos'],
+            ['curl', f'{config.BASE_URL}/todos'],
             capture_output=True,
             text=True
         )
@@ -24,7 +19,7 @@ class TestCommandLineQueries(unittest.TestCase):
         """Test POST /todos via curl"""
         cmd = [
             'curl', '-X', 'POST',
-            'http://localhost:4567/todos',
+            f'{config.BASE_URL}/todos',
             '-H', 'Content-Type: application/json',
             '-d', '{"title":"CLI Todo"}'
         ]
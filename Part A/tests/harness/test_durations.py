@@ -0,0 +1,71 @@
+import os
+import shutil
+import statistics
+import tempfile
+import unittest
+from tests.test_runner import partition_tests
+from tests.utils import durations
+from tests.utils.durations import Duration
+
+class FakeTest:
+
+    def __init__(self, test_id):
+        self._id = test_id
+
+    def id(self):
+        return self._id
+
+def history(seconds):
+    """{test_id: Duration} for tests seen once, taking the given seconds."""
+    return {test_id: Duration(1, value, 0.0, value, value) for test_id, value in seconds.items()}
+
+class TestDurationHistory(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "durations.sqlite3")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_no_history(self):
+        """A missing database is an empty history, and every estimate is one second"""
+        self.assertEqual(durations.load(self.path), {})
+        self.assertEqual(durations.estimates(["a.A.test"], {}), {"a.A.test": 1.0})
+
+    def test_running_statistics(self):
+        """Runs fold into a Welford mean and variance and a moving average"""
+        runs = [1.0, 2.0, 4.0]
+        for seconds in runs:
+            durations.record([("a.A.test", seconds)], self.path)
+        stats = durations.load(self.path)["a.A.test"]
+        self.assertEqual((stats.runs, stats.last), (3, 4.0))
+        self.assertAlmostEqual(stats.mean, statistics.mean(runs))
+        self.assertAlmostEqual(stats.stdev, statistics.stdev(runs))
+        alpha = durations.EMA_ALPHA
+        self.assertAlmostEqual(stats.estimate, alpha * 4.0 + (1 - alpha) * (alpha * 2.0 + (1 - alpha) * 1.0))
+
+    def test_unknown_tests_take_the_median(self):
+        """Tests without history are expected to take the median of those with it"""
+        known = history({"a.A.one": 1.0, "a.A.two": 3.0, "a.A.three": 8.0})
+        self.assertEqual(durations.estimates(["a.A.two", "b.B.new"], known), {"a.A.two": 3.0, "b.B.new": 3.0})
+
+class TestPartitionTests(unittest.TestCase):
+
+    def test_classes_stay_together_longest_first(self):
+        """Whole classes go longest first to the least loaded worker"""
+        tests = [FakeTest(test_id) for test_id in
+                 ("m.Slow.one", "m.Slow.two", "m.Mid.one", "m.Fast.one", "m.Fast.two")]
+        known = history({"m.Slow.one": 4.0, "m.Slow.two": 2.0, "m.Mid.one": 5.0,
+                         "m.Fast.one": 1.0, "m.Fast.two": 0.5})
+        partitions = partition_tests(tests, 2, known)
+        self.assertEqual(partitions, [(["m.Mid.one", "m.Fast.one", "m.Fast.two"], 6.5),
+                                      (["m.Slow.one", "m.Slow.two"], 6.0)])
+
+    def test_no_more_workers_than_classes(self):
+        """Workers beyond the number of classes are not used"""
+        tests = [FakeTest("m.Only.one"), FakeTest("m.Only.two")]
+        self.assertEqual(partition_tests(tests, 4, {}), [(["m.Only.one", "m.Only.two"], 2.0)])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from tests.utils import inprocess, memory_server, recorder
+from tests.utils.api_client import session
+from tests.utils.async_client import AsyncApiClient
+
+class TestRecorder(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "requests.jsonl")
+        self.url = inprocess.serve(memory_server.App())
+
+    def tearDown(self):
+        inprocess.unregister(self.url)
+        shutil.rmtree(self.directory)
+
+    def lines(self, path):
+        with open(path, encoding="utf-8") as trace:
+            return [json.loads(line) for line in trace]
+
+    def test_writes_one_record_per_request(self):
+        """Each request becomes one JSON line with its bodies, status and timings"""
+        with recorder.recording(self.path) as traffic:
+            session.post(f"{self.url}/todos", json={"title": "Recorded"})
+            session.get(f"{self.url}/todos/999")
+        self.assertEqual((traffic.written, traffic.dropped), (2, 0))
+        created, missing = self.lines(self.path)
+        self.assertEqual((created["method"], created["route"], created["status"]), ("POST", "/todos", 201))
+        self.assertEqual(json.loads(created["request_body"]), {"title": "Recorded"})
+        self.assertEqual(json.loads(created["response_body"])["title"], "Recorded")
+        self.assertEqual((missing["route"], missing["status"]), ("/todos/:id", 404))
+        self.assertLessEqual(created["time"], missing["time"])
+        self.assertGreaterEqual(created["total"], created["connect"] + created["ttfb"])
+
+    def test_records_async_client_requests(self):
+        """Requests from the asyncio client are recorded like api_client's"""
+        async def send():
+            async with AsyncApiClient(self.url) as client:
+                await client.post("/todos", {"title": "Async"})
+
+        with recorder.recording(self.path) as traffic:
+            asyncio.run(send())
+        self.assertEqual(traffic.written, 1)
+        created = self.lines(self.path)[0]
+        self.assertEqual((created["method"], created["route"], created["status"]), ("POST", "/todos", 201))
+        self.assertEqual(json.loads(created["request_body"]), {"title": "Async"})
+        self.assertEqual(json.loads(created["response_body"])["title"], "Async")
+
+    def test_streamed_body_is_not_recorded(self):
+        """A streamed response body is left to the caller and recorded as null"""
+        with recorder.recording(self.path):
+            with session.get(f"{self.url}/todos", stream=True) as response:
+                response.content
+        self.assertIsNone(self.lines(self.path)[0]["response_body"])
+
+    def test_rotates_past_max_bytes(self):
+        """The file rotates once a batch would take it past max_bytes, keeping backups files"""
+        with recorder.recording(self.path, max_bytes=1, backups=2, batch_size=1) as traffic:
+            for _ in range(4):
+                session.get(f"{self.url}/todos")
+        self.assertEqual(traffic.written, 4)
+        self.assertEqual(sorted(os.listdir(self.directory)), ["requests.jsonl", "requests.jsonl.1", "requests.jsonl.2"])
+        self.assertEqual(sum(len(self.lines(os.path.join(self.directory, name)))
+                             for name in os.listdir(self.directory)), 3)
+
+    def test_rotate_without_backups_removes_the_file(self):
+        """With no backups, rotating simply starts the file again"""
+        open(self.path, "w").close()
+        recorder.rotate(self.path, 0)
+        self.assertFalse(os.path.exists(self.path))
+
+if __name__ == "__main__":
+    unittest.main()
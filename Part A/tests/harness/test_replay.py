@@ -0,0 +1,123 @@
+import os
+import shutil
+import tempfile
+import unittest
+from tests.utils import inprocess, memory_server, recorder, replay
+from tests.utils.api_client import session
+from tests.utils.replay import _parse_response, _remap, _remap_messages, body_entity, path_ids
+
+def record(url, headers=None, status=201, **fields):
+    return dict({"time": 0.0, "method": "POST", "url": url, "request_body": None, "status": status,
+                 "response_headers": headers or {}, "response_body": None}, **fields)
+
+class TestIds(unittest.TestCase):
+
+    def test_path_ids(self):
+        """Each id in a path belongs to the collection named before it"""
+        self.assertEqual(path_ids("/todos/3/tasksof/1"), [("todos", "3"), ("projects", "1")])
+        self.assertEqual(path_ids("/projects"), [])
+
+    def test_body_entity(self):
+        """Top-level body ids belong to the collection the path posts into"""
+        self.assertEqual(body_entity("/todos"), "todos")
+        self.assertEqual(body_entity("/todos/3"), "todos")
+        self.assertEqual(body_entity("/projects/1/tasks"), "todos")
+        self.assertEqual(body_entity("/todos/3/categories"), "categories")
+
+    def test_remap_follows_relationships(self):
+        """Ids are rewritten per collection, including inside relationship lists"""
+        ids = {("projects", "1"): "7", ("todos", "1"): "9"}
+        project = {"id": "1", "title": "1", "tasks": [{"id": "1"}, {"id": "2"}]}
+        self.assertEqual(_remap(project, "projects", ids),
+                         {"id": "7", "title": "1", "tasks": [{"id": "9"}, {"id": "2"}]})
+
+class TestResponseBodies(unittest.TestCase):
+
+    def test_xml_bodies_take_their_json_shape(self):
+        """XML collections, single entities and error messages parse to what the JSON response holds"""
+        self.assertEqual(_parse_response("<todos><todo><id>1</id><tasksof><id>2</id></tasksof></todo></todos>"),
+                         {"todos": [{"id": "1", "tasksof": [{"id": "2"}]}]})
+        self.assertEqual(_parse_response("<todo><id>1</id><title>x</title></todo>"), {"id": "1", "title": "x"})
+        self.assertEqual(_parse_response("<errorMessages><errorMessage>Not found</errorMessage></errorMessages>"),
+                         {"errorMessages": ["Not found"]})
+
+    def test_only_the_whole_path_is_remapped(self):
+        """A quoted path is replaced only where it stands alone inside errorMessages"""
+        body = {"errorMessages": ["todos/3 and todos/33, todos/3x, /todos/3"], "todos/3": "todos/3"}
+        self.assertEqual(_remap_messages(body, "todos/3", "todos/9"),
+                         {"errorMessages": ["todos/9 and todos/33, todos/3x, /todos/3"], "todos/3": "todos/3"})
+
+class TestReplayOrdering(unittest.TestCase):
+
+    def test_requests_wait_for_earlier_requests_on_the_same_entity(self):
+        """A request waits for the creation and every earlier change of the entities it touches"""
+        records = [
+            record("http://api/todos", {"Location": "/todos/3"}),
+            record("http://api/projects", {"Location": "/projects/2"}),
+            record("http://api/projects/2/tasks", request_body='{"id": "3"}'),
+            record("http://api/categories", {"Location": "/categories/4"}),
+            record("http://api/todos/3", method="DELETE", status=200),
+            record("http://api/projects", method="GET", status=200),
+        ]
+        after = replay._Replayer(records, "http://replayed", replay.ReplayReport()).after
+        self.assertEqual(after[2], {0, 1})
+        self.assertEqual(after[3], set())
+        # Deleting the todo can change the project it was linked to
+        self.assertEqual(after[4], {2})
+        self.assertEqual(after[5], {1, 2, 4})
+
+class TestRecordAndReplay(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "requests.jsonl")
+        self.recorded_url = inprocess.serve(memory_server.App())
+        self.replayed_url = inprocess.serve(memory_server.App())
+
+    def tearDown(self):
+        inprocess.unregister(self.recorded_url)
+        inprocess.unregister(self.replayed_url)
+        shutil.rmtree(self.directory)
+
+    def test_round_trip_has_no_divergences(self):
+        """Traffic recorded against one app replays against another without divergences"""
+        url = self.recorded_url
+        with recorder.recording(self.path) as traffic:
+            todo = session.post(f"{url}/todos", json={"title": "Round trip"}).json()
+            project = session.post(f"{url}/projects", json={"title": "Replayed"}).json()
+            session.post(f"{url}/projects/{project['id']}/tasks", json={"id": todo["id"]})
+            session.get(f"{url}/projects/{project['id']}/tasks")
+            session.put(f"{url}/todos/{todo['id']}", json={"title": "Renamed"})
+            session.get(f"{url}/todos/{todo['id']}", headers={"Accept": "application/xml"})
+            session.delete(f"{url}/todos/{todo['id']}")
+            session.get(f"{url}/todos/{todo['id']}")
+            session.get(f"{url}/projects")
+            session.get(f"{url}/todos")
+        self.assertEqual(traffic.dropped, 0)
+        records = replay.load([self.path])
+        self.assertEqual(len(records), 10)
+
+        # Move the replayed app's ids along so every created id has to be mapped
+        for collection in ("todos", "projects"):
+            created = session.post(f"{self.replayed_url}/{collection}", json={"title": "Offset"}).json()
+            session.delete(f"{self.replayed_url}/{collection}/{created['id']}")
+
+        report = replay.replay(records, self.replayed_url, concurrency=8)
+        self.assertEqual(report.requests, 10)
+        self.assertEqual(report.errors, 0)
+        self.assertEqual(report.divergences, [])
+
+    def test_xml_field_values_diverge(self):
+        """An XML instance whose field values differ on replay counts as a body divergence"""
+        xml = {"Accept": "application/xml"}
+        with recorder.recording(self.path):
+            session.post(f"{self.recorded_url}/todos/1", json={"title": "Amended"}, headers=xml)
+            session.get(f"{self.recorded_url}/todos/999", headers=xml)
+        session.post(f"{self.replayed_url}/todos/1", json={"description": "Only on the replayed app"})
+
+        report = replay.replay(replay.load([self.path]), self.replayed_url)
+        self.assertEqual([(divergence.method, divergence.status, divergence.body_differs)
+                          for divergence in report.divergences], [("POST", 200, True)])
+
+if __name__ == "__main__":
+    unittest.main()
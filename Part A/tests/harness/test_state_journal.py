@@ -0,0 +1,84 @@
+import unittest
+from tests.utils import inprocess, instrumentation, memory_server
+from tests.utils.api_client import session
+from tests.utils.state_journal import Edge, StateJournal, diff, edges, payload
+
+class TestStateDiff(unittest.TestCase):
+
+    def test_diff_by_id_and_fields(self):
+        """Entities are matched by id and compared by fields, ignoring relationships"""
+        original = {"1": {"id": "1", "title": "a", "tasks": [{"id": "1"}]}, "2": {"id": "2", "title": "b"},
+                    "3": {"id": "3", "title": "c"}}
+        current = {"1": {"id": "1", "title": "a"}, "2": {"id": "2", "title": "changed"},
+                   "4": {"id": "4", "title": "d"}}
+        changes = diff(original, current)
+        self.assertEqual(changes.missing, [original["3"]])
+        self.assertEqual(changes.extra, [current["4"]])
+        self.assertEqual(changes.modified, [(original["2"], current["2"])])
+
+    def test_two_way_edges_have_one_name(self):
+        """A todo's tasksof link and its project's tasks link are the same Edge"""
+        from_todo = edges("todos", {"id": "1", "tasksof": [{"id": "2"}]})
+        from_project = edges("projects", {"id": "2", "tasks": [{"id": "1"}]})
+        self.assertEqual(from_todo, {Edge("projects", "2", "tasks", "1")})
+        self.assertEqual(from_todo, from_project)
+
+    def test_payload_sends_booleans(self):
+        """Boolean fields rendered as strings go back as JSON booleans, without id or relationships"""
+        self.assertEqual(payload("todos", {"id": "1", "title": "a", "doneStatus": "true", "categories": []}),
+                         {"title": "a", "doneStatus": True})
+
+class TestStateJournal(unittest.TestCase):
+
+    def setUp(self):
+        self.url = inprocess.serve(memory_server.App())
+        self.journal = instrumentation.subscribe(StateJournal(self.url).capture())
+        self.journal.checkpoint()
+
+    def tearDown(self):
+        instrumentation.unsubscribe(self.journal)
+        inprocess.unregister(self.url)
+
+    def test_tracks_changes_without_full_reads(self):
+        """Mutations are journaled and only the touched entities are read again"""
+        title = session.get(f"{self.url}/todos/1").json()["todos"][0]["title"]
+        created = session.post(f"{self.url}/todos", json={"title": "Journaled"}).json()
+        session.post(f"{self.url}/todos/1", json={"title": "Changed"})
+        session.delete(f"{self.url}/todos/2")
+        self.journal.sync()
+
+        changes = self.journal.diff("todos")
+        self.assertEqual([entity["id"] for entity in changes.missing], ["2"])
+        self.assertEqual([entity["id"] for entity in changes.extra], [created["id"]])
+        self.assertEqual([(before["title"], after["title"]) for before, after in changes.modified],
+                         [(title, "Changed")])
+        self.assertEqual(self.journal.captures, 1)
+
+    def test_edge_diff(self):
+        """Links added and removed since the checkpoint come back as Edges, including through a delete"""
+        todo = session.post(f"{self.url}/todos", json={"title": "Linked"}).json()
+        session.post(f"{self.url}/projects/1/tasks", json={"id": todo["id"]})
+        session.delete(f"{self.url}/projects/1/tasks/1")
+        self.journal.sync()
+        added, removed = self.journal.edge_diff()
+        self.assertEqual(added, {Edge("projects", "1", "tasks", todo["id"])})
+        self.assertEqual(removed, {Edge("projects", "1", "tasks", "1")})
+
+        # Deleting a project removes its links, seen from the todos' side too
+        self.journal.checkpoint()
+        session.delete(f"{self.url}/projects/1")
+        self.journal.sync()
+        added, removed = self.journal.edge_diff()
+        self.assertEqual(added, set())
+        self.assertEqual(removed, {Edge("projects", "1", "tasks", todo["id"]), Edge("projects", "1", "tasks", "2")})
+
+    def test_unplaceable_mutation_reads_everything(self):
+        """A mutation the journal cannot place makes the next sync a full capture"""
+        session.post(f"{self.url}/todos", data="<todo><title>XML</title></todo>",
+                     headers={"Content-Type": "application/xml"})
+        self.journal.sync()
+        self.assertEqual(self.journal.captures, 2)
+        self.assertEqual(len(self.journal.diff("todos").extra), 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+import unittest
+from tests.utils import inprocess, memory_server
+from tests.utils.api_client import session
+from tests.utils.streaming import iter_json_collection, stream_collection
+
+def one_byte_at_a_time(body):
+    return [body[i:i + 1] for i in range(len(body))]
+
+class TestIterJsonCollection(unittest.TestCase):
+
+    def test_items_split_at_every_byte(self):
+        """Every kind of item decodes when the body arrives one byte at a time"""
+        body = b'{"todos": [3.5, 1e5, -2E-3, 10, true, null, "a, ]", {"x": [1, {"y": "z"}]}, [4]]}'
+        self.assertEqual(
+            list(iter_json_collection(one_byte_at_a_time(body), "todos")),
+            [3.5, 1e5, -2e-3, 10, True, None, "a, ]", {"x": [1, {"y": "z"}]}, [4]],
+        )
+
+    def test_number_split_after_point_or_exponent(self):
+        """A number cut after its point or exponent marker waits for the rest"""
+        self.assertEqual(list(iter_json_collection([b'{"todos":[3.', b'5]}'], "todos")), [3.5])
+        self.assertEqual(list(iter_json_collection([b'{"todos":[1e', b'5]}'], "todos")), [1e5])
+        self.assertEqual(list(iter_json_collection([b'[2E', b'-', b'3]'])), [2e-3])
+
+    def test_multibyte_character_split(self):
+        """A UTF-8 character split across chunks decodes whole"""
+        body = '[{"title": "café ✓"}]'.encode("utf-8")
+        self.assertEqual(list(iter_json_collection(one_byte_at_a_time(body))), [{"title": "café ✓"}])
+
+class TestStreamCollection(unittest.TestCase):
+
+    def setUp(self):
+        self.base_url = inprocess.serve(memory_server.App())
+
+    def tearDown(self):
+        inprocess.unregister(self.base_url)
+
+    def test_relationship_routes_use_the_target_collection(self):
+        """/projects/:id/tasks yields todos and /todos/:id/tasksof yields projects"""
+        todo = session.post(f"{self.base_url}/todos", json={"title": "Stream me"}).json()
+        project = session.post(f"{self.base_url}/projects", json={"title": "Streamed"}).json()
+        response = session.post(f"{self.base_url}/projects/{project['id']}/tasks", json={"id": todo["id"]})
+        self.assertEqual(response.status_code, 201)
+
+        tasks = list(stream_collection(f"{self.base_url}/projects/{project['id']}/tasks"))
+        self.assertEqual([entity["id"] for entity in tasks], [todo["id"]])
+        owners = list(stream_collection(f"{self.base_url}/todos/{todo['id']}/tasksof"))
+        self.assertIn(project["id"], [entity["id"] for entity in owners])
+
+if __name__ == "__main__":
+    unittest.main()
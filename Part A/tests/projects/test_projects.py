@@ -1,5 +1,6 @@
 import unittest
 from tests.utils.api_client import get, post, put, delete
+from tests.utils.bulk import create_entities
 
 
 class TestProjectsAPI(unittest.TestCase):
@@ -9,15 +10,12 @@ class TestProjectsAPI(unittest.TestCase):
             "title": "Test Project",
             "description": "For unit testing"
         }
-        response = post("/projects", self.test_project,
-                       headers={"Content-Type": "application/json"})
-        self.assertEqual(response.status_code, 201)
-        self.project_id = response.json().get("id")  # Make sure this line exists
-
         self.test_todo = {"title": "Test Todo", "description": "Test todo"}
-        todo_response = post("/todos", self.test_todo, headers={"Content-Type": "application/json"})
-        self.assertEqual(todo_response.status_code, 201)
-        self.todo_id = todo_response.json()["id"]
+        project, todo = create_entities([("projects", self.test_project), ("todos", self.test_todo)])
+        self.assertEqual(project.status_code, 201)
+        self.assertEqual(todo.status_code, 201)
+        self.project_id = project.id
+        self.todo_id = todo.id
 
     def tearDown(self):
         """Restore system to initial state"""
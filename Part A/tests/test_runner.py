@@ -1,19 +1,119 @@
+import argparse
+import io
+import multiprocessing
+import os
+import sqlite3
 import unittest
 import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from termcolor import colored
-from datetime import datetime
+from datetime import datetime, timedelta
+from time import perf_counter
+
+# Make the tests package importable when run as python tests/test_runner.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.utils import durations, inprocess, instrumentation, memory_server, recorder, server, server_pool, warmup
+from tests.utils.phases import timed
+
+# Seconds to wait for an already running server to answer before giving up
+READY_TIMEOUT = 5
+
+# Test phases and the TestCase methods timed as each; "other" is whatever
+# the test run spends outside them (cleanups, result bookkeeping)
+PHASES = {
+    "setup": ("setUp", "asyncSetUp"),
+    "body": (),
+    "teardown": ("tearDown", "asyncTearDown"),
+}
+
+def http_seconds(intervals):
+    """Wall-clock time covered by (start, end) request intervals, counting overlaps once."""
+    covered = 0.0
+    end = None
+    for start, finish in sorted(intervals):
+        if end is None or start > end:
+            covered += finish - start
+            end = finish
+        elif finish > end:
+            covered += finish - end
+            end = finish
+    return covered
+
+def empty_phases():
+    return {phase: [0.0, 0.0] for phase in (*PHASES, "other")}
 
 class DetailedTestResult(unittest.TextTestResult):
     def __init__(self, stream, descriptions, verbosity):
         super().__init__(stream, descriptions, verbosity)
         self.successes = []
+        # (test id, seconds) of every test run, for the duration history
+        self.durations = []
+        # {str(test): {phase: [seconds, http seconds]}} and the sum over all tests
+        self.test_phases = {}
+        self.phase_totals = empty_phases()
+        self.total_time = 0.0
         self.start_time = None
         self.end_time = None
+        self._started = None
+        self._requests = None
+
+    def startTestRun(self):
+        super().startTestRun()
+        instrumentation.subscribe(self._record_request)
+
+    def stopTestRun(self):
+        instrumentation.unsubscribe(self._record_request)
+        super().stopTestRun()
+
+    def _record_request(self, timing):
+        requests = self._requests
+        if requests is not None:
+            requests.append((timing.started, timing.started + timing.total))
+
+    def _timed(self, phases, phase, method):
+        # Time one phase and the HTTP requests made inside it, even if it raises
+        def begin():
+            self._requests = []
+
+        def finish(start):
+            elapsed = perf_counter() - start
+            http = http_seconds(self._requests)
+            self._requests = None
+            phases[phase][0] += elapsed
+            phases[phase][1] += min(http, elapsed)
+
+        return timed(method, begin, finish)
 
     def startTest(self, test):
         self.start_time = datetime.now()
+        # Shadow the phase methods on this instance only, so TestCase.run
+        # calls the timed versions
+        phases = empty_phases()
+        self.test_phases[str(test)] = phases
+        for phase, names in PHASES.items():
+            for name in names or (getattr(test, "_testMethodName", None),):
+                method = getattr(test, name, None) if name else None
+                if callable(method):
+                    setattr(test, name, self._timed(phases, phase, method))
+        self._started = perf_counter()
         super().startTest(test)
 
+    def stopTest(self, test):
+        super().stopTest(test)
+        elapsed = perf_counter() - self._started
+        phases = self.test_phases[str(test)]
+        for names in PHASES.values():
+            for name in names or (getattr(test, "_testMethodName", None),):
+                if name:
+                    test.__dict__.pop(name, None)
+        phases["other"][0] = max(elapsed - sum(seconds for seconds, _ in phases.values()), 0.0)
+        for phase, (seconds, http) in phases.items():
+            self.phase_totals[phase][0] += seconds
+            self.phase_totals[phase][1] += http
+        self.total_time += elapsed
+        self.durations.append((test.id(), elapsed))
+
     def addSuccess(self, test):
         self.end_time = datetime.now()
         self.successes.append((test, self.end_time - self.start_time))
@@ -22,18 +122,262 @@ class DetailedTestResult(unittest.TextTestResult):
 class DetailedTestRunner(unittest.TextTestRunner):
     resultclass = DetailedTestResult
 
-def run_tests():
-    # Configure test discovery
+class MergedTestResult:
+    """The outcomes of several worker runs, shaped like a DetailedTestResult."""
+
+    def __init__(self):
+        self.successes = []
+        self.failures = []
+        self.errors = []
+        self.durations = []
+        self.test_phases = {}
+        self.phase_totals = empty_phases()
+        self.total_time = 0.0
+        self.testsRun = 0
+
+    def merge(self, outcome):
+        self.successes.extend((test, timedelta(seconds=seconds)) for test, seconds in outcome["successes"])
+        self.failures.extend(outcome["failures"])
+        self.errors.extend(outcome["errors"])
+        self.durations.extend(outcome["durations"])
+        self.test_phases.update(outcome["test_phases"])
+        for phase, (seconds, http) in outcome["phase_totals"].items():
+            self.phase_totals[phase][0] += seconds
+            self.phase_totals[phase][1] += http
+        self.total_time += outcome["total_time"]
+        self.testsRun += outcome["testsRun"]
+
+def print_endpoint_timings(route_stats, limit=15):
+    """Print the endpoints that took the most total time."""
+    print(colored("\nSlowest Endpoints:", "cyan"))
+    for (method, route), stats in route_stats.slowest(limit):
+        count = stats["count"]
+        print(f"{method:7} {route:40} {count:5}x  total {stats['total']:.3f}s  "
+              f"mean {stats['total'] / count * 1000:.1f}ms  max {stats['max'] * 1000:.1f}ms  "
+              f"(connect {stats['connect'] / count * 1000:.1f}ms, "
+              f"ttfb {stats['ttfb'] / count * 1000:.1f}ms, "
+              f"read {stats['read'] / count * 1000:.1f}ms)")
+
+def discover_tests():
+    """Return every test under tests/ as a flat list."""
     test_loader = unittest.TestLoader()
     test_suite = test_loader.discover(start_dir="tests", pattern="test_*.py")
 
+    def flatten(suite):
+        for test in suite:
+            if isinstance(test, unittest.TestSuite):
+                yield from flatten(test)
+            else:
+                yield test
+    return list(flatten(test_suite))
+
+def partition_tests(tests, workers, history=None):
+    """
+    Split tests into at most workers lists of test ids, longest first.
+
+    Tests of one class stay together so class fixtures run once. Classes are
+    placed longest-processing-time first, by their durations in previous runs,
+    onto the worker with the least expected work. Returns (ids, expected
+    seconds) pairs.
+    """
+    classes = {}
+    for test in tests:
+        classes.setdefault(test.id().rsplit(".", 1)[0], []).append(test.id())
+    expected = durations.estimates([test.id() for test in tests], history)
+    costs = sorted(((sum(expected[test_id] for test_id in ids), ids) for ids in classes.values()),
+                   key=lambda item: item[0], reverse=True)
+    partitions = [([], 0.0) for _ in range(min(workers, len(classes)))]
+    for cost, ids in costs:
+        index = min(range(len(partitions)), key=lambda i: partitions[i][1])
+        partitions[index] = (partitions[index][0] + ids, partitions[index][1] + cost)
+    return sorted(partitions, key=lambda partition: partition[1], reverse=True)
+
+def warm_server(url):
+    """Warm url up before anything is timed and say how long it took."""
+    report = warmup.warm_up(url)
+    state = "steady" if report.steady else "not steady"
+    return (f"Warmed up {url} in {report.rounds} rounds, {report.seconds:.1f}s "
+            f"({state} at {report.round_times[-1] * 1000:.1f}ms per round)")
+
+def record_durations(result):
+    # The history only guides scheduling, so a locked or broken database must not fail the run
+    try:
+        durations.record(result.durations)
+    except sqlite3.Error as e:
+        print(colored(f"Warning: could not record test durations: {e}", "yellow"))
+
+def run_partition(test_ids, endpoint_timings, warm=False, in_process=False, record=None):
+    """Run test_ids against a leased server in a worker process and return a picklable outcome."""
+    # An in-process worker gets its own in-memory app instead of a lease
+    lease = None if in_process else server_pool.acquire()
+    url = inprocess.serve(memory_server.App()) if in_process else lease.url
+    server_pool.pin(url)
+    try:
+        if lease:
+            server.wait_until_ready(url, timeout=READY_TIMEOUT)
+        warmed = warm_server(url) if warm else None
+        tests = {test.id(): test for test in discover_tests()}
+        route_stats = instrumentation.RouteStats() if endpoint_timings else None
+        if route_stats:
+            instrumentation.subscribe(route_stats)
+        output = io.StringIO()
+        # Workers record to files of their own so rotation never races
+        traffic = instrumentation.subscribe(recorder.Recorder(recorder.worker_path(record))) if record else None
+        try:
+            result = DetailedTestRunner(stream=output, verbosity=2).run(
+                unittest.TestSuite(tests[test_id] for test_id in test_ids))
+        finally:
+            if traffic:
+                instrumentation.unsubscribe(traffic)
+                traffic.close()
+        return {
+            "server": url,
+            "warmup": warmed,
+            "output": output.getvalue(),
+            "testsRun": result.testsRun,
+            "successes": [(str(test), duration.total_seconds()) for test, duration in result.successes],
+            "failures": [(str(test), error) for test, error in result.failures],
+            "errors": [(str(test), error) for test, error in result.errors],
+            "durations": result.durations,
+            "test_phases": result.test_phases,
+            "phase_totals": result.phase_totals,
+            "total_time": result.total_time,
+            "routes": route_stats.routes if route_stats else {},
+        }
+    finally:
+        if lease:
+            lease.release()
+
+def run_tests(endpoint_timings=False, workers=1, start_server=False, warm=False, in_memory=False,
+              in_process=False, record=None):
+    if in_process:
+        return _run_in_process(endpoint_timings, workers, record)
+    # Launch one server per worker for this run, or use the running ones
+    servers = []
+    try:
+        if in_memory:
+            print(colored(f"Starting {max(workers, 1)} in-memory API server(s)...", "cyan"))
+            servers = server.start_servers(max(workers, 1), factory=memory_server.MemoryServer)
+            server_pool.use([started.url for started in servers])
+        elif start_server:
+            print(colored(f"Starting {max(workers, 1)} API server(s)...", "cyan"))
+            servers = server.start_servers(max(workers, 1))
+            server_pool.use([started.url for started in servers])
+            # Freshly started JVMs are always warmed before timing starts
+            warm = True
+        if workers > 1:
+            return _run_parallel(endpoint_timings, workers, warm, record=record)
+        return _run_leased(endpoint_timings, warm, record)
+    except server.ServerStartError as e:
+        print(colored(f"\n❌ API server unavailable: {e}", "red"))
+        return 1
+    finally:
+        for started in servers:
+            started.stop()
+
+def _run_leased(endpoint_timings, warm, record=None):
+    # Take exclusive use of a server from the pool unless one was pinned
+    lease = None
+    if "TODO_API_URL" not in os.environ:
+        lease = server_pool.acquire()
+        server_pool.pin(lease.url)
+    try:
+        url = server_pool.config.BASE_URL
+        server.wait_until_ready(url, timeout=READY_TIMEOUT)
+        print(colored(f"Using API server {url}", "cyan"))
+        if warm:
+            print(colored(warm_server(url), "cyan"))
+        return _run_serial(endpoint_timings, record)
+    finally:
+        if lease:
+            lease.release()
+
+def _run_in_process(endpoint_timings, workers, record=None):
+    # Requests become function calls into an in-memory app; nothing to start, lease or warm
+    if workers > 1:
+        return _run_parallel(endpoint_timings, workers, False, in_process=True, record=record)
+    server_pool.pin(inprocess.serve(memory_server.App()))
+    print(colored("Using an in-process API", "cyan"))
+    return _run_serial(endpoint_timings, record)
+
+def _run_serial(endpoint_timings, record=None):
+    test_suite = unittest.TestSuite(discover_tests())
+
+    # Time every request per endpoint if asked to
+    route_stats = instrumentation.RouteStats() if endpoint_timings else None
+    if route_stats:
+        instrumentation.subscribe(route_stats)
+
+    # Record every request and response to NDJSON if asked to
+    traffic = instrumentation.subscribe(recorder.Recorder(record)) if record else None
+
     # Create and run the test runner
     runner = DetailedTestRunner(verbosity=2)
     print(colored("\n=== Starting Test Suite Execution ===", "cyan"))
-    result = runner.run(test_suite)
+    try:
+        result = runner.run(test_suite)
+    finally:
+        if route_stats:
+            instrumentation.unsubscribe(route_stats)
+        if traffic:
+            instrumentation.unsubscribe(traffic)
+            traffic.close()
+            print(colored(f"Recorded {traffic.written} requests to {traffic.path}"
+                          f"{f' ({traffic.dropped} dropped)' if traffic.dropped else ''}", "cyan"))
+
+    record_durations(result)
+    return print_summary(result, route_stats)
+
+def _run_parallel(endpoint_timings, workers, warm, in_process=False, record=None):
+    partitions = partition_tests(discover_tests(), workers)
+    servers = len(server_pool.config.BASE_URLS)
+    if servers < len(partitions) and not in_process:
+        print(colored(f"Warning: {len(partitions)} workers share {servers} server(s) in TODO_API_URLS; "
+                      f"workers wait for a free server", "yellow"))
+
+    result = MergedTestResult()
+    route_stats = instrumentation.RouteStats() if endpoint_timings else None
+    print(colored(f"\n=== Starting Test Suite Execution on {len(partitions)} workers ===", "cyan"))
+    for ids, expected in partitions:
+        print(f"Worker: {len(ids)} tests, ~{expected:.1f}s expected")
+    # spawn gives each worker a clean interpreter, so it imports the API
+    # client only after pinning its own server
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=len(partitions), mp_context=context) as pool:
+        futures = [pool.submit(run_partition, ids, endpoint_timings, warm, in_process, record)
+                   for ids, _ in partitions]
+        for future in as_completed(futures):
+            outcome = future.result()
+            print(colored(f"\n--- Worker on {outcome['server']} ({outcome['testsRun']} tests) ---", "cyan"))
+            if outcome["warmup"]:
+                print(colored(outcome["warmup"], "cyan"))
+            print(outcome["output"], end="")
+            result.merge(outcome)
+            if route_stats:
+                route_stats.merge(outcome["routes"])
+
+    record_durations(result)
+    return print_summary(result, route_stats)
 
-    # Calculate timing
-    total_time = sum((duration.total_seconds() for _, duration in result.successes), 0)
+def format_phases(phases):
+    """Format one test's phases as "setup 0.120s, body 0.004s, teardown 0.050s"."""
+    return ", ".join(f"{phase} {phases[phase][0]:.3f}s" for phase in PHASES if phases[phase][0])
+
+def print_phase_breakdown(result):
+    """Print where test time went by phase, split into HTTP and Python time."""
+    print(colored("\nPhase Breakdown:", "cyan"))
+    for phase, (seconds, http) in result.phase_totals.items():
+        share = seconds / result.total_time * 100 if result.total_time else 0.0
+        detail = "outside setUp/test/tearDown" if phase == "other" else \
+            f"HTTP {http:.2f}s, Python {seconds - http:.2f}s"
+        print(f"{phase:9}: {seconds:8.2f}s ({share:5.1f}%)  {detail}")
+    dominant = max(PHASES, key=lambda phase: result.phase_totals[phase][0])
+    print(f"Dominant phase: {colored(dominant, 'yellow')}")
+
+def print_summary(result, route_stats=None):
+    """Print the colored summary of a run and return the number of failed tests."""
+    # Calculate timing over every test run, whatever its outcome
+    total_time = result.total_time
 
     # Print detailed summary
     print("\n" + colored("========== Detailed Test Summary ==========", "cyan"))
@@ -42,22 +386,28 @@ def run_tests():
     if result.successes:
         print(colored("\nPassed Tests:", "green"))
         for test, duration in result.successes:
-            print(f"✓ {test} ({duration.total_seconds():.3f}s)")
+            phases = result.test_phases.get(str(test))
+            print(f"✓ {test} ({duration.total_seconds():.3f}s{': ' + format_phases(phases) if phases else ''})")
 
     # Print failed tests
     if result.failures:
         print(colored("\nFailed Tests:", "red"))
         for test, error in result.failures:
-            print(f"✗ {test}")
+            print(f"✗ {test} ({format_phases(result.test_phases.get(str(test), empty_phases()))})")
             print(colored(f"  Error: {error}", "red"))
 
     # Print errors
     if result.errors:
         print(colored("\nErrors:", "red"))
         for test, error in result.errors:
-            print(f"⚠ {test}")
+            print(f"⚠ {test} ({format_phases(result.test_phases.get(str(test), empty_phases()))})")
             print(colored(f"  Error: {error}", "red"))
 
+    print_phase_breakdown(result)
+
+    if route_stats:
+        print_endpoint_timings(route_stats)
+
     # Calculate totals
     total_tests = result.testsRun
     total_failures = len(result.failures) + len(result.errors)
@@ -81,6 +431,25 @@ def run_tests():
     return total_failures
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the Part A API test suite.")
+    parser.add_argument("--endpoint-timings", action="store_true",
+                        help="time every request and report the slowest endpoints")
+    parser.add_argument("--start-server", action="store_true",
+                        help="launch the bundled jar on a free port (one per worker) and stop it afterwards")
+    parser.add_argument("--in-memory", action="store_true",
+                        help="run against in-memory stand-ins for the jar (one per worker) instead of a JVM")
+    parser.add_argument("--in-process", action="store_true",
+                        help="answer requests by calling an in-memory API in each test process, with no sockets")
+    parser.add_argument("--record", nargs="?", const=recorder.config.RECORD_PATH, metavar="PATH",
+                        help="write every request and response to NDJSON (default recordings/requests.jsonl; "
+                             "one file per worker)")
+    parser.add_argument("--warmup", action="store_true",
+                        help="drive the endpoint mix until latency is steady before running (implied by --start-server)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="run test classes across N processes, each on its own server from TODO_API_URLS, "
+                             "longest first by previous run times")
+    args = parser.parse_args()
+
     # Install termcolor if not present
     try:
         from termcolor import colored
@@ -91,5 +460,7 @@ if __name__ == "__main__":
         from termcolor import colored
 
     # Run tests and exit with appropriate code
-    exit_code = run_tests()
+    exit_code = run_tests(endpoint_timings=args.endpoint_timings, workers=args.workers,
+                          start_server=args.start_server, warm=args.warmup, in_memory=args.in_memory,
+                          in_process=args.in_process, record=args.record)
     sys.exit(exit_code)
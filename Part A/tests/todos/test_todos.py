@@ -1,14 +1,12 @@
 import unittest
 from tests.utils.api_client import get, post, put, delete, head
+from tests.utils import config
+from tests.utils.streaming import stream_collection
 
 class TestTodosAPI(unittest.TestCase):
 
     def setUp(self):
         """Ensure a clean state before each test"""
-        # Verify system is running
-        response = get("/")
-        self.assertEqual(response.status_code, 200)
-
         # Save initial state
         self.initial_state = get("/todos").json()
 
@@ -56,6 +54,15 @@ class TestTodosAPI(unittest.TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.headers["Content-Type"], "application/xml")
 
+    def test_get_all_todos_xml_matches_json(self):
+        """Streamed XML collection decodes to the same todos as the JSON one"""
+        json_todos = {str(t["id"]): t for t in stream_collection(f"{config.BASE_URL}/todos")}
+        xml_todos = {str(t["id"]): t for t in stream_collection(f"{config.BASE_URL}/todos", headers={"Accept": "application/xml"})}
+        self.print_results("GET /todos (XML collection)", sorted(json_todos), sorted(xml_todos))
+        self.assertEqual(sorted(xml_todos), sorted(json_todos))
+        self.assertEqual(xml_todos[str(self.todo_id)]["title"], self.test_todo["title"])
+        self.assertEqual(xml_todos[str(self.todo_id)]["description"], json_todos[str(self.todo_id)]["description"])
+
     def test_get_non_existent_todo(self):
         response = get("/todos/999999")
         self.print_results("GET /todos/999999", 404, response.status_code)
@@ -0,0 +1,41 @@
+import asyncio
+import unittest
+from tests.utils.async_client import AsyncApiClient
+
+class TestTodosConcurrentAPI(unittest.IsolatedAsyncioTestCase):
+    """Tests that drive many requests at once through the asyncio client"""
+
+    async def asyncSetUp(self):
+        self.client = AsyncApiClient()
+        self.todo_ids = []
+
+    async def asyncTearDown(self):
+        await asyncio.gather(*(self.client.delete(f"/todos/{todo_id}") for todo_id in self.todo_ids))
+        await self.client.close()
+
+    async def test_post_todos_concurrently(self):
+        todos = [{"title": f"Concurrent Todo {i}", "description": "Async"} for i in range(50)]
+        responses = await asyncio.gather(*(
+            self.client.post("/todos", todo, headers={"Content-Type": "application/json"})
+            for todo in todos
+        ))
+        self.todo_ids = [response.json()["id"] for response in responses if response.status_code == 201]
+        self.assertEqual([response.status_code for response in responses], [201] * len(todos))
+        self.assertEqual(len(set(self.todo_ids)), len(todos))
+
+    async def test_get_todos_concurrently(self):
+        responses = await asyncio.gather(*(self.client.get("/todos") for _ in range(50)))
+        self.assertTrue(all(response.status_code == 200 for response in responses))
+        self.assertTrue(all("todos" in response.json() for response in responses))
+
+    async def test_post_todo_xml(self):
+        xml_payload = "<todo><title>Async XML Todo</title><description>Async</description></todo>"
+        response = await self.client.post("/todos", xml_payload, headers={
+            "Content-Type": "application/xml",
+            "Accept": "application/json"
+        })
+        self.assertEqual(response.status_code, 201)
+        self.todo_ids.append(response.json()["id"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,26 +1,92 @@
+import threading
 import requests
-from tests.utils.config import BASE_URL
+from tests.utils import config
+from tests.utils.inprocess import InProcessAdapter
+
+_adapter = None
+_adapter_lock = threading.Lock()
+_local = threading.local()
+
+def create_adapter(pool_connections=None, pool_maxsize=None, pool_block=None):
+    """
+    Create an instrumented transport adapter with its own keep-alive connection pools.
+
+    Requests to apps registered with tests.utils.inprocess skip the network.
+    """
+    return InProcessAdapter(
+        pool_connections=pool_connections or config.POOL_CONNECTIONS,
+        pool_maxsize=pool_maxsize or config.POOL_MAXSIZE,
+        pool_block=config.POOL_BLOCK if pool_block is None else pool_block,
+    )
+
+def create_session(adapter=None):
+    """Create a session that sends every request through one adapter."""
+    session = requests.Session()
+    adapter = adapter or create_adapter()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    if not config.KEEP_ALIVE:
+        session.headers["Connection"] = "close"
+    return session
+
+def _shared_adapter():
+    global _adapter
+    if _adapter is None:
+        with _adapter_lock:
+            if _adapter is None:
+                _adapter = create_adapter()
+    return _adapter
+
+def get_session():
+    """
+    Return the calling thread's session.
+
+    requests.Session is not thread-safe, so each thread gets its own, but all
+    of them share one adapter and therefore one set of connection pools.
+    """
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = _local.session = create_session(_shared_adapter())
+    return session
+
+class _ThreadSession:
+    """Stand-in for the requests module that uses the calling thread's pooled session."""
+
+    def __getattr__(self, name):
+        return getattr(get_session(), name)
+
+# session.get(url), session.post(url, json=...) etc. for callers that build full URLs
+session = _ThreadSession()
+
+def close():
+    """Close every pooled connection."""
+    global _adapter
+    with _adapter_lock:
+        if _adapter is not None:
+            _adapter.close()
+            _adapter = None
+    _local.__dict__.clear()
 
 def get(endpoint, headers=None):
     """Send a GET request."""
-    return requests.get(f"{BASE_URL}{endpoint}", headers=headers)
+    return get_session().get(f"{config.BASE_URL}{endpoint}", headers=headers)
 
 def post(endpoint, data=None, headers=None):
     """Send a POST request."""
     if headers and headers.get("Content-Type") == "application/xml":
-        return requests.post(f"{BASE_URL}{endpoint}", data=data, headers=headers)
-    return requests.post(f"{BASE_URL}{endpoint}", json=data, headers=headers)
+        return get_session().post(f"{config.BASE_URL}{endpoint}", data=data, headers=headers)
+    return get_session().post(f"{config.BASE_URL}{endpoint}", json=data, headers=headers)
 
 def put(endpoint, data=None, headers=None):
     """Send a PUT request."""
     if headers and headers.get("Content-Type") == "application/xml":
-        return requests.put(f"{BASE_URL}{endpoint}", data=data, headers=headers)
-    return requests.put(f"{BASE_URL}{endpoint}", json=data, headers=headers)
+        return get_session().put(f"{config.BASE_URL}{endpoint}", data=data, headers=headers)
+    return get_session().put(f"{config.BASE_URL}{endpoint}", json=data, headers=headers)
 
 def delete(endpoint, headers=None):
     """Send a DELETE request."""
-    return requests.delete(f"{BASE_URL}{endpoint}", headers=headers)
+    return get_session().delete(f"{config.BASE_URL}{endpoint}", headers=headers)
 
 def head(endpoint, headers=None):
     """Send a HEAD request."""
-    return requests.head(f"{BASE_URL}{endpoint}", headers=headers)
+    return get_session().head(f"{config.BASE_URL}{endpoint}", headers=headers)
@@ -0,0 +1,211 @@
+"""
+asyncio counterpart to api_client.
+
+    async with AsyncApiClient() as client:
+        responses = await asyncio.gather(*(client.get("/todos") for _ in range(100)))
+
+Every request made through one client shares a single aiohttp connector, so
+hundreds of requests can be in flight from one event loop without a thread
+per request. While tests.utils.instrumentation has subscribers, each request
+is published to them as a RequestTiming, just like api_client's.
+"""
+import asyncio
+import json
+import weakref
+from collections import namedtuple
+from time import perf_counter
+from types import SimpleNamespace
+import aiohttp
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+from tests.utils import config, inprocess, instrumentation
+
+_clients = weakref.WeakKeyDictionary()
+
+# The request half of a RequestTiming from this client
+SentRequest = namedtuple("SentRequest", ["method", "url", "headers", "body"])
+
+async def _connect_started(session, trace, params):
+    trace.connect_started = perf_counter()
+
+async def _connect_finished(session, trace, params):
+    if trace.trace_request_ctx is not None:
+        trace.trace_request_ctx.connect += perf_counter() - trace.connect_started
+
+# Adds the time spent opening connections to the request's trace_request_ctx
+_TRACE_CONFIG = aiohttp.TraceConfig()
+_TRACE_CONFIG.on_connection_create_start.append(_connect_started)
+_TRACE_CONFIG.on_connection_create_end.append(_connect_finished)
+
+def _encode(kwargs):
+    """(headers, body bytes) of a request as sent."""
+    headers = CaseInsensitiveDict(kwargs["headers"] or {})
+    data = kwargs.get("data")
+    body = data.encode("utf-8") if isinstance(data, str) else data or b""
+    if "json" in kwargs:
+        body = json.dumps(kwargs["json"]).encode("utf-8")
+        headers.setdefault("Content-Type", "application/json")
+    return headers, body
+
+class AsyncResponse:
+    """A fully read response exposing the parts of requests.Response the tests use."""
+
+    def __init__(self, status_code, headers, content, encoding=None):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.encoding = encoding or "utf-8"
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding, errors="replace")
+
+    def json(self):
+        return json.loads(self.content)
+
+class AsyncApiClient:
+    """Send requests to the API over one pooled event-loop transport."""
+
+    def __init__(self, base_url=None, limit=None, limit_per_host=None):
+        self.base_url = base_url or config.BASE_URL
+        self.limit = limit or config.ASYNC_POOL_LIMIT
+        self.limit_per_host = limit_per_host or config.ASYNC_POOL_LIMIT_PER_HOST
+        self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    @property
+    def closed(self):
+        return self._session is not None and self._session.closed
+
+    def _get_session(self):
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                force_close=not config.KEEP_ALIVE,
+            )
+            self._session = aiohttp.ClientSession(connector=connector, trace_configs=[_TRACE_CONFIG])
+        return self._session
+
+    async def close(self):
+        """Close the session and every pooled connection."""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def request(self, method, endpoint, data=None, headers=None):
+        """Send a request and read the whole body before returning."""
+        kwargs = {"headers": headers}
+        if data is not None:
+            if headers and headers.get("Content-Type") == "application/xml":
+                kwargs["data"] = data
+            else:
+                kwargs["json"] = data
+        url = f"{self.base_url}{endpoint}"
+        app = inprocess.app_for(url)
+        if instrumentation.enabled():
+            return await self._timed(app, method, url, kwargs)
+        if app is not None:
+            return self._call(app, method, url, kwargs)
+        return await self._send(method, url, kwargs)
+
+    async def _send(self, method, url, kwargs, trace=None):
+        async with self._get_session().request(method, url, trace_request_ctx=trace, **kwargs) as response:
+            if trace is not None:
+                trace.headers_received = perf_counter()
+            content = await response.read()
+            return AsyncResponse(response.status, response.headers, content, response.charset)
+
+    async def _timed(self, app, method, url, kwargs):
+        trace = SimpleNamespace(connect=0.0, headers_received=None)
+        started = perf_counter()
+        if app is not None:
+            response = self._call(app, method, url, kwargs)
+        else:
+            response = await self._send(method, url, kwargs, trace)
+        finished = perf_counter()
+        headers_received = trace.headers_received or finished
+        headers, body = _encode(kwargs)
+        instrumentation.publish(instrumentation.RequestTiming(
+            method=method,
+            url=url,
+            route=instrumentation.route_template(url),
+            status_code=response.status_code,
+            bytes_out=len(body),
+            bytes_in=len(response.content),
+            connect=trace.connect,
+            ttfb=headers_received - started - trace.connect,
+            read=finished - headers_received,
+            total=finished - started,
+            started=started,
+            request=SentRequest(method, url, headers, body or None),
+            response=response,
+        ))
+        return response
+
+    def _call(self, app, method, url, kwargs):
+        # An in-process app answers straight away, so there is nothing to await
+        headers, body = _encode(kwargs)
+        status, response_headers, content = inprocess.call(app, method, url, headers, body)
+        response_headers = CaseInsensitiveDict(response_headers)
+        return AsyncResponse(int(status.split()[0]), response_headers, content,
+                             get_encoding_from_headers(response_headers))
+
+    async def get(self, endpoint, headers=None):
+        """Send a GET request."""
+        return await self.request("GET", endpoint, headers=headers)
+
+    async def post(self, endpoint, data=None, headers=None):
+        """Send a POST request."""
+        return await self.request("POST", endpoint, data=data, headers=headers)
+
+    async def put(self, endpoint, data=None, headers=None):
+        """Send a PUT request."""
+        return await self.request("PUT", endpoint, data=data, headers=headers)
+
+    async def delete(self, endpoint, headers=None):
+        """Send a DELETE request."""
+        return await self.request("DELETE", endpoint, headers=headers)
+
+    async def head(self, endpoint, headers=None):
+        """Send a HEAD request."""
+        return await self.request("HEAD", endpoint, headers=headers)
+
+def get_client():
+    """Return the shared client for the running event loop."""
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client.closed:
+        client = _clients[loop] = AsyncApiClient()
+    return client
+
+async def close():
+    """Close the running event loop's shared client."""
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.close()
+
+async def get(endpoint, headers=None):
+    """Send a GET request."""
+    return await get_client().get(endpoint, headers=headers)
+
+async def post(endpoint, data=None, headers=None):
+    """Send a POST request."""
+    return await get_client().post(endpoint, data=data, headers=headers)
+
+async def put(endpoint, data=None, headers=None):
+    """Send a PUT request."""
+    return await get_client().put(endpoint, data=data, headers=headers)
+
+async def delete(endpoint, headers=None):
+    """Send a DELETE request."""
+    return await get_client().delete(endpoint, headers=headers)
+
+async def head(endpoint, headers=None):
+    """Send a HEAD request."""
+    return await get_client().head(endpoint, headers=headers)
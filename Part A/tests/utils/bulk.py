@@ -0,0 +1,72 @@
+"""
+Bulk entity creation for fixtures and scale tests.
+
+    results = bulk_create("todos", [{"title": f"Todo {i}"} for i in range(10000)], concurrency=16)
+    todo_ids = [result.id for result in results]
+
+POSTs are fanned out over a bounded thread pool whose workers each use their
+own session on api_client's shared connection pool, so connections stay open
+from one call to the next. Workers are capped at config.POOL_MAXSIZE
+(API_POOL_MAXSIZE), since connections beyond what the pool keeps would be
+opened and discarded on every call. Results always come back in input order.
+"""
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from tests.utils import config
+from tests.utils.api_client import get_session
+
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+class BulkResult(namedtuple("BulkResult", ["index", "entity_type", "status_code", "id", "entity", "error"])):
+    """Outcome of one item in a bulk request."""
+
+    @property
+    def ok(self):
+        return self.error is None and self.status_code in (200, 201)
+
+def run_concurrently(calls, concurrency=None):
+    """
+    Run zero-argument callables on a bounded thread pool.
+
+    At most config.POOL_MAXSIZE calls run at once. Results are returned in
+    input order.
+    """
+    calls = list(calls)
+    if not calls:
+        return []
+    workers = max(1, min(concurrency or config.BULK_CONCURRENCY, config.POOL_MAXSIZE, len(calls)))
+    if workers == 1:
+        return [call() for call in calls]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(lambda call: call(), calls))
+
+def create_entities(items, concurrency=None, base_url=None):
+    """
+    POST each (entity_type, payload) pair and return one BulkResult per item.
+
+    entity_type is the collection path without the leading slash, e.g.
+    "todos" or "categories/1/todos". Failures are reported per item rather
+    than raised. base_url defaults to config.BASE_URL as it is when called.
+    """
+    base_url = base_url or config.BASE_URL
+
+    def create(index, entity_type, payload):
+        try:
+            response = get_session().post(f"{base_url}/{entity_type}", json=payload, headers=JSON_HEADERS)
+        except Exception as e:
+            return BulkResult(index, entity_type, None, None, None, e)
+        try:
+            entity = response.json()
+        except ValueError:
+            entity = None
+        entity_id = entity.get("id") if isinstance(entity, dict) else None
+        return BulkResult(index, entity_type, response.status_code, entity_id, entity, None)
+
+    return run_concurrently(
+        [lambda i=i, t=t, p=p: create(i, t, p) for i, (t, p) in enumerate(items)],
+        concurrency,
+    )
+
+def bulk_create(entity_type, payloads, concurrency=None, base_url=None):
+    """Create many entities of one type; see create_entities."""
+    return create_entities(((entity_type, payload) for payload in payloads), concurrency, base_url)
@@ -1,2 +1,45 @@
-# Application root URL
-BASE_URL = "http://localhost:4567"
\ No newline at end of file
+import os
+
+# Application root URLs. TODO_API_URLS is a comma-separated pool of servers,
+# one per worker (see tests.utils.server_pool); TODO_API_URL pins this process
+# to one server and defaults to the first in the pool.
+BASE_URLS = [url.strip().rstrip("/") for url in os.environ.get("TODO_API_URLS", "").split(",") if url.strip()]
+if not BASE_URLS:
+    BASE_URLS = ["http://localhost:4567"]
+BASE_URL = os.environ.get("TODO_API_URL", BASE_URLS[0]).rstrip("/")
+
+# Connection pooling for the API client. POOL_CONNECTIONS is how many hosts
+# keep a pool, POOL_MAXSIZE how many keep-alive connections each host keeps.
+# Set API_KEEP_ALIVE=0 to close the connection after every request.
+KEEP_ALIVE = os.environ.get("API_KEEP_ALIVE", "1") != "0"
+POOL_CONNECTIONS = int(os.environ.get("API_POOL_CONNECTIONS", "4"))
+POOL_MAXSIZE = int(os.environ.get("API_POOL_MAXSIZE", "16"))
+POOL_BLOCK = os.environ.get("API_POOL_BLOCK", "0") == "1"
+
+# Connection limits for the asyncio client: total sockets shared by every
+# in-flight request, and the most open to any one server.
+ASYNC_POOL_LIMIT = int(os.environ.get("API_ASYNC_POOL_LIMIT", "200"))
+ASYNC_POOL_LIMIT_PER_HOST = int(os.environ.get("API_ASYNC_POOL_LIMIT_PER_HOST", "200"))
+
+# Worker threads used by tests.utils.bulk when no concurrency is given.
+BULK_CONCURRENCY = int(os.environ.get("API_BULK_CONCURRENCY", "16"))
+
+# JVM warm-up before timed runs (tests.utils.warmup): rounds of the endpoint
+# mix are repeated until the median round time of the last WARMUP_WINDOW rounds
+# is within WARMUP_TOLERANCE of the window before, or WARMUP_MAX_ROUNDS pass.
+WARMUP_MIN_ROUNDS = int(os.environ.get("API_WARMUP_MIN_ROUNDS", "10"))
+WARMUP_MAX_ROUNDS = int(os.environ.get("API_WARMUP_MAX_ROUNDS", "200"))
+WARMUP_WINDOW = int(os.environ.get("API_WARMUP_WINDOW", "10"))
+WARMUP_TOLERANCE = float(os.environ.get("API_WARMUP_TOLERANCE", "0.05"))
+
+# Traffic recording (tests.utils.recorder): NDJSON file written by a background
+# thread in batches of up to RECORD_BATCH records, rotated to .1, .2, ... once
+# it would pass RECORD_MAX_BYTES, keeping RECORD_BACKUPS old files.
+RECORD_PATH = os.environ.get(
+    "API_RECORD_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                 "recordings", "requests.jsonl"),
+)
+RECORD_MAX_BYTES = int(os.environ.get("API_RECORD_MAX_BYTES", str(64 * 1024 * 1024)))
+RECORD_BACKUPS = int(os.environ.get("API_RECORD_BACKUPS", "5"))
+RECORD_BATCH = int(os.environ.get("API_RECORD_BATCH", "256"))
@@ -0,0 +1,103 @@
+"""
+Per-test duration history kept across runs in a small SQLite database.
+
+    durations.record([(test.id(), seconds), ...])
+    history = durations.load()
+    history[test_id].estimate
+
+Each test keeps a running mean and variance (Welford) over every run and an
+exponential moving average that follows recent runs. The parallel runner
+uses the estimates to schedule the longest tests first.
+"""
+import math
+import os
+import sqlite3
+import time
+from collections import namedtuple
+
+# Database file; override with TEST_DURATIONS_DB
+DB_PATH = os.environ.get(
+    "TEST_DURATIONS_DB",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), ".test_durations.sqlite3"),
+)
+
+# Weight of the latest run in the moving average
+EMA_ALPHA = 0.3
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS durations (
+    test_id TEXT PRIMARY KEY,
+    runs INTEGER NOT NULL,
+    mean REAL NOT NULL,
+    m2 REAL NOT NULL,
+    ema REAL NOT NULL,
+    last REAL NOT NULL,
+    updated REAL NOT NULL
+)
+"""
+
+class Duration(namedtuple("Duration", ["runs", "mean", "m2", "ema", "last"])):
+    """Rolling statistics for one test, in seconds."""
+
+    @property
+    def stdev(self):
+        return math.sqrt(self.m2 / (self.runs - 1)) if self.runs > 1 else 0.0
+
+    @property
+    def estimate(self):
+        """Expected duration of the next run."""
+        return self.ema
+
+def _connect(path):
+    connection = sqlite3.connect(path or DB_PATH, timeout=30)
+    connection.execute(_SCHEMA)
+    return connection
+
+def load(path=None):
+    """Return {test_id: Duration} for every test with history."""
+    if not os.path.exists(path or DB_PATH):
+        return {}
+    connection = _connect(path)
+    try:
+        rows = connection.execute("SELECT test_id, runs, mean, m2, ema, last FROM durations")
+        return {test_id: Duration(*stats) for test_id, *stats in rows}
+    finally:
+        connection.close()
+
+def record(durations, path=None):
+    """Fold (test_id, seconds) pairs from one run into the history."""
+    durations = list(durations)
+    if not durations:
+        return
+    connection = _connect(path)
+    try:
+        with connection:
+            for test_id, seconds in durations:
+                row = connection.execute(
+                    "SELECT runs, mean, m2, ema, last FROM durations WHERE test_id = ?", (test_id,)).fetchone()
+                if row:
+                    runs, mean, m2, ema, _ = row
+                    runs += 1
+                    delta = seconds - mean
+                    mean += delta / runs
+                    m2 += delta * (seconds - mean)
+                    ema = EMA_ALPHA * seconds + (1 - EMA_ALPHA) * ema
+                else:
+                    runs, mean, m2, ema = 1, seconds, 0.0, seconds
+                connection.execute(
+                    "INSERT OR REPLACE INTO durations VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (test_id, runs, mean, m2, ema, seconds, time.time()))
+    finally:
+        connection.close()
+
+def estimates(test_ids, history=None):
+    """
+    Return {test_id: expected seconds} for test_ids.
+
+    Tests without history are assumed to take the median of those with it,
+    or one second when there is no history at all.
+    """
+    history = load() if history is None else history
+    known = sorted(stats.estimate for stats in history.values())
+    default = known[len(known) // 2] if known else 1.0
+    return {test_id: history[test_id].estimate if test_id in history else default for test_id in test_ids}
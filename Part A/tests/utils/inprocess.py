@@ -0,0 +1,129 @@
+"""
+Send API requests straight to a WSGI app in this process, with no sockets.
+
+    url = inprocess.serve(memory_server.App())
+    server_pool.pin(url)
+    get("/todos")  # answered by a function call
+
+Every session built by api_client sends through InProcessAdapter. A request
+whose scheme and host match a served app is turned into a WSGI environ and
+handed to the app, and its answer comes back as an ordinary
+requests.Response, so status_code, headers, .json(), .text and streaming all
+work unchanged. Any other URL goes out over HTTP as usual, and the
+instrumentation hooks see both kinds of request. AsyncApiClient checks
+app_for the same way and calls the app directly.
+"""
+import io
+import itertools
+import sys
+import threading
+from urllib.parse import unquote, urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+from tests.utils.instrumentation import InstrumentedAdapter
+
+# scheme://host[:port] -> WSGI app
+_apps = {}
+_apps_lock = threading.Lock()
+_serial = itertools.count(1)
+
+def _origin(url):
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}".lower()
+
+def register(url, app):
+    """Answer requests to url's scheme and host with app; replaces any app already there."""
+    with _apps_lock:
+        _apps[_origin(url)] = app
+
+def unregister(url):
+    with _apps_lock:
+        _apps.pop(_origin(url), None)
+
+def serve(app):
+    """Register app under a new base URL of its own and return the URL."""
+    url = f"http://in-process-{next(_serial)}"
+    register(url, app)
+    return url
+
+def app_for(url):
+    """The app registered for url, or None if it should go over the network."""
+    return _apps.get(_origin(url)) if _apps else None
+
+def _environ(method, parts, headers, body):
+    environ = {
+        "REQUEST_METHOD": method,
+        "SCRIPT_NAME": "",
+        "PATH_INFO": unquote(parts.path) or "/",
+        "QUERY_STRING": parts.query,
+        "SERVER_NAME": parts.hostname or "",
+        "SERVER_PORT": str(parts.port or (443 if parts.scheme == "https" else 80)),
+        "SERVER_PROTOCOL": "HTTP/1.1",
+        "CONTENT_LENGTH": str(len(body)),
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": parts.scheme,
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False,
+    }
+    for name, value in headers.items():
+        key = name.upper().replace("-", "_")
+        if key == "CONTENT_TYPE":
+            environ[key] = value
+        elif key != "CONTENT_LENGTH":
+            environ[f"HTTP_{key}"] = value
+    return environ
+
+def call(app, method, url, headers, body=b""):
+    """Call app with one request; return (status line, [(header, value)], payload bytes)."""
+    started = {}
+    written = []
+
+    def start_response(status, response_headers, exc_info=None):
+        if exc_info and started:
+            raise exc_info[1].with_traceback(exc_info[2])
+        started["status"], started["headers"] = status, response_headers
+        return written.append
+
+    result = app(_environ(method, urlsplit(url), headers, body), start_response)
+    try:
+        payload = b"".join(written) + b"".join(result)
+    finally:
+        if hasattr(result, "close"):
+            result.close()
+    return started["status"], started["headers"], payload
+
+class WSGITransport(HTTPAdapter):
+    """HTTPAdapter that hands requests for registered URLs to their WSGI app instead."""
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        app = app_for(request.url)
+        if app is None:
+            return super().send(request, stream=stream, timeout=timeout, verify=verify, cert=cert, proxies=proxies)
+        body = request.body or b""
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        elif not isinstance(body, bytes):
+            body = b"".join(chunk.encode("utf-8") if isinstance(chunk, str) else chunk for chunk in body)
+        status, headers, payload = call(app, request.method, request.url, request.headers, body)
+
+        response = requests.Response()
+        code, _, reason = status.partition(" ")
+        response.status_code = int(code)
+        response.reason = reason
+        response.headers = CaseInsensitiveDict(headers)
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.raw = io.BytesIO(payload)
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        if not stream:
+            response.content
+        return response
+
+class InProcessAdapter(InstrumentedAdapter, WSGITransport):
+    """The instrumented adapter, sending to in-process apps where one is registered."""
@@ -0,0 +1,203 @@
+"""
+Per-request timing hooks for the API client.
+
+    from tests.utils import instrumentation
+
+    def log(timing):
+        print(timing.method, timing.route, timing.status_code, f"{timing.total:.3f}s")
+
+    with instrumentation.subscribed(log):
+        get("/todos")
+
+Every session built by api_client sends through InstrumentedAdapter, and
+async_client publishes the same RequestTiming for its requests. While no
+subscriber is registered both send as they would uninstrumented, so the hooks
+cost nothing when disabled. The warm-up rounds and readiness probes in
+tests.utils.warmup and tests.utils.server use plain sessions on purpose and
+are not seen. A subscriber that raises is logged and skipped;
+it never fails the request it observed.
+"""
+import logging
+import threading
+from collections import namedtuple
+from contextlib import contextmanager
+from time import perf_counter
+from urllib.parse import urlsplit
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+# Path segments that are followed by an instance id, e.g. /todos/:id/tasksof/:id2
+COLLECTIONS = {"todos", "projects", "categories", "tasks", "tasksof"}
+
+# Path segment or relationship name -> the collection its ids belong to
+ENTITY_OF = {
+    "todos": "todos", "tasks": "todos",
+    "projects": "projects", "tasksof": "projects",
+    "categories": "categories",
+}
+
+# connect, ttfb and read are disjoint phases of total, all in seconds.
+# bytes_in is None when the body was streamed rather than read here.
+RequestTiming = namedtuple("RequestTiming", [
+    "method", "url", "route", "status_code", "bytes_out", "bytes_in",
+    "connect", "ttfb", "read", "total", "started", "request", "response",
+])
+
+logger = logging.getLogger(__name__)
+
+_subscribers = []
+_subscribers_lock = threading.Lock()
+_local = threading.local()
+
+def subscribe(callback):
+    """Call callback(timing) after every instrumented request."""
+    with _subscribers_lock:
+        _subscribers.append(callback)
+    return callback
+
+def unsubscribe(callback):
+    """Stop calling a subscribed callback."""
+    with _subscribers_lock:
+        if callback in _subscribers:
+            _subscribers.remove(callback)
+
+@contextmanager
+def subscribed(callback):
+    """Subscribe callback for the duration of a with block."""
+    subscribe(callback)
+    try:
+        yield callback
+    finally:
+        unsubscribe(callback)
+
+def enabled():
+    """Whether any subscriber is registered."""
+    return bool(_subscribers)
+
+def publish(timing):
+    """Call every subscriber with timing; one that raises is logged and skipped."""
+    for callback in list(_subscribers):
+        try:
+            callback(timing)
+        except Exception:
+            logger.exception("instrumentation subscriber %r failed on %s %s",
+                             callback, timing.method, timing.url)
+
+def route_template(url):
+    """Return the path of url with instance ids replaced, e.g. /todos/:id/tasksof/:id2."""
+    segments = urlsplit(url).path.split("/")
+    ids = 0
+    for i in range(1, len(segments)):
+        if segments[i] and segments[i - 1] in COLLECTIONS:
+            ids += 1
+            segments[i] = ":id" if ids == 1 else f":id{ids}"
+    return "/".join(segments)
+
+def _body_size(body):
+    if body is None:
+        return 0
+    if isinstance(body, str):
+        return len(body.encode("utf-8"))
+    if isinstance(body, (bytes, bytearray)):
+        return len(body)
+    return None
+
+class _TimedConnectMixin:
+    def connect(self):
+        start = perf_counter()
+        try:
+            super().connect()
+        finally:
+            _local.connect = getattr(_local, "connect", 0.0) + perf_counter() - start
+
+class TimedHTTPConnection(_TimedConnectMixin, HTTPConnection):
+    pass
+
+class TimedHTTPSConnection(_TimedConnectMixin, HTTPSConnection):
+    pass
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+class InstrumentedAdapter(HTTPAdapter):
+    """HTTPAdapter that reports a RequestTiming to every subscriber."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": TimedHTTPConnectionPool,
+            "https": TimedHTTPSConnectionPool,
+        }
+
+    def send(self, request, stream=False, **kwargs):
+        if not _subscribers:
+            return super().send(request, stream=stream, **kwargs)
+
+        _local.connect = 0.0
+        started = perf_counter()
+        response = super().send(request, stream=True, **kwargs)
+        headers_received = perf_counter()
+        if not stream:
+            response.content  # read the body inside the timed window
+        finished = perf_counter()
+
+        connect = _local.connect
+        timing = RequestTiming(
+            method=request.method,
+            url=request.url,
+            route=route_template(request.url),
+            status_code=response.status_code,
+            bytes_out=_body_size(request.body),
+            bytes_in=None if stream else len(response.content),
+            connect=connect,
+            ttfb=headers_received - started - connect,
+            read=finished - headers_received,
+            total=finished - started,
+            started=started,
+            request=request,
+            response=response,
+        )
+        publish(timing)
+        return response
+
+class RouteStats:
+    """Subscriber that aggregates timings per (method, route)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.routes = {}
+
+    def __call__(self, timing):
+        key = (timing.method, timing.route)
+        with self._lock:
+            stats = self.routes.setdefault(key, {
+                "count": 0, "total": 0.0, "max": 0.0,
+                "connect": 0.0, "ttfb": 0.0, "read": 0.0,
+                "bytes_out": 0, "bytes_in": 0,
+            })
+            stats["count"] += 1
+            stats["total"] += timing.total
+            stats["max"] = max(stats["max"], timing.total)
+            stats["connect"] += timing.connect
+            stats["ttfb"] += timing.ttfb
+            stats["read"] += timing.read
+            stats["bytes_out"] += timing.bytes_out or 0
+            stats["bytes_in"] += timing.bytes_in or 0
+
+    def merge(self, routes):
+        """Add the routes of another RouteStats, e.g. one collected in a worker process."""
+        with self._lock:
+            for key, other in routes.items():
+                stats = self.routes.setdefault(key, dict.fromkeys(other, 0))
+                for field, value in other.items():
+                    stats[field] = max(stats[field], value) if field == "max" else stats[field] + value
+
+    def slowest(self, limit=None):
+        """Return ((method, route), stats) pairs ordered by total time spent."""
+        with self._lock:
+            ranked = sorted(self.routes.items(), key=lambda item: item[1]["total"], reverse=True)
+        return ranked[:limit] if limit else ranked
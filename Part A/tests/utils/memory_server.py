@@ -0,0 +1,910 @@
+"""
+An in-memory stand-in for the bundled Thingifier todo manager.
+
+    with MemoryServer() as server:
+        server_pool.pin(server.url)
+        ...
+
+TodoManager holds todos, projects and categories with the jar's seed data,
+per-entity id counters and relationships, in tables indexed by id, GUID and
+field value. App serves it as a WSGI application with the jar's routes,
+status codes, headers and errorMessages bodies, JSON and XML, quirks
+included, so both suites can run without a JVM in milliseconds per test.
+MemoryServer runs an App on a local port behind the same start/stop
+interface as ThingifierServer.
+"""
+import json
+import re
+import threading
+import uuid
+import xml.etree.ElementTree as ET
+from decimal import Decimal
+from socketserver import ThreadingMixIn
+from urllib.parse import parse_qsl
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+from xml.sax.saxutils import escape
+
+ID, STRING, BOOLEAN = "ID", "STRING", "BOOLEAN"
+
+# Fields that identify an instance and can never be set from a body
+PROTECTED = ("id", "guid")
+
+class Entity:
+    """The definition of one kind of thing: fields in render order and relationships."""
+
+    def __init__(self, name, plural, fields, mandatory=()):
+        self.name = name
+        self.plural = plural
+        self.fields = dict(fields)
+        self.mandatory = set(mandatory)
+        # name -> (target entity name, reverse name for two-way relationships)
+        self.relationships = {}
+
+    def default(self, field):
+        return "false" if self.fields[field] == BOOLEAN else ""
+
+    def problems(self, field, value):
+        """Return the jar's validation messages for setting field to value."""
+        if self.fields[field] == BOOLEAN and value.lower() not in ("true", "false"):
+            return [f"{field} : {value} does not match type BOOLEAN (true, false)"]
+        if field in self.mandatory and not value.strip():
+            return [f"{field} : can not be empty"]
+        return []
+
+    def __repr__(self):
+        return f"Entity({self.name!r})"
+
+def todo_manager_model():
+    """Return {name: Entity} for the todo manager as the jar defines it."""
+    entities = {
+        "todo": Entity("todo", "todos", [("id", ID), ("title", STRING), ("doneStatus", BOOLEAN),
+                                         ("description", STRING)], mandatory=["title"]),
+        "project": Entity("project", "projects", [("id", ID), ("title", STRING), ("completed", BOOLEAN),
+                                                  ("active", BOOLEAN), ("description", STRING)]),
+        "category": Entity("category", "categories", [("id", ID), ("title", STRING), ("description", STRING)],
+                           mandatory=["title"]),
+    }
+    for source, name, target, reverse in (
+            ("project", "tasks", "todo", "tasksof"),
+            ("project", "categories", "category", None),
+            ("category", "todos", "todo", None),
+            ("category", "projects", "project", None),
+            ("todo", "categories", "category", None)):
+        entities[source].relationships[name] = (target, reverse)
+        if reverse:
+            entities[target].relationships[reverse] = (source, name)
+    return entities
+
+class Instance:
+    """One stored thing: assigned field values and its outgoing relationships."""
+
+    __slots__ = ("entity", "guid", "values", "related")
+
+    def __init__(self, entity, guid, values):
+        self.entity = entity
+        self.guid = guid
+        self.values = values
+        # relationship name -> {guid: Instance}, kept in the order connected
+        self.related = {}
+
+    @property
+    def id(self):
+        return self.values["id"]
+
+    def value(self, field):
+        return self.values.get(field) or self.entity.default(field)
+
+    def connected(self, name):
+        return list(self.related.get(name, {}).values())
+
+    def __repr__(self):
+        return f"<{self.entity.name} {self.id}>"
+
+class Table:
+    """Every instance of one entity, indexed by id, GUID and each field's value."""
+
+    def __init__(self, entity):
+        self.entity = entity
+        self.next_id = 1
+        self.by_id = {}
+        self.by_guid = {}
+        # field -> value -> {id: Instance}
+        self.by_field = {field: {} for field in entity.fields if field != "id"}
+
+    def __len__(self):
+        return len(self.by_id)
+
+    def instances(self):
+        return list(self.by_id.values())
+
+    def allocate_id(self):
+        self.next_id += 1
+        return str(self.next_id - 1)
+
+    def add(self, instance):
+        self.by_id[instance.id] = instance
+        self.by_guid[instance.guid] = instance
+        for field, index in self.by_field.items():
+            index.setdefault(instance.value(field), {})[instance.id] = instance
+
+    def remove(self, instance):
+        del self.by_id[instance.id]
+        del self.by_guid[instance.guid]
+        for field, index in self.by_field.items():
+            index[instance.value(field)].pop(instance.id, None)
+
+    def update(self, instance, values):
+        """Replace instance's field values, moving it between index buckets."""
+        for field, index in self.by_field.items():
+            old, new = instance.value(field), values.get(field) or self.entity.default(field)
+            if old != new:
+                index[old].pop(instance.id, None)
+                index.setdefault(new, {})[instance.id] = instance
+        instance.values = values
+
+    def find(self, guid_or_id):
+        return self.by_guid.get(guid_or_id) or self.by_id.get(guid_or_id)
+
+    def find_by_field(self, field, value):
+        if field == "id":
+            return self.by_id.get(value)
+        if field == "guid":
+            return self.by_guid.get(value)
+        bucket = self.by_field.get(field, {}).get(value)
+        return min(bucket.values(), key=_creation_order) if bucket else None
+
+    def select(self, criteria):
+        """Instances whose fields equal every criteria value, in creation order."""
+        if not criteria:
+            return self.instances()
+        if "id" in criteria:
+            candidates = [self.by_id[criteria["id"]]] if criteria["id"] in self.by_id else []
+        else:
+            candidates = min((self.by_field[field].get(value, {}) for field, value in criteria.items()),
+                             key=len).values()
+        matches = [instance for instance in candidates
+                   if all(instance.value(field) == value for field, value in criteria.items())]
+        return sorted(matches, key=_creation_order)
+
+def _creation_order(instance):
+    return int(instance.id)
+
+class TodoManager:
+    """The todo manager's data: one Table per entity plus the relationships between instances."""
+
+    def __init__(self, seed=True):
+        self.entities = todo_manager_model()
+        self._names = {}
+        for entity in self.entities.values():
+            self._names[entity.name] = self._names[entity.plural] = entity.name
+        self.relationship_names = {name for entity in self.entities.values() for name in entity.relationships}
+        self.reset(seed)
+
+    def reset(self, seed=True):
+        """Drop all data and id counters, then reseed like a freshly started jar."""
+        self.tables = {name: Table(entity) for name, entity in self.entities.items()}
+        if seed:
+            self.seed()
+
+    def seed(self):
+        scan = self.create("todo", title="scan paperwork")
+        file = self.create("todo", title="file paperwork")
+        office = self.create("category", title="Office")
+        self.create("category", title="Home")
+        project = self.create("project", title="Office Work")
+        self.connect(project, "tasks", scan)
+        self.connect(project, "tasks", file)
+        self.connect(scan, "categories", office)
+
+    def table(self, name):
+        """Return the Table for a singular or plural entity name, or None."""
+        name = self._names.get(name)
+        return self.tables[name] if name else None
+
+    def find_guid(self, guid):
+        for table in self.tables.values():
+            if guid in table.by_guid:
+                return table.by_guid[guid]
+        return None
+
+    def new_instance(self, name, guid=None, id=None):
+        table = self.tables[name]
+        return Instance(table.entity, guid or str(uuid.uuid4()), {"id": id or table.allocate_id()})
+
+    def add(self, instance):
+        self.tables[instance.entity.name].add(instance)
+        return instance
+
+    def create(self, name, **values):
+        instance = self.new_instance(name)
+        instance.values.update(values)
+        return self.add(instance)
+
+    def connect(self, instance, name, other):
+        instance.related.setdefault(name, {})[other.guid] = other
+        reverse = instance.entity.relationships[name][1]
+        if reverse:
+            other.related.setdefault(reverse, {})[instance.guid] = instance
+
+    def disconnect(self, instance, name, other):
+        instance.related.get(name, {}).pop(other.guid, None)
+        reverse = instance.entity.relationships[name][1]
+        if reverse:
+            other.related.get(reverse, {}).pop(instance.guid, None)
+
+    def clear_relationships(self, instance):
+        """Remove instance's edges, and their other ends for two-way relationships."""
+        for name, others in list(instance.related.items()):
+            for other in list(others.values()):
+                self.disconnect(instance, name, other)
+        instance.related.clear()
+
+    def delete(self, instance):
+        # Like the jar, edges other instances hold one-way to this one are left dangling
+        self.clear_relationships(instance)
+        self.tables[instance.entity.name].remove(instance)
+
+class ApiError(Exception):
+    """A handled request that ends in an errorMessages response."""
+
+    def __init__(self, status, *messages):
+        super().__init__(*messages)
+        self.status = status
+        self.messages = list(messages)
+
+class JarException(Exception):
+    """What the jar leaves to its RuntimeException handler: 400, no content type."""
+
+NOTHING, THING, INSTANCE, ITEMS, REL = "nothing", "thing", "instance", "items", "rel"
+
+class Query:
+    """
+    Walk a path like categories/1/todos the way the jar does, quirks included.
+
+    An unknown id after a relationship keeps the items found before it, so
+    GET /categories/999999/todos lists the todos of every category.
+    """
+
+    def __init__(self, manager, path):
+        self.last = NOTHING
+        self.history = []
+        self.found = []
+        self.found_table = None
+        self.contains = None
+        self.is_collection = False
+        self.plural = False
+        self.relationship = None
+        self.current_thing = self.parent_thing = None
+        self.current_instance = self.parent_instance = None
+        for term in path.split("/"):
+            if self.parent_thing is not None and term in manager.relationship_names:
+                self._relationship(manager, term)
+                continue
+            table = manager.table(term)
+            if table is not None:
+                self._thing(table, term)
+                continue
+            match = self._match(term)
+            if match is None:
+                self.last = NOTHING
+                continue
+            self.history.append(INSTANCE)
+            if self.current_thing is not None:
+                self.parent_thing = self.current_thing
+            self.is_collection = self.plural
+            self.current_thing, self.current_instance = None, match
+            self.found, self.found_table = [match], None
+            self.last = INSTANCE
+
+    def _relationship(self, manager, term):
+        entity = (self.current_thing or self.parent_thing).entity
+        if term not in entity.relationships:
+            raise JarException("Index: 0, Size: 0")
+        self.history.append(REL)
+        self.relationship = term
+        if self.found:
+            self.contains = manager.entities[self.found[0].entity.relationships[term][0]]
+        self.found = [other for instance in self.found for other in instance.connected(term)]
+        self.found_table = None
+        self.is_collection = True
+        self.parent_instance, self.parent_thing = self.current_instance, self.current_thing
+        self.current_thing = self.current_instance = None
+        self.last = REL
+
+    def _thing(self, table, term):
+        self.history.append(THING)
+        if self.current_thing is None and not self.found:
+            self.current_thing = self.parent_thing = table
+            self.plural = term == table.entity.plural
+            self.is_collection = True
+            self.contains = table.entity
+            self.found, self.found_table = table.instances(), table
+            self.current_instance = None
+            self.last = THING
+            return
+        if self.found:
+            self.contains = None
+        self.found = [other for instance in self.found for others in instance.related.values()
+                      for other in others.values() if other.entity.name == term]
+        self.found_table = None
+        self.parent_thing, self.current_thing, self.current_instance = self.current_thing, None, None
+        self.last = ITEMS
+
+    def _match(self, term):
+        if self.found_table is not None:
+            return self.found_table.find(term)
+        for instance in self.found:
+            if term in (instance.id, instance.guid):
+                return instance
+        return None
+
+    def filter(self, params):
+        """Keep found items whose fields equal the query params, for collections only."""
+        if not self.is_collection:
+            return
+        if self.found_table is not None:
+            fields = self.found_table.entity.fields
+            self.found = self.found_table.select({k: v for k, v in params.items() if k in fields})
+            return
+        self.found = [instance for instance in self.found
+                      if all(instance.value(k) == v for k, v in params.items() if k in instance.entity.fields)]
+
+    def items(self):
+        if self.last == INSTANCE:
+            return [self.current_instance]
+        return [] if self.last == NOTHING else self.found
+
+    def under_relationship(self):
+        return len(self.history) > 1 and self.history[-2] == REL
+
+def java_double(value):
+    """Format a float the way Java's String.valueOf(double) does."""
+    if value != value or value in (float("inf"), float("-inf")):
+        return {"nan": "NaN", "inf": "Infinity", "-inf": "-Infinity"}[repr(value)]
+    if value == 0 or 1e-3 <= abs(value) < 1e7:
+        text = repr(value)
+        return text if "." in text else text + ".0"
+    number = Decimal(repr(value))
+    digits = "".join(map(str, number.as_tuple().digits)).rstrip("0") or "0"
+    return f"{'-' if value < 0 else ''}{digits[0]}.{digits[1:] or '0'}E{number.adjusted()}"
+
+def java_string(value):
+    """A body value as the jar's string maps hold it, or None for values they skip."""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, float):
+        return java_double(value)
+    return value if isinstance(value, str) else None
+
+def flatten(value, prefix=""):
+    """Yield (dotted key, string) pairs for a body, nested keys joined with dots."""
+    if isinstance(value, dict):
+        for key, item in value.items():
+            yield from flatten(item, f"{prefix}.{key}" if prefix else key)
+    elif isinstance(value, list):
+        for item in value:
+            yield from flatten(item, prefix)
+    elif prefix and java_string(value) is not None:
+        yield prefix, java_string(value)
+
+def _json_type(value):
+    if isinstance(value, str):
+        return "STRING"
+    if isinstance(value, list):
+        return "BEGIN_ARRAY"
+    return "BOOLEAN" if isinstance(value, bool) else "NUMBER"
+
+def parse_json(text):
+    """Parse a JSON body into a map like Gson does: every number a double."""
+    if not text.strip():
+        return {}
+    try:
+        parsed = json.loads(text, parse_int=float)
+    except ValueError as e:
+        raise JarException(f"com.google.gson.JsonSyntaxException: {e}") from None
+    if parsed is None:
+        return {}
+    if not isinstance(parsed, dict):
+        raise JarException("com.google.gson.JsonSyntaxException: java.lang.IllegalStateException: "
+                           f"Expected BEGIN_OBJECT but was {_json_type(parsed)}")
+    return parsed
+
+def _xml_scalar(text):
+    if text.lower() in ("true", "false"):
+        return text.lower() == "true"
+    if text.lower() == "null":
+        return None
+    if re.fullmatch(r"-?\d+(\.\d+)?([eE][-+]?\d+)?", text):
+        return float(text)
+    return text
+
+def _xml_value(element):
+    children = list(element)
+    if not children:
+        return _xml_scalar((element.text or "").strip())
+    value = {}
+    for child in children:
+        item = _xml_value(child)
+        if child.tag not in value:
+            value[child.tag] = item
+        elif isinstance(value[child.tag], list):
+            value[child.tag].append(item)
+        else:
+            value[child.tag] = [value[child.tag], item]
+    return value
+
+def parse_xml(text, singular_names):
+    """
+    Parse an XML body the way the jar does.
+
+    A single <todo>, <project> or <category> root is unwrapped; anything else
+    goes to the JSON parser, which rejects it.
+    """
+    if not text.strip():
+        return {}
+    try:
+        root = ET.fromstring(text)
+    except ET.ParseError as e:
+        raise JarException(f"org.json.JSONException: {e}") from None
+    value = _xml_value(root)
+    if root.tag not in singular_names:
+        return parse_json(text)
+    if not isinstance(value, dict):
+        return parse_json(json.dumps(value))
+    return value
+
+def _wants_xml(accept):
+    for media in accept.lower().split(","):
+        if "application/xml" in media:
+            return True
+        if "application/json" in media:
+            return False
+    return False
+
+def _accepts_anything_known(accept):
+    return not accept.strip() or any(known in media for media in accept.lower().split(",")
+                                     for known in ("application/xml", "application/json", "application/*", "*/*"))
+
+# Allow headers of the OPTIONS responses, by path length
+_ALLOWED = {1: "OPTIONS, GET, HEAD, POST", 2: "OPTIONS, GET, HEAD, POST, PUT, DELETE",
+            3: "OPTIONS, GET, HEAD, POST", 4: "OPTIONS, DELETE"}
+_HANDLED = {1: ("GET", "HEAD", "POST"), 2: ("GET", "HEAD", "POST", "PUT", "DELETE"),
+            3: ("GET", "HEAD", "POST"), 4: ("DELETE",)}
+_REJECTED = {1: ("DELETE", "PATCH", "PUT"), 2: ("PATCH",), 3: ("DELETE", "PATCH", "PUT"), 4: ("PATCH", "PUT")}
+
+_REASONS = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            406: "Not Acceptable", 409: "Conflict", 415: "Unsupported Media Type"}
+
+class Response:
+    """What a handler produced, before it is rendered as JSON or XML."""
+
+    def __init__(self, status, instance=None, collection=None, of=None, errors=None, location=None):
+        self.status = status
+        self.instance = instance
+        self.collection = collection
+        self.of = of
+        self.errors = errors
+        self.location = location
+
+class App:
+    """
+    The todo manager's REST API as a WSGI application.
+
+        status, headers, body = App().handle("GET", "/todos/1", {}, "application/json", "", "")
+
+    Requests are handled one at a time under a lock, so an App can be served
+    from many threads.
+    """
+
+    def __init__(self, manager=None):
+        self.manager = manager or TodoManager()
+        self._singular = set(self.manager.entities)
+        self._lock = threading.RLock()
+
+    def __call__(self, environ, start_response):
+        length = int(environ.get("CONTENT_LENGTH") or 0)
+        body = environ["wsgi.input"].read(length) if length else b""
+        status, headers, payload = self.handle(
+            environ["REQUEST_METHOD"], environ.get("PATH_INFO", "/"), dict(parse_qsl(environ.get("QUERY_STRING", ""))),
+            environ.get("HTTP_ACCEPT", ""), environ.get("CONTENT_TYPE", ""), body.decode("utf-8", "replace"))
+        headers.append(("Content-Length", str(len(payload))))
+        start_response(f"{status} {_REASONS.get(status, '')}".rstrip(), headers)
+        return [b"" if environ["REQUEST_METHOD"] == "HEAD" else payload]
+
+    def handle(self, method, path, params, accept, content_type, body):
+        """Return (status, headers, payload bytes) for one request."""
+        terms = path.strip("/").split("/") if path.strip("/") else []
+        if method == "POST" and terms == ["admin", "data", "thingifier"]:
+            with self._lock:
+                self.manager.reset(seed=False)
+            return 200, [("Content-Type", "text/html;charset=utf-8")], b""
+        size = self._route(terms)
+        if size is None or method not in _HANDLED[size] + _REJECTED[size] + ("OPTIONS",):
+            return 404, [("Content-Type", "text/html;charset=utf-8")], b""
+        if method == "OPTIONS":
+            return 200, [("Allow", _ALLOWED[size]), ("Content-Type", "text/html;charset=utf-8")], b""
+        if method in _REJECTED[size]:
+            return 405, [("Content-Type", "text/html;charset=utf-8")], b""
+        as_xml = _wants_xml(accept)
+        try:
+            with self._lock:
+                response = self._api(method, "/".join(terms), params, accept, content_type, body)
+        except JarException as e:
+            return 400, [("Content-Type", "text/html;charset=utf-8")], self._errors([str(e)], as_xml)
+        except ApiError as e:
+            response = Response(e.status, errors=e.messages)
+        return self._render(response, as_xml)
+
+    def _route(self, terms):
+        """The number of path terms if a route the jar defines matches, else None."""
+        if not terms or len(terms) > 4 or "" in terms:
+            return None
+        table = self.manager.table(terms[0])
+        if table is None or terms[0] != table.entity.plural:
+            return None
+        if len(terms) > 2 and terms[2] not in table.entity.relationships:
+            return None
+        return len(terms)
+
+    def _api(self, method, path, params, accept, content_type, body):
+        if not _accepts_anything_known(accept):
+            raise ApiError(406, "Unrecognised Accept Type")
+        kind = content_type.lower()
+        if method in ("POST", "PUT") and kind and not kind.startswith("text/") \
+                and "application/xml" not in kind and "application/json" not in kind:
+            raise ApiError(415, f"Unsupported Content Type - {content_type}")
+        if method in ("GET", "HEAD"):
+            return self._get(path, params)
+        if method == "DELETE":
+            return self._delete(path)
+        if "application/xml" in kind:
+            args = parse_xml(body, self._singular)
+        else:
+            args = parse_json(body)
+        return self._post(path, args) if method == "POST" else self._put(path, args)
+
+    # GET, HEAD and DELETE
+
+    def _get(self, path, params):
+        query = Query(self.manager, path)
+        query.filter(params)
+        items = query.items()
+        if query.last == NOTHING or (query.last == INSTANCE and not items):
+            raise ApiError(404, f"Could not find an instance with {path}")
+        if query.last == INSTANCE and not query.is_collection:
+            return Response(200, instance=items[0])
+        return Response(200, collection=items, of=query.contains or (items[0].entity if items else None))
+
+    def _delete(self, path):
+        query = Query(self.manager, path)
+        if query.under_relationship():
+            if query.parent_instance is None or query.current_instance is None:
+                raise JarException("java.lang.NullPointerException")
+            self.manager.disconnect(query.parent_instance, query.relationship, query.current_instance)
+            return Response(200)
+        items = query.items()
+        if not items:
+            raise ApiError(404, f"Could not find any instances with {path}")
+        for instance in items:
+            self.manager.delete(instance)
+        return Response(200)
+
+    # POST and PUT
+
+    def _post(self, path, args):
+        terms = path.split("/")
+        if len(terms) == 1:
+            return self._create(args, self.manager.table(path))
+        if len(terms) == 2:
+            table = self.manager.table(terms[0])
+            instance = table.find(terms[1])
+            if instance is None:
+                raise ApiError(404, f"No such {table.entity.name} entity instance with GUID or ID {terms[1]} found")
+            return self._amend(args, instance, clear=False)
+        query = Query(self.manager, path)
+        if query.last != REL:
+            raise ApiError(400, "Your request was not understood")
+        return self._relate(path, query, args)
+
+    def _put(self, path, args):
+        terms = path.split("/")
+        if len(terms) == 1:
+            raise ApiError(405, "Cannot create root level entity with a PUT")
+        if len(terms) != 2:
+            raise ApiError(400, "Your request was not understood")
+        table = self.manager.table(terms[0])
+        instance = table.find(terms[1])
+        if instance is not None:
+            return self._amend(args, instance, clear=True)
+        for key in PROTECTED:
+            value = java_string(args.get(key))
+            if value and value.strip() and table.find_by_field(key, value):
+                raise ApiError(409, "Cannot Create with duplicate values: Failed Validation: "
+                                    f"Found Existing item with {key} of {value}")
+        try:
+            guid = str(uuid.UUID(terms[1]))
+        except ValueError:
+            raise ApiError(404, f"Invalid GUID for {terms[1]} entity {table.entity.name}") from None
+        self._check_relationships(args, table.entity)
+        self._check_types(args, table.entity)
+        entries = list(flatten(args))
+        fields, related = self._split_relationships(entries, table.entity)
+        instance = self.manager.new_instance(table.entity.name, guid=guid)
+        values = self._assign(table.entity, dict(instance.values), fields)
+        self._check_mandatory(table.entity, values)
+        instance.values = values
+        self.manager.add(instance)
+        self._create_relationships(instance, related)
+        return Response(201, instance=instance, location=f"{table.entity.plural}/{instance.id}")
+
+    def _create(self, args, table):
+        self._check_relationships(args, table.entity)
+        for key in PROTECTED:
+            if key in args:
+                raise ApiError(400, f"Invalid Creation: Failed Validation: Not allowed to create with {key}")
+        # The jar assigns the id before validating, so a rejected body still uses one up
+        instance = self.manager.new_instance(table.entity.name)
+        self._check_types(args, table.entity)
+        fields, related = self._split_relationships(list(flatten(args)), table.entity)
+        values = self._assign(table.entity, dict(instance.values), fields)
+        self._check_mandatory(table.entity, values)
+        instance.values = values
+        self.manager.add(instance)
+        self._create_relationships(instance, related)
+        return Response(201, instance=instance, location=f"{table.entity.plural}/{instance.id}")
+
+    def _amend(self, args, instance, clear):
+        entity = instance.entity
+        self._check_types(args, entity)
+        fields, related = self._split_relationships(list(flatten(args)), entity)
+        values = {"id": instance.id} if clear else dict(instance.values)
+        values = self._assign(entity, values, fields, guid=instance.guid)
+        self._check_mandatory(entity, values)
+        self._check_relationships(args, entity)
+        if clear:
+            self.manager.clear_relationships(instance)
+        self.manager.tables[entity.name].update(instance, values)
+        self._create_relationships(instance, related)
+        return Response(200, instance=instance)
+
+    def _relate(self, path, query, args):
+        parent = query.parent_instance
+        if parent is None:
+            raise ApiError(404, f"Could not find parent thing for relationship {path}")
+        target = self.manager.tables[parent.entity.relationships[query.relationship][0]]
+        keys = [key for key in args if key in PROTECTED and java_string(args[key]) is not None]
+        related = None
+        for key in keys:
+            related = target.find_by_field(key, java_string(args[key]))
+            if related is not None:
+                break
+        created = None
+        if keys and related is None:
+            raise ApiError(404, f"Could not find thing matching value for {', '.join(keys)}")
+        if related is None:
+            response = self._create(args, target)
+            created = related = response.instance
+        self.manager.connect(parent, query.relationship, related)
+        if created is None:
+            return Response(201)
+        return Response(201, instance=created, location=f"{target.entity.plural}/{created.id}")
+
+    # Body checks, in the jar's order and with its messages
+
+    def _check_types(self, args, entity):
+        """Reject top-level values of the wrong JSON type; numeric ids become ints the string maps skip."""
+        problems = []
+        for key, value in args.items():
+            kind = entity.fields.get(key)
+            if kind == BOOLEAN and not isinstance(value, bool):
+                problems.append(f"{key} should be BOOLEAN")
+            elif kind == ID:
+                if isinstance(value, float) and not isinstance(value, bool):
+                    args[key] = int(value)
+                else:
+                    problems.append(f"{key} should be ID")
+        if problems:
+            raise ApiError(400, "Failed Validation: " + ", ".join(problems))
+
+    def _assign(self, entity, values, fields, guid=None):
+        for key, value in fields:
+            existing = {"id": values.get("id", ""), "guid": guid or ""}.get(key)
+            if existing is not None and existing.strip() and existing.lower() != value.lower():
+                raise ApiError(400, f"Can not amend {key} from {existing} to {value}")
+        for key, value in fields:
+            if key in PROTECTED:
+                continue
+            name = key.split(".")[0]
+            if name not in entity.fields:
+                raise ApiError(400, f"Could not find field: {name}")
+            if name != key:
+                raise ApiError(400, f"Cannot reference fields on non object fields: {name}")
+            problems = entity.problems(name, value)
+            if problems:
+                raise ApiError(400, "Failed Validation: " + ", ".join(problems))
+            values[name] = str(value.lower() == "true").lower() if entity.fields[name] == BOOLEAN else value
+        return values
+
+    def _check_mandatory(self, entity, values):
+        missing = [f"{field} : field is mandatory" for field in entity.fields
+                   if field in entity.mandatory and field not in values]
+        if missing:
+            raise ApiError(400, *missing)
+
+    def _lookup(self, table, field, value):
+        return self.manager.find_guid(value) or table.find_by_field(field, value)
+
+    def _check_relationships(self, args, entity):
+        valid, problems = True, []
+        for key, value in flatten(args):
+            parts = key.split(".")
+            if key.startswith("relationships."):
+                if len(parts) != 4:
+                    problems.append(f"{key} is not a valid relationship")
+                    valid = False
+                    continue
+                name, plural, field = parts[1:]
+                if name not in entity.relationships:
+                    problems.append(f"{name} is not a valid relationship for {entity.name}")
+                    valid = False
+                elif self.manager.entities[entity.relationships[name][0]].plural != plural:
+                    problems.append(f"{name} to {plural} is not a valid relationship for {entity.name}")
+                    valid = False
+                elif self._lookup(self.manager.table(plural), field, value) is None:
+                    problems.append(f"cannot find {field} of {plural} to relate to with {field} {value}")
+                    valid = False
+            elif "." in key and parts[0] in entity.relationships:
+                # The jar keeps only the last compressed reference's verdict
+                valid = self._check_compressed(entity, parts, key, value, problems)
+        if not valid:
+            raise ApiError(400, "Invalid relationships: Failed Validation: " + ", ".join(problems))
+
+    def _check_compressed(self, entity, parts, key, value, problems):
+        if len(parts) != 2:
+            problems.append(f"{key} is not a valid relationship")
+            return False
+        name, field = parts
+        if field not in PROTECTED:
+            problems.append(f"Do not support relationship references using {field}")
+            return False
+        target = self.manager.entities[entity.relationships[name][0]]
+        found = self.manager.find_guid(value) or self.manager.tables[target.name].find(value)
+        if found is None:
+            problems.append(f"cannot find {name} to relate to with {field} {value}")
+            return False
+        if found.entity is not target:
+            problems.append(f"{name} to {found.entity.plural} is not a valid relationship for {entity.name}")
+            return False
+        return True
+
+    def _split_relationships(self, entries, entity):
+        """Separate relationship references from field entries, as (fields, [(name, plural, field, value)])."""
+        fields, related = [], []
+        for key, value in entries:
+            parts = key.split(".")
+            if key.startswith("relationships.") and len(parts) == 4:
+                related.append(tuple(parts[1:]) + (value,))
+                continue
+            if len(parts) == 2 and parts[0] in entity.relationships:
+                target = self.manager.tables[entity.relationships[parts[0]][0]]
+                found = self._lookup(target, parts[1], value)
+                if found is not None:
+                    related.append((parts[0], found.entity.plural, parts[1], value))
+                    continue
+            fields.append((key, value))
+        return fields, related
+
+    def _create_relationships(self, instance, related):
+        for name, plural, field, value in related:
+            other = self._lookup(self.manager.table(plural), field, value)
+            if other is None or self.manager.entities[instance.entity.relationships[name][0]] is not other.entity:
+                raise ApiError(400, f"Error creating relationships Unknown Relationship {name} "
+                                    f"for {instance.entity.name} : {instance.guid}")
+            self.manager.connect(instance, name, other)
+
+    # Rendering
+
+    def _render(self, response, as_xml):
+        headers = [("Content-Type", "application/xml" if as_xml else "application/json")]
+        if response.location:
+            headers.append(("Location", response.location))
+        if response.errors is not None:
+            return response.status, headers, self._errors(response.errors, as_xml)
+        if response.instance is not None:
+            fields = self._fields(response.instance)
+            if as_xml:
+                body = _xml_element(response.instance.entity.name, fields)
+            else:
+                body = _json(_as_dict(fields))
+        elif response.collection is not None:
+            items = [self._fields(instance) for instance in response.collection]
+            of = response.of
+            if as_xml:
+                inner = "".join(_xml_element(of.name, item) for item in items)
+                body = f"<{of.plural}>{inner}</{of.plural}>" if of else ""
+            elif of is None:
+                body = "{}"
+            else:
+                body = _json({of.plural: [_as_dict(item) for item in items]})
+        else:
+            body = ""
+        return response.status, headers, body.encode("utf-8")
+
+    def _errors(self, messages, as_xml):
+        if as_xml:
+            inner = "".join(f"<errorMessage>{escape(message)}</errorMessage>" for message in messages)
+            return f"<errorMessages>{inner}</errorMessages>".encode("utf-8")
+        return _json({"errorMessages": messages}).encode("utf-8")
+
+    def _fields(self, instance):
+        """(name, value) pairs to render, relationships compressed to lists of ids."""
+        fields = [(field, instance.value(field)) for field in instance.entity.fields]
+        for name in instance.entity.relationships:
+            others = instance.connected(name)
+            if others:
+                fields.append((name, [[("id", other.id)] for other in others]))
+        return fields
+
+def _as_dict(fields):
+    return {key: [_as_dict(item) for item in value] if isinstance(value, list) else value for key, value in fields}
+
+def _json(value):
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+
+def _xml_element(tag, fields):
+    parts = []
+    for key, value in fields:
+        if isinstance(value, list):
+            parts.extend(_xml_element(key, item) for item in value)
+        else:
+            parts.append(f"<{key}>{escape(value)}</{key}>")
+    return f"<{tag}>{''.join(parts)}</{tag}>"
+
+class _Server(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+class _QuietHandler(WSGIRequestHandler):
+    # Headers and body go out in separate writes; don't let Nagle hold the body back
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+class MemoryServer:
+    """An App on its own local port, started and stopped like a ThingifierServer."""
+
+    def __init__(self, port=None, manager=None):
+        self.port = port
+        self.app = App(manager)
+        self._httpd = None
+        self._thread = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.port}"
+
+    def start(self):
+        self._httpd = make_server("127.0.0.1", self.port or 0, self.app,
+                                  server_class=_Server, handler_class=_QuietHandler)
+        self.port = self._httpd.server_port
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name=f"memory-server-{self.port}",
+                                        daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=5):
+        if self._httpd is None:
+            return
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        self._thread.join(timeout)
+        self._httpd = self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def __repr__(self):
+        return f"MemoryServer({self.url!r})"
@@ -0,0 +1,42 @@
+"""
+Timing wrappers for the phases of a test (setUp, the test method, tearDown).
+
+    test.setUp = phases.timed(test.setUp, begin, finish)
+
+The module sets __unittest, as unittest's own modules do, so its frames are
+left out of failure and error tracebacks and a failing test reports exactly
+what it would unwrapped.
+"""
+import functools
+import inspect
+from time import perf_counter
+
+__unittest = True
+
+def timed(method, begin, finish):
+    """
+    method wrapped to call begin() before each call and finish(start) after it, even if it raises.
+
+    start is the perf_counter() value taken as the call began. Coroutine
+    functions stay coroutine functions, so IsolatedAsyncioTestCase awaits them.
+    """
+    if inspect.iscoroutinefunction(method):
+        @functools.wraps(method)
+        async def timed_async(*args, **kwargs):
+            begin()
+            start = perf_counter()
+            try:
+                return await method(*args, **kwargs)
+            finally:
+                finish(start)
+        return timed_async
+
+    @functools.wraps(method)
+    def timed_sync(*args, **kwargs):
+        begin()
+        start = perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            finish(start)
+    return timed_sync
@@ -0,0 +1,143 @@
+"""
+Record every request sent through api_client or async_client as NDJSON.
+
+    with recorder.recording() as traffic:
+        get("/todos")
+    print(traffic.written, traffic.dropped)
+
+A Recorder is an instrumentation subscriber. On the request's own thread it
+only stamps the wall-clock time and queues the RequestTiming; a background
+writer thread turns queued timings into one JSON line each (method, URL,
+headers, bodies, status and the timing phases), writes them in batches and
+rotates the file once it would grow past max_bytes. If the writer falls
+behind by max_pending records, new ones are dropped and counted rather than
+slowing the tests down.
+"""
+import json
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from tests.utils import config, instrumentation
+
+_STOP = object()
+
+def _text(body):
+    if body is None:
+        return None
+    if isinstance(body, (bytes, bytearray)):
+        return bytes(body).decode("utf-8", "replace")
+    return body if isinstance(body, str) else None
+
+def to_record(recorded_at, thread, timing):
+    """The dict written for one request."""
+    response = timing.response
+    return {
+        "time": recorded_at - timing.total,
+        "thread": thread,
+        "method": timing.method,
+        "url": timing.url,
+        "route": timing.route,
+        "request_headers": dict(timing.request.headers),
+        "request_body": _text(timing.request.body),
+        "status": timing.status_code,
+        "response_headers": dict(response.headers),
+        # Streamed bodies are read by the caller after the hook runs
+        "response_body": None if timing.bytes_in is None else _text(response.content),
+        "bytes_out": timing.bytes_out,
+        "bytes_in": timing.bytes_in,
+        "connect": timing.connect,
+        "ttfb": timing.ttfb,
+        "read": timing.read,
+        "total": timing.total,
+    }
+
+def worker_path(path):
+    """path with this process's id added, e.g. requests-4242.jsonl."""
+    root, ext = os.path.splitext(path)
+    return f"{root}-{os.getpid()}{ext}"
+
+def rotate(path, backups):
+    """Shift path to path.1, path.1 to path.2 and so on, dropping the oldest."""
+    if backups <= 0:
+        os.remove(path)
+        return
+    for index in range(backups - 1, 0, -1):
+        if os.path.exists(f"{path}.{index}"):
+            os.replace(f"{path}.{index}", f"{path}.{index + 1}")
+    os.replace(path, f"{path}.1")
+
+class Recorder:
+    """Subscriber that appends a JSON line per request to path from a writer thread."""
+
+    def __init__(self, path=None, max_bytes=None, backups=None, batch_size=None, max_pending=100000,
+                 flush_interval=0.2):
+        self.path = path or config.RECORD_PATH
+        self.max_bytes = max_bytes or config.RECORD_MAX_BYTES
+        self.backups = config.RECORD_BACKUPS if backups is None else backups
+        self.batch_size = batch_size or config.RECORD_BATCH
+        self.flush_interval = flush_interval
+        self.written = 0
+        self.dropped = 0
+        self._queue = queue.Queue(max_pending)
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._file = open(self.path, "ab")
+        self._thread = threading.Thread(target=self._write_loop, name="request-recorder", daemon=True)
+        self._thread.start()
+
+    def __call__(self, timing):
+        try:
+            self._queue.put_nowait((time.time(), threading.current_thread().name, timing))
+        except queue.Full:
+            self.dropped += 1
+
+    def _write_loop(self):
+        stopping = False
+        while not stopping:
+            try:
+                batch = [self._queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                continue
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if _STOP in batch:
+                stopping = True
+                batch = [item for item in batch if item is not _STOP]
+                if not batch:
+                    break
+            lines = b"".join(json.dumps(to_record(*item), separators=(",", ":")).encode("utf-8") + b"\n"
+                             for item in batch)
+            self._write(lines)
+            self.written += len(batch)
+
+    def _write(self, data):
+        size = self._file.tell()
+        if size and size + len(data) > self.max_bytes:
+            self._file.close()
+            rotate(self.path, self.backups)
+            self._file = open(self.path, "ab")
+        self._file.write(data)
+        self._file.flush()
+
+    def close(self):
+        """Write everything queued so far, then stop the writer."""
+        if self._thread is None:
+            return
+        self._queue.put(_STOP)
+        self._thread.join()
+        self._thread = None
+        self._file.close()
+
+@contextmanager
+def recording(path=None, **kwargs):
+    """Record every instrumented request made inside the with block."""
+    recorder = instrumentation.subscribe(Recorder(path, **kwargs))
+    try:
+        yield recorder
+    finally:
+        instrumentation.unsubscribe(recorder)
+        recorder.close()
@@ -0,0 +1,312 @@
+"""
+Replay traffic recorded by tests.utils.recorder against a server.
+
+    records = replay.load(["recordings/requests.jsonl"])
+    report = replay.replay(records, "http://localhost:4567", speed=2, concurrency=8)
+    print(report.percentile(95), report.status_divergences)
+
+Requests go out in recorded order, at most concurrency at a time. speed=0
+sends as fast as possible, 1 keeps the original gaps between requests and
+2 halves them. Ids the server generates differ between runs, so every
+creation (a 201 with a Location) maps the recorded id to the replayed one.
+A request waits until the last earlier request touching any of the same
+entities has finished, and a read of a whole collection waits for every
+earlier request touching that collection, so each entity sees its
+creation, updates and deletion in recorded order. Ids are then rewritten
+in the request's path and JSON body. Each response is compared with the
+recorded one after mapping ids in JSON and XML bodies and in the request
+path that error messages echo, and mismatched statuses and bodies are
+counted per route.
+"""
+import json
+import re
+import statistics
+import threading
+import time
+import xml.etree.ElementTree as ET
+from collections import defaultdict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+from tests.utils import api_client
+from tests.utils.instrumentation import ENTITY_OF, route_template
+from tests.utils.streaming import element_to_dict
+
+# Headers requests sets itself for the replayed request
+_SKIPPED_HEADERS = {"content-length", "host", "connection", "accept-encoding", "user-agent"}
+
+Divergence = namedtuple("Divergence", ["index", "method", "route", "recorded_status", "status", "body_differs"])
+
+def load(paths):
+    """Read NDJSON records from paths (oldest rotated file first) in recorded order."""
+    records = []
+    for path in paths:
+        with open(path, encoding="utf-8") as trace:
+            records.extend(json.loads(line) for line in trace if line.strip())
+    records.sort(key=lambda record: record["time"])
+    return records
+
+def path_ids(path):
+    """(collection, id) for every id in a path such as /todos/3/tasksof/1."""
+    segments = [segment for segment in path.split("/") if segment]
+    return [(ENTITY_OF[segments[i - 1]], segments[i])
+            for i in range(1, len(segments)) if segments[i - 1] in ENTITY_OF]
+
+def _created(record):
+    """(collection, id) a recorded response created, or None."""
+    location = {k.lower(): v for k, v in (record.get("response_headers") or {}).items()}.get("location")
+    if record.get("status") != 201 or not location:
+        return None
+    ids = path_ids("/" + urlsplit(location).path.lstrip("/"))
+    return ids[-1] if ids else None
+
+def body_ids(value, entity, found):
+    if isinstance(value, dict):
+        for key, item in value.items():
+            if key == "id" and entity and isinstance(item, str):
+                found.append((entity, item))
+            else:
+                body_ids(item, ENTITY_OF.get(key, entity), found)
+    elif isinstance(value, list):
+        for item in value:
+            body_ids(item, entity, found)
+    return found
+
+def _remap(value, entity, ids):
+    """A copy of a JSON value with every id of a known collection replaced through ids."""
+    if isinstance(value, dict):
+        return {key: ids.get((entity, item), item) if key == "id" and entity and isinstance(item, str)
+                else _remap(item, ENTITY_OF.get(key, entity), ids)
+                for key, item in value.items()}
+    if isinstance(value, list):
+        return [_remap(item, entity, ids) for item in value]
+    return value
+
+def _parse(text):
+    if not text:
+        return None
+    try:
+        return json.loads(text)
+    except ValueError:
+        return None
+
+def _parse_response(text):
+    """
+    A response body as JSON, with an XML body turned into the shape it has as JSON.
+
+    <todos><todo>...</todo></todos> becomes {"todos": [{...}]}, a single
+    <todo>...</todo> becomes the entity dict, and <errorMessages> becomes
+    {"errorMessages": [message, ...]}.
+    """
+    parsed = _parse(text)
+    if parsed is None and text and text.lstrip().startswith("<"):
+        try:
+            root = ET.fromstring(text)
+        except ET.ParseError:
+            return None
+        if root.tag == "errorMessages":
+            return {root.tag: [child.text or "" for child in root]}
+        if any(not len(child) for child in root):
+            return element_to_dict(root)
+        return {root.tag: [element_to_dict(child) for child in root]}
+    return parsed
+
+def _remap_messages(value, path, replayed_path):
+    """value with path replaced by replayed_path wherever an errorMessages entry quotes it whole."""
+    if not isinstance(value, dict) or not isinstance(value.get("errorMessages"), list):
+        return value
+    quoted = re.compile(r"(?<![\w/])%s(?![\w])" % re.escape(path))
+    return dict(value, errorMessages=[quoted.sub(lambda _: replayed_path, message) if isinstance(message, str)
+                                      else message for message in value["errorMessages"]])
+
+def body_entity(path):
+    """Collection that ids at the top of a request body to path belong to."""
+    segments = [segment for segment in path.split("/") if segment]
+    return ENTITY_OF.get(segments[-1] if len(segments) % 2 else segments[-2]) if segments else None
+
+def _refs(record):
+    """(collection, id) for every entity a record's path, JSON body or Location touches."""
+    path = urlsplit(record["url"]).path
+    body = _parse(record.get("request_body"))
+    refs = set(path_ids(path))
+    if body is not None:
+        refs.update(body_ids(body, body_entity(path), []))
+    created = _created(record)
+    if created:
+        refs.add(created)
+    return refs
+
+def _listed(record):
+    """Collection a GET or HEAD of a whole collection such as /todos reads, or None."""
+    segments = [segment for segment in urlsplit(record["url"]).path.split("/") if segment]
+    if record["method"] in ("GET", "HEAD") and len(segments) == 1:
+        return ENTITY_OF.get(segments[0])
+    return None
+
+class ReplayReport:
+    """Latencies and divergences from one replay."""
+
+    def __init__(self):
+        self.seconds = 0.0
+        self.latencies = []
+        self.routes = defaultdict(list)
+        self.status_divergences = 0
+        self.body_divergences = 0
+        self.errors = 0
+        self.divergences = []
+        self._lock = threading.Lock()
+
+    @property
+    def requests(self):
+        return len(self.latencies)
+
+    def add(self, index, record, route, status, latency, body_differs):
+        with self._lock:
+            self.latencies.append(latency)
+            self.routes[(record["method"], route)].append(latency)
+            status_differs = status != record.get("status")
+            self.status_divergences += status_differs
+            self.body_divergences += body_differs
+            if status_differs or body_differs:
+                self.divergences.append(Divergence(index, record["method"], route, record.get("status"),
+                                                   status, body_differs))
+
+    def percentile(self, percent, latencies=None):
+        """Latency at percent (0-100) in seconds, nearest rank."""
+        latencies = sorted(self.latencies if latencies is None else latencies)
+        if not latencies:
+            return 0.0
+        return latencies[min(len(latencies) - 1, max(0, round(percent / 100 * len(latencies)) - 1))]
+
+    def route_summary(self):
+        """((method, route), count, median, p95, max) per route, slowest p95 first."""
+        rows = [(key, len(values), statistics.median(values), self.percentile(95, values), max(values))
+                for key, values in self.routes.items()]
+        return sorted(rows, key=lambda row: row[3], reverse=True)
+
+class _Replayer:
+    def __init__(self, records, url, report):
+        self.records = records
+        self.url = url.rstrip("/")
+        self.report = report
+        self.ids = {}
+        self._ids_lock = threading.Lock()
+        self.done = [threading.Event() for _ in records]
+        # Indexes of the earlier records each record has to wait for: the
+        # last one before it to touch each entity it touches, every earlier
+        # one touching a collection it lists, and the last listing of each
+        # collection it touches
+        self.after = []
+        last, last_listing, since_listing = {}, {}, {}
+        # Entities that have appeared in one request together, i.e. may be related
+        related = defaultdict(set)
+        for index, record in enumerate(records):
+            refs = _refs(record)
+            if record["method"] in ("PUT", "DELETE"):
+                # Replacing or deleting an entity can drop its relationships on the other side
+                for ref in list(refs):
+                    refs |= related[ref]
+            for ref in refs:
+                related[ref] |= refs - {ref}
+            collections = {collection for collection, _ in refs}
+            after = {last[ref] for ref in refs if ref in last}
+            after.update(last_listing[collection] for collection in collections if collection in last_listing)
+            listed = _listed(record)
+            if listed:
+                after |= since_listing.pop(listed, set())
+                last_listing[listed] = index
+            self.after.append(after)
+            for collection in collections:
+                since_listing.setdefault(collection, set()).add(index)
+            for ref in refs:
+                last[ref] = index
+
+    def _wait_for_earlier(self, index):
+        for earlier in self.after[index]:
+            self.done[earlier].wait()
+
+    def send(self, index):
+        record = self.records[index]
+        try:
+            self._send(index, record)
+        except Exception:
+            with self.report._lock:
+                self.report.errors += 1
+        finally:
+            self.done[index].set()
+
+    def _send(self, index, record):
+        path = urlsplit(record["url"]).path
+        query = urlsplit(record["url"]).query
+        body = record.get("request_body")
+        parsed = _parse(body)
+        self._wait_for_earlier(index)
+        with self._ids_lock:
+            ids = dict(self.ids)
+        segments = path.split("/")
+        for i in range(1, len(segments)):
+            entity = ENTITY_OF.get(segments[i - 1])
+            if entity:
+                segments[i] = ids.get((entity, segments[i]), segments[i])
+        replayed_path = "/".join(segments)
+        url = f"{self.url}{replayed_path}{'?' + query if query else ''}"
+        if parsed is not None:
+            body = json.dumps(_remap(parsed, body_entity(path), ids))
+        headers = {name: value for name, value in (record.get("request_headers") or {}).items()
+                   if name.lower() not in _SKIPPED_HEADERS}
+
+        start = time.perf_counter()
+        response = api_client.get_session().request(
+            record["method"], url, data=body.encode("utf-8") if body is not None else None, headers=headers)
+        latency = time.perf_counter() - start
+
+        created = _created(record)
+        if created and response.status_code == 201 and response.headers.get("Location"):
+            replayed = path_ids("/" + urlsplit(response.headers["Location"]).path.lstrip("/"))
+            if replayed:
+                with self._ids_lock:
+                    self.ids[created] = replayed[-1][1]
+                    ids = dict(self.ids)
+        recorded_body = record.get("response_body")
+        recorded = _parse_response(recorded_body)
+        if recorded is not None and replayed_path != path:
+            # Error messages quote the request path, e.g. "Could not find an instance with todos/3"
+            recorded = _remap_messages(recorded, path.strip("/"), replayed_path.strip("/"))
+        body_differs = False
+        if recorded_body is not None and record["method"] != "HEAD":
+            if recorded is None:
+                body_differs = response.text != recorded_body
+            else:
+                body_differs = _remap(recorded, body_entity(path), ids) != _parse_response(response.text)
+        self.report.add(index, record, route_template(url), response.status_code, latency, body_differs)
+
+def replay(records, url, speed=0, concurrency=8):
+    """
+    Send records to the server at url and return a ReplayReport.
+
+    speed=0 sends as fast as concurrency allows; otherwise recorded gaps are
+    divided by speed.
+    """
+    report = ReplayReport()
+    if not records:
+        return report
+    replayer = _Replayer(records, url, report)
+    in_flight = threading.BoundedSemaphore(concurrency)
+    first = records[0]["time"]
+    start = time.perf_counter()
+
+    def run(index):
+        try:
+            replayer.send(index)
+        finally:
+            in_flight.release()
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="replay") as pool:
+        for index, record in enumerate(records):
+            if speed:
+                delay = (record["time"] - first) / speed - (time.perf_counter() - start)
+                if delay > 0:
+                    time.sleep(delay)
+            in_flight.acquire()
+            pool.submit(run, index)
+    report.seconds = time.perf_counter() - start
+    return report
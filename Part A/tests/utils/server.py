@@ -0,0 +1,339 @@
+"""
+Start, probe and stop the bundled Thingifier server.
+
+    with ThingifierServer() as server:
+        os.environ["TODO_API_URL"] = server.url
+        ...
+
+Each server runs the jar on a free port and is ready once GET /todos
+answers. A jar that exits or never answers fails within the startup timeout
+with its log attached, instead of every test timing out on its own.
+
+WarmServerPool keeps fresh, warmed servers booting in the background so a
+test can swap to a pristine one instead of restoring state over REST.
+"""
+import atexit
+import functools
+import os
+import queue
+import shutil
+import threading
+import socket
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from tests.utils.warmup import warm_up
+
+# The jar shipped at the repository root; override with TODO_API_JAR
+JAR_PATH = os.environ.get(
+    "TODO_API_JAR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))),
+                 "runTodoManagerRestAPI-1.5.5.jar"),
+)
+JAVA = os.environ.get("JAVA", "java")
+
+# Seconds to wait for a server to start answering
+STARTUP_TIMEOUT = float(os.environ.get("TODO_API_STARTUP_TIMEOUT", "60"))
+
+class ServerStartError(RuntimeError):
+    """The server exited or did not become ready in time."""
+
+def free_port():
+    """Return a TCP port that is free on localhost right now."""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def is_ready(url, timeout=1.0):
+    """Return True if the API at url answers GET /todos."""
+    try:
+        return requests.get(f"{url}/todos", timeout=timeout).status_code == 200
+    except requests.RequestException:
+        return False
+
+def wait_until_ready(url, timeout=STARTUP_TIMEOUT, process=None):
+    """
+    Poll url with exponential backoff until the API answers.
+
+    Raises ServerStartError when timeout runs out, or straight away if
+    process is given and exits first.
+    """
+    deadline = time.monotonic() + timeout
+    delay = 0.05
+    while True:
+        if is_ready(url, timeout=min(1.0, max(deadline - time.monotonic(), 0.1))):
+            return
+        if process is not None and process.poll() is not None:
+            raise ServerStartError(f"server for {url} exited with code {process.returncode} before it was ready")
+        if time.monotonic() + delay > deadline:
+            raise ServerStartError(f"server at {url} was not ready within {timeout:.0f}s")
+        time.sleep(delay)
+        delay = min(delay * 2, 1.0)
+
+class ThingifierServer:
+    """One Thingifier process on its own port."""
+
+    def __init__(self, port=None, jar=JAR_PATH, java=JAVA, startup_timeout=STARTUP_TIMEOUT):
+        self.port = port
+        self.jar = jar
+        self.java = java
+        self.startup_timeout = startup_timeout
+        self.process = None
+        self._log = None
+
+    @property
+    def url(self):
+        return f"http://localhost:{self.port}"
+
+    def start(self):
+        """Launch the jar and wait until it answers; raises ServerStartError otherwise."""
+        if not os.path.exists(self.jar):
+            raise ServerStartError(f"server jar not found: {self.jar}")
+        if shutil.which(self.java) is None:
+            raise ServerStartError(f"{self.java} not found; install Java or set JAVA")
+        self.port = self.port or free_port()
+        self._log = tempfile.TemporaryFile()
+        self.process = subprocess.Popen(
+            [self.java, "-jar", self.jar, f"-port={self.port}"],
+            stdout=self._log, stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL,
+        )
+        atexit.register(self.stop)
+        try:
+            wait_until_ready(self.url, self.startup_timeout, self.process)
+        except ServerStartError as e:
+            log = self.log_tail()
+            self.stop()
+            raise ServerStartError(f"{e}\n{log}") from None
+        return self
+
+    def log_tail(self, limit=2000):
+        """Return the end of the server's output."""
+        if self._log is None:
+            return ""
+        self._log.flush()
+        self._log.seek(0)
+        return self._log.read().decode("utf-8", "replace")[-limit:]
+
+    def stop(self, timeout=5):
+        """Ask the server to shut down, then terminate it if it has not exited."""
+        atexit.unregister(self.stop)
+        if self.process is None:
+            return
+        if self.process.poll() is None:
+            try:
+                requests.get(f"{self.url}/shutdown", timeout=1)
+            except requests.RequestException:
+                pass  # /shutdown exits the JVM without answering
+            try:
+                self.process.wait(timeout)
+            except subprocess.TimeoutExpired:
+                self.process.terminate()
+                try:
+                    self.process.wait(timeout)
+                except subprocess.TimeoutExpired:
+                    self.process.kill()
+                    self.process.wait()
+        self.process = None
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def __repr__(self):
+        return f"ThingifierServer({self.url!r})"
+
+def start_servers(count, factory=None, **kwargs):
+    """
+    Start count servers in parallel; stops any already started if one fails.
+
+    factory builds each server, ThingifierServer unless given, e.g.
+    memory_server.MemoryServer for in-memory stand-ins.
+    """
+    servers = [(factory or ThingifierServer)(**kwargs) for _ in range(count)]
+    # Pick distinct ports up front, then boot the JVMs concurrently
+    ports = set()
+    for server in servers:
+        while server.port is None or server.port in ports:
+            server.port = free_port()
+        ports.add(server.port)
+    with ThreadPoolExecutor(max_workers=count) as pool:
+        futures = [pool.submit(server.start) for server in servers]
+    errors = [future.exception() for future in futures if future.exception()]
+    if errors:
+        for server in servers:
+            server.stop()
+        raise errors[0]
+    return servers
+
+# Pooled servers are warmed read-only so their data and ids match a fresh jar
+warm = functools.partial(warm_up, writes=False)
+
+class WarmServerPool:
+    """
+    Fresh servers started and warmed in the background, ready to hand out.
+
+        pool = WarmServerPool(2)
+        server = pool.acquire()              # pristine data, already warm
+        ...
+        pool.release(server, reusable=True)  # restored to its seed data; back in the pool
+        pool.release(server)                 # stopped; a replacement is already booting
+        pool.close()
+
+    Whenever fewer than size servers are ready or booting, acquire starts
+    booting another. A server released as reusable goes back to the ready
+    queue, so a caller that restores each server after use stops paying for
+    boots; if that leaves more than size spares, a fresh one is stopped (or,
+    if still booting, stopped once up). Any other released server is shut
+    down.
+    """
+
+    def __init__(self, size=2, warm_up=warm, factory=None, **server_kwargs):
+        self.size = size
+        self.warm_up = warm_up
+        self.factory = factory or ThingifierServer
+        self.server_kwargs = server_kwargs
+        self._ready = queue.Queue()
+        self._released = set()
+        # Servers ready or booting, counting boot failures waiting in _ready
+        self._spares = 0
+        # Booting spares to stop as soon as they are up, since a reusable
+        # release already filled their place
+        self._surplus = 0
+        self._lock = threading.Lock()
+        self._closed = False
+        # Boots and shutdowns both run here, at most size of each at once
+        self._executor = ThreadPoolExecutor(max_workers=size * 2, thread_name_prefix="server-pool")
+        for _ in range(size):
+            self._replenish()
+
+    def _replenish(self):
+        with self._lock:
+            if not self._closed:
+                self._spares += 1
+                self._executor.submit(self._boot)
+
+    def _boot(self):
+        started = self.factory(**self.server_kwargs)
+        try:
+            started.start()
+            if self.warm_up:
+                self.warm_up(started.url)
+        except Exception as e:
+            # Hand the failure to whoever acquires next, so it surfaces at once
+            started.stop()
+            with self._lock:
+                if self._take_surplus():
+                    return
+            self._ready.put(e)
+            return
+        with self._lock:
+            discard = self._closed or self._take_surplus()
+        if discard:
+            started.stop()
+        else:
+            self._ready.put(started)
+
+    def _take_surplus(self):
+        # Called with _lock held
+        if not self._surplus:
+            return False
+        self._surplus -= 1
+        self._spares -= 1
+        return True
+
+    def acquire(self, timeout=STARTUP_TIMEOUT):
+        """
+        Take a pristine server, waiting up to timeout seconds for one to boot.
+
+        Raises ServerStartError if none becomes ready or a boot failed.
+        """
+        try:
+            item = self._ready.get(timeout=timeout)
+        except queue.Empty:
+            raise ServerStartError(f"no pooled server became ready within {timeout:.0f}s") from None
+        with self._lock:
+            self._spares -= 1
+            short = self._spares - self._surplus < self.size
+            if short and self._surplus:
+                # Keep a booting surplus spare rather than boot another
+                self._surplus -= 1
+                short = False
+        if short:
+            self._replenish()
+        if isinstance(item, Exception):
+            if isinstance(item, ServerStartError):
+                raise item
+            raise ServerStartError(f"pooled server failed to start: {item}") from item
+        return item
+
+    def release(self, server, reusable=False):
+        """
+        Give back a used server.
+
+        A reusable server must hold exactly the data it was acquired with; it
+        is handed out again. Otherwise it is shut down in the background.
+        """
+        with self._lock:
+            if reusable and not self._closed:
+                self._spares += 1
+                self._ready.put(server)
+                if self._spares - self._surplus > self.size:
+                    self._drop_spare(server)
+                return
+            if not self._closed:
+                self._released.add(server)
+                self._executor.submit(self._stop_released, server)
+                return
+        server.stop()
+
+    def _drop_spare(self, kept):
+        # Called with _lock held. Stops the oldest ready spare, keeping the
+        # warm server just released; if that is the only one ready, the
+        # spare still booting is stopped when it is up instead.
+        try:
+            item = self._ready.get_nowait()
+        except queue.Empty:
+            return
+        if item is kept:
+            self._ready.put(item)
+            self._surplus += 1
+            return
+        self._spares -= 1
+        if not isinstance(item, Exception):
+            self._released.add(item)
+            self._executor.submit(self._stop_released, item)
+
+    def _stop_released(self, server):
+        server.stop()
+        with self._lock:
+            self._released.discard(server)
+
+    def close(self):
+        """Stop every pooled server, including those still booting."""
+        with self._lock:
+            self._closed = True
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        # Shutdowns cancelled above never ran
+        for released in list(self._released):
+            released.stop()
+        self._released.clear()
+        while True:
+            try:
+                item = self._ready.get_nowait()
+            except queue.Empty:
+                break
+            if not isinstance(item, Exception):
+                item.stop()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,116 @@
+"""
+Exclusive leases on the servers in config.BASE_URLS.
+
+    with server_pool.acquire() as lease:
+        os.environ["TODO_API_URL"] = lease.url
+        ...
+
+Each server in the pool is guarded by a lock file, so concurrent test
+processes (runner workers, parallel behave runs) never share a Thingifier
+instance. The operating system releases the lock when the holder exits,
+so a crashed worker cannot leave a server locked.
+"""
+import hashlib
+import os
+import tempfile
+import time
+from tests.utils import config
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Lock files live here; override with TODO_API_LOCK_DIR to separate pools
+LOCK_DIR = os.environ.get("TODO_API_LOCK_DIR", os.path.join(tempfile.gettempdir(), "todo-api-leases"))
+
+class PoolExhausted(TimeoutError):
+    """Every server in the pool stayed leased for the whole timeout."""
+
+def _lock_path(url):
+    digest = hashlib.sha1(url.encode("utf-8")).hexdigest()[:16]
+    return os.path.join(LOCK_DIR, f"{digest}.lock")
+
+def _try_lock(fd):
+    try:
+        if fcntl:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        return True
+    except OSError:
+        return False
+
+def _unlock(fd):
+    if fcntl:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+    else:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+class Lease:
+    """Exclusive ownership of one server until released."""
+
+    def __init__(self, url, fd):
+        self.url = url
+        self._fd = fd
+
+    def release(self):
+        if self._fd is None:
+            return
+        try:
+            _unlock(self._fd)
+        finally:
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+    def __repr__(self):
+        return f"Lease({self.url!r})"
+
+def try_acquire(urls=None):
+    """Lease the first free server in urls (default config.BASE_URLS), or return None."""
+    os.makedirs(LOCK_DIR, exist_ok=True)
+    for url in urls or config.BASE_URLS:
+        fd = os.open(_lock_path(url), os.O_RDWR | os.O_CREAT, 0o644)
+        if _try_lock(fd):
+            return Lease(url, fd)
+        os.close(fd)
+    return None
+
+def acquire(urls=None, timeout=None, poll_interval=0.1):
+    """
+    Lease a free server, waiting up to timeout seconds (forever if None).
+
+    Raises PoolExhausted if no server frees up in time.
+    """
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while True:
+        lease = try_acquire(urls)
+        if lease:
+            return lease
+        if deadline is not None and time.monotonic() >= deadline:
+            raise PoolExhausted(f"no free server among {', '.join(urls or config.BASE_URLS)}")
+        time.sleep(poll_interval)
+
+def pin(url):
+    """
+    Point this process, and any it starts, at url.
+
+    The clients read config.BASE_URL on every call, so this takes effect
+    for requests made after it returns.
+    """
+    os.environ["TODO_API_URL"] = url
+    config.BASE_URL = url
+
+def use(urls):
+    """Make urls the pool for this process and any it starts, e.g. servers it launched."""
+    os.environ["TODO_API_URLS"] = ",".join(urls)
+    os.environ.pop("TODO_API_URL", None)
+    config.BASE_URLS = list(urls)
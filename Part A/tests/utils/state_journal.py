@@ -0,0 +1,322 @@
+"""
+Keep a snapshot of the server's entities current by journaling mutations.
+
+    journal = instrumentation.subscribe(StateJournal(base_url).capture())
+    journal.checkpoint()           # start of a scenario
+    post("/todos", json={...})     # seen by the journal as it happens
+    changes = journal.sync().diff("todos")
+    changes.missing, changes.extra, changes.modified
+    added, removed = journal.edge_diff()
+
+capture() reads every collection once. After that the journal is an
+instrumentation subscriber: each successful POST, PUT or DELETE to base_url
+marks the entities it can touch as dirty (ids in the path and body, the
+Location of a 201, and anything related to a deleted entity), and before an
+entity is first touched after a checkpoint its state is saved. sync()
+re-reads only the dirty entities with GET /type/id, so its cost follows the
+number of changes rather than the size of the server, and diff() compares
+the saved states with the current ones by id and a hash of their fields.
+edge_diff() does the same for relationships as sets of Edges.
+checkpoint() syncs and forgets the saved states. A mutation the journal
+cannot place (an admin path, or a body that is not JSON) makes the next sync
+read every collection and diff it against the snapshot instead.
+"""
+import json
+import threading
+from collections import namedtuple
+from urllib.parse import urlsplit
+from tests.utils import api_client
+from tests.utils.bulk import run_concurrently
+from tests.utils.replay import ENTITY_OF, body_ids, body_entity, path_ids
+from tests.utils.streaming import stream_collection
+
+COLLECTIONS = ("todos", "categories", "projects")
+
+_MUTATING = {"POST", "PUT", "DELETE", "PATCH"}
+
+StateDiff = namedtuple("StateDiff", ["missing", "extra", "modified"])
+
+Edge = namedtuple("Edge", ["collection", "id", "relationship", "target"])
+
+# Relationships the API stores on both ends -> the same link named from its other end
+TWO_WAY = {("todos", "tasksof"): ("projects", "tasks")}
+
+# Fields the API renders as "true"/"false" strings but only accepts as JSON booleans
+BOOLEAN_FIELDS = {"todos": ("doneStatus",), "projects": ("completed", "active")}
+
+def fields(entity):
+    """entity without its id and relationships."""
+    return {name: value for name, value in entity.items() if name != "id" and name not in ENTITY_OF}
+
+def fingerprint(entity):
+    """Hash of an entity's fields, equal for entities that differ only in id or relationships."""
+    return hash(json.dumps(fields(entity), sort_keys=True))
+
+def diff(original, current):
+    """
+    Compare two {id: entity} maps in one pass over each.
+
+    missing and extra list the entities only in original and only in current;
+    modified lists (original, current) pairs whose fields differ.
+    """
+    missing = [entity for entity_id, entity in original.items() if entity_id not in current]
+    extra = [entity for entity_id, entity in current.items() if entity_id not in original]
+    modified = [(entity, current[entity_id]) for entity_id, entity in original.items()
+                if entity_id in current and fingerprint(entity) != fingerprint(current[entity_id])]
+    return StateDiff(missing, extra, modified)
+
+def edges(collection, entity):
+    """Set of the Edges from entity, each two-way link named from one fixed end."""
+    found = set()
+    for relationship, targets in entity.items():
+        if relationship not in ENTITY_OF or not isinstance(targets, list):
+            continue
+        for target in targets:
+            if isinstance(target, dict) and target.get("id") is not None:
+                found.add(canonical(Edge(collection, str(entity["id"]), relationship, str(target["id"]))))
+    return found
+
+def canonical(edge):
+    other = TWO_WAY.get((edge.collection, edge.relationship))
+    return Edge(other[0], edge.target, other[1], edge.id) if other else edge
+
+def payload(collection, entity):
+    """JSON body that gives an entity of collection the fields of entity."""
+    body = fields(entity)
+    for name in BOOLEAN_FIELDS.get(collection, ()):
+        if isinstance(body.get(name), str):
+            body[name] = body[name].lower() == "true"
+    return body
+
+def _json(text):
+    try:
+        return json.loads(text) if text else None
+    except ValueError:
+        return None
+
+class StateJournal:
+    """Subscriber holding {collection: {id: entity}} for one server, updated from its mutations."""
+
+    def __init__(self, base_url, collections=COLLECTIONS, session=None):
+        self.base_url = base_url.rstrip("/")
+        self.collections = tuple(collections)
+        self.session = session or api_client.session
+        self.entities = {collection: {} for collection in self.collections}
+        self.captures = 0
+        self.refreshed = 0
+        self._origin = urlsplit(self.base_url)
+        self._prefix = self._origin.path.rstrip("/")
+        # (collection, id) -> keys of the entities whose relationships point at it
+        self._referrers = {}
+        self._dirty = set()
+        # (collection, id) -> entity as of the last checkpoint, None if it did not exist
+        self._before = {}
+        self._stale = True
+        self._lock = threading.RLock()
+
+    def _read_all(self):
+        return {collection: {str(entity["id"]): entity
+                             for entity in stream_collection(f"{self.base_url}/{collection}")
+                             if entity.get("id") is not None}
+                for collection in self.collections}
+
+    def _replace(self, entities):
+        self.entities = entities
+        self._referrers = {}
+        for collection, by_id in entities.items():
+            for entity_id, entity in by_id.items():
+                self._link((collection, entity_id), entity)
+        self._stale = False
+        self.captures += 1
+
+    def capture(self):
+        """Read every collection in full, replacing whatever the journal holds."""
+        entities = self._read_all()
+        with self._lock:
+            self._replace(entities)
+            self._dirty.clear()
+            self._before.clear()
+        return self
+
+    def sync(self):
+        """
+        Bring the journal up to date with the server, keeping what changed since the last checkpoint.
+
+        Only dirty entities are fetched, unless a mutation the journal could
+        not place means every collection has to be read and compared again.
+        """
+        with self._lock:
+            stale, dirty = self._stale, self._dirty
+            self._dirty = set()
+        if stale:
+            entities = self._read_all()
+            with self._lock:
+                # Relationships count here too, so compare whole entities rather than use diff()
+                for collection, previous in self.entities.items():
+                    current = entities[collection]
+                    for entity_id in previous.keys() | current.keys():
+                        if previous.get(entity_id) != current.get(entity_id):
+                            self._save((collection, entity_id))
+                self._replace(entities)
+            return self
+        try:
+            run_concurrently([lambda key=key: self._refresh(key) for key in dirty])
+        except Exception:
+            self.invalidate()
+            raise
+        return self
+
+    def checkpoint(self):
+        """Sync, then make the current state the one diff() compares with."""
+        self.sync()
+        with self._lock:
+            self._before.clear()
+        return self
+
+    def invalidate(self):
+        """Make the next sync read every collection again."""
+        with self._lock:
+            self._stale = True
+
+    def _refresh(self, key):
+        collection, entity_id = key
+        response = self.session.get(f"{self.base_url}/{collection}/{entity_id}")
+        entity = None
+        if response.status_code == 200:
+            entity = next(iter((response.json().get(collection) or [None])), None)
+        elif response.status_code != 404:
+            response.raise_for_status()
+        with self._lock:
+            self._store(key, entity)
+            self.refreshed += 1
+
+    def diff(self, collection):
+        """StateDiff of collection between the last checkpoint and the last sync, over touched entities only."""
+        with self._lock:
+            current = self.entities.get(collection, {})
+            touched = [(entity_id, entity) for (name, entity_id), entity in self._before.items() if name == collection]
+            return diff({entity_id: entity for entity_id, entity in touched if entity is not None},
+                        {entity_id: current[entity_id] for entity_id, _ in touched if entity_id in current})
+
+    def edge_diff(self, ids=None):
+        """
+        (added, removed) sets of Edges between the last checkpoint and the last sync, over touched entities.
+
+        ids maps (collection, old id) to the id of an entity recreated in its
+        place, so removed edges point at the replacement.
+        """
+        ids = ids or {}
+
+        def remap(edge):
+            return Edge(edge.collection, ids.get((edge.collection, edge.id), edge.id), edge.relationship,
+                        ids.get((ENTITY_OF[edge.relationship], edge.target), edge.target))
+
+        before, after = set(), set()
+        with self._lock:
+            for (collection, entity_id), entity in self._before.items():
+                if entity is not None:
+                    before.update(remap(edge) for edge in edges(collection, entity))
+                current = self.entities[collection].get(entity_id)
+                if current is not None:
+                    after.update(edges(collection, current))
+        return after - before, before - after
+
+    def changes(self):
+        """Number of entities touched since the last checkpoint."""
+        with self._lock:
+            return len(self._before)
+
+    def __call__(self, timing):
+        if timing.method not in _MUTATING:
+            return
+        parts = urlsplit(timing.url)
+        if (parts.scheme, parts.netloc) != (self._origin.scheme, self._origin.netloc):
+            return
+        path = parts.path[len(self._prefix):] if parts.path.startswith(self._prefix) else parts.path
+        segments = [segment for segment in path.split("/") if segment]
+        with self._lock:
+            if not segments or segments[0] not in self.collections:
+                # Admin endpoints can change anything
+                self.invalidate()
+                return
+            if timing.status_code >= 400:
+                return
+            self._apply(timing, path, segments)
+
+    def _apply(self, timing, path, segments):
+        keys = set(path_ids(path))
+        body = timing.request.body
+        if isinstance(body, bytes):
+            body = body.decode("utf-8", "replace")
+        parsed = _json(body) if isinstance(body, str) else None
+        if body and parsed is None:
+            # An XML or unreadable body may reference anything
+            self.invalidate()
+            return
+        if parsed is not None:
+            keys.update(body_ids(parsed, body_entity(path), []))
+
+        location = timing.response.headers.get("Location")
+        created = None
+        if timing.status_code == 201 and location:
+            created_ids = path_ids("/" + urlsplit(location).path.lstrip("/"))
+            created = created_ids[-1] if created_ids else None
+            if created:
+                keys.add(created)
+
+        # Entities related to one being replaced or deleted lose their side of the relationship
+        if len(segments) == 2 and timing.method in ("PUT", "DELETE"):
+            key = (ENTITY_OF[segments[0]], segments[1])
+            keys |= self._referrers.get(key, set())
+            keys |= self._targets(key)
+
+        for key in keys:
+            if key[0] not in self.entities:
+                continue
+            self._save(key)
+            self._dirty.add(key)
+        if timing.method == "DELETE" and len(segments) == 2:
+            key = (ENTITY_OF[segments[0]], segments[1])
+            self._store(key, None)
+            self._dirty.discard(key)
+        # A plain create answers with the whole new entity, so it needs no refresh
+        if (created and len(segments) == 1 and timing.bytes_in is not None
+                and timing.response.headers.get("Content-Type", "").startswith("application/json")):
+            entity = _json(timing.response.text)
+            if isinstance(entity, dict) and str(entity.get("id")) == created[1]:
+                self._store(created, entity)
+                self._dirty.discard(created)
+
+    def _save(self, key):
+        if key not in self._before:
+            self._before[key] = self.entities[key[0]].get(key[1])
+
+    def _targets(self, key):
+        entity = self.entities.get(key[0], {}).get(key[1])
+        if entity is None:
+            return set()
+        return {ref for ref in body_ids(entity, key[0], []) if ref != key}
+
+    def _link(self, key, entity):
+        for ref in body_ids(entity, key[0], []):
+            if ref != key:
+                self._referrers.setdefault(ref, set()).add(key)
+
+    def _unlink(self, key):
+        for ref in self._targets(key):
+            referrers = self._referrers.get(ref)
+            if referrers:
+                referrers.discard(key)
+
+    def _store(self, key, entity):
+        collection, entity_id = key
+        self._unlink(key)
+        if entity is None:
+            self.entities[collection].pop(entity_id, None)
+        else:
+            self.entities[collection][entity_id] = entity
+            self._link(key, entity)
+
+    def __repr__(self):
+        counts = ", ".join(f"{len(by_id)} {name}" for name, by_id in self.entities.items())
+        return f"<StateJournal {self.base_url}: {counts}>"
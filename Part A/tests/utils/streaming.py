@@ -0,0 +1,181 @@
+"""
+Incremental decoding of large collection responses.
+
+    for todo in stream_collection(f"{BASE_URL}/todos"):
+        ...
+
+Entities are yielded one at a time from the {"todos": [...]} envelope, or
+from <todos><todo>...</todo></todos> when the server answers in XML, as the
+body arrives. Neither the raw body nor the whole decoded list is ever held in
+memory, and XML entities come out in the same dict shape as JSON ones.
+"""
+import codecs
+import json
+import re
+import xml.etree.ElementTree as ET
+from urllib.parse import urlsplit
+from tests.utils.api_client import session as default_session
+from tests.utils.instrumentation import ENTITY_OF
+
+CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = " \t\n\r"
+_SEPARATORS = _WHITESPACE + ","
+# Characters that can continue a number, as in 3.5, 1e5 or 2E-3
+_NUMBER_TAIL = frozenset("0123456789.eE+-")
+_decoder = json.JSONDecoder()
+
+class StreamingDecodeError(ValueError):
+    """The body is not a collection of the expected shape."""
+
+def _text_chunks(chunks):
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    for chunk in chunks:
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+    text = decoder.decode(b"", final=True)
+    if text:
+        yield text
+
+def iter_json_collection(chunks, entity_type=None):
+    """
+    Yield the items of a JSON collection from an iterable of byte chunks.
+
+    The body may be an envelope such as {"todos": [...]} (found by
+    entity_type) or a bare list.
+    """
+    texts = _text_chunks(chunks)
+    buffer = ""
+    eof = False
+
+    def read_more():
+        nonlocal buffer, eof
+        try:
+            buffer += next(texts)
+        except StopIteration:
+            eof = True
+
+    # Find the opening bracket of the list
+    envelope = re.compile(r'"%s"\s*:\s*\[' % re.escape(entity_type)) if entity_type else None
+    while True:
+        stripped = buffer.lstrip(_WHITESPACE)
+        if stripped.startswith("["):
+            pos = len(buffer) - len(stripped) + 1
+            break
+        match = envelope.search(buffer) if envelope and stripped.startswith("{") else None
+        if match:
+            pos = match.end()
+            break
+        if eof:
+            raise StreamingDecodeError(f"no {entity_type or 'JSON'} list found in response")
+        read_more()
+
+    while True:
+        # Skip separators, then decode one item
+        while pos < len(buffer) and buffer[pos] in _SEPARATORS:
+            pos += 1
+        if pos == len(buffer):
+            if eof:
+                raise StreamingDecodeError("response ended inside the collection")
+            buffer = ""
+            pos = 0
+            read_more()
+            continue
+        if buffer[pos] == "]":
+            return
+        try:
+            item, end = _decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            item, end = None, None
+        # A bare number that runs to the end of the buffer, or stops short of
+        # it at a partial fraction or exponent such as "3." or "1e", may
+        # continue in the next chunk
+        if end is None or (not eof and isinstance(item, (int, float)) and not isinstance(item, bool)
+                           and _NUMBER_TAIL.issuperset(buffer[end:])):
+            buffer = buffer[pos:]
+            pos = 0
+            read_more()
+            continue
+        yield item
+        pos = end
+        if pos > CHUNK_SIZE:
+            buffer = buffer[pos:]
+            pos = 0
+
+def element_to_dict(element):
+    """The dict an XML entity element stands for, in the shape of its JSON."""
+    # Leaf elements are fields; elements with children are relationship
+    # entries, which repeat and so become lists, e.g. "tasksof": [{"id": "1"}]
+    entity = {}
+    for child in element:
+        if len(child):
+            entity.setdefault(child.tag, []).append(element_to_dict(child))
+        else:
+            entity[child.tag] = child.text or ""
+    return entity
+
+def iter_xml_collection(chunks, entity_type=None):
+    """
+    Yield the entities of an XML collection from an iterable of byte chunks.
+
+    <todos><todo><id>1</id><tasksof><id>2</id></tasksof></todo></todos>
+    yields {"id": "1", "tasksof": [{"id": "2"}]}. Each entity element is
+    cleared once converted, so memory stays constant however long the
+    collection is.
+    """
+    parser = ET.XMLPullParser(events=("start", "end"))
+    root = None
+    depth = 0
+
+    def events():
+        nonlocal root, depth
+        for event, element in parser.read_events():
+            if event == "start":
+                depth += 1
+                if depth == 1:
+                    root = element
+                    if entity_type and root.tag != entity_type:
+                        raise StreamingDecodeError(f"expected <{entity_type}> but the response is <{root.tag}>")
+                continue
+            depth -= 1
+            if depth == 1:
+                yield element_to_dict(element)
+                element.clear()
+                del root[:]
+
+    try:
+        for chunk in chunks:
+            parser.feed(chunk)
+            yield from events()
+        parser.close()
+    except ET.ParseError as e:
+        raise StreamingDecodeError(f"invalid XML collection: {e}") from e
+    yield from events()
+    if root is None:
+        raise StreamingDecodeError(f"no {entity_type or 'XML'} collection found in response")
+
+def stream_collection(url, entity_type=None, session=None, headers=None, chunk_size=CHUNK_SIZE):
+    """
+    GET a collection and yield its entities one at a time as the body arrives.
+
+    entity_type defaults to the collection named by the last path segment of
+    url, e.g. "todos" for /todos?doneStatus=false and for /projects/1/tasks. JSON is requested unless headers ask otherwise;
+    the decoder follows the response Content-Type. Raises requests.HTTPError
+    for non-2xx responses.
+    """
+    if entity_type is None:
+        segment = urlsplit(url).path.rstrip("/").rsplit("/", 1)[-1]
+        entity_type = ENTITY_OF.get(segment, segment)
+    request_headers = {"Accept": "application/json"}
+    request_headers.update(headers or {})
+    session = session or default_session
+    with session.get(url, headers=request_headers, stream=True) as response:
+        response.raise_for_status()
+        chunks = response.iter_content(chunk_size)
+        if response.headers.get("Content-Type", "").startswith("application/xml"):
+            yield from iter_xml_collection(chunks, entity_type)
+        else:
+            yield from iter_json_collection(chunks, entity_type)
@@ -0,0 +1,105 @@
+"""
+Warm up a freshly started server before anything is timed.
+
+    report = warm_up(BASE_URL)
+    print(report.rounds, report.steady, f"{report.round_times[-1] * 1000:.1f}ms")
+
+A fresh JVM serves its first requests from interpreted bytecode. Each round
+drives the mix of routes the suites use: collections and instances,
+relationship routes, JSON and XML, and optionally writes whose entities are
+deleted again in the same round. Rounds repeat until round time reaches a
+steady state, judged by comparing the medians of the last two windows of
+rounds.
+"""
+import statistics
+import time
+from collections import namedtuple
+import requests
+from tests.utils import config
+
+WarmupReport = namedtuple("WarmupReport", ["rounds", "steady", "seconds", "round_times"])
+
+JSON = {"Accept": "application/json", "Content-Type": "application/json"}
+XML = {"Accept": "application/xml", "Content-Type": "application/xml"}
+
+def _first_id(warm_session, url, entity_type):
+    entities = warm_session.get(f"{url}/{entity_type}", headers=JSON).json().get(entity_type, [])
+    return entities[0]["id"] if entities else None
+
+def _read_round(warm_session, url, seeded):
+    for entity_type in ("todos", "projects", "categories"):
+        warm_session.get(f"{url}/{entity_type}", headers=JSON)
+        warm_session.get(f"{url}/{entity_type}", headers=XML)
+        warm_session.head(f"{url}/{entity_type}", headers=JSON)
+    todo_id, project_id, category_id = seeded
+    if todo_id:
+        warm_session.get(f"{url}/todos/{todo_id}", headers=JSON)
+        warm_session.get(f"{url}/todos/{todo_id}", headers=XML)
+        warm_session.get(f"{url}/todos/{todo_id}/categories", headers=JSON)
+        warm_session.get(f"{url}/todos/{todo_id}/tasksof", headers=JSON)
+    if project_id:
+        warm_session.get(f"{url}/projects/{project_id}", headers=JSON)
+        warm_session.get(f"{url}/projects/{project_id}/tasks", headers=JSON)
+        warm_session.get(f"{url}/projects/{project_id}/categories", headers=JSON)
+    if category_id:
+        warm_session.get(f"{url}/categories/{category_id}", headers=JSON)
+        warm_session.get(f"{url}/categories/{category_id}/todos", headers=JSON)
+        warm_session.get(f"{url}/categories/{category_id}/projects", headers=JSON)
+    warm_session.get(f"{url}/todos/0", headers=JSON)  # 404 path
+
+def _write_round(warm_session, url):
+    todo_id = warm_session.post(f"{url}/todos", json={"title": "warm-up"}, headers=JSON).json()["id"]
+    project_id = warm_session.post(f"{url}/projects", json={"title": "warm-up"}, headers=JSON).json()["id"]
+    category_id = warm_session.post(f"{url}/categories", json={"title": "warm-up"}, headers=JSON).json()["id"]
+    xml_todo = warm_session.post(f"{url}/todos", data="<todo><title>warm-up</title></todo>", headers=XML)
+    try:
+        warm_session.put(f"{url}/todos/{todo_id}", json={"title": "warm-up", "doneStatus": True}, headers=JSON)
+        warm_session.post(f"{url}/todos/{todo_id}/categories", json={"id": category_id}, headers=JSON)
+        warm_session.post(f"{url}/projects/{project_id}/tasks", json={"id": todo_id}, headers=JSON)
+        warm_session.post(f"{url}/todos", json={"doneStatus": "not a boolean"}, headers=JSON)  # 400 path
+        warm_session.delete(f"{url}/todos/{todo_id}/categories/{category_id}", headers=JSON)
+        warm_session.delete(f"{url}/projects/{project_id}/tasks/{todo_id}", headers=JSON)
+    finally:
+        warm_session.delete(f"{url}/todos/{todo_id}", headers=JSON)
+        warm_session.delete(f"{url}/projects/{project_id}", headers=JSON)
+        warm_session.delete(f"{url}/categories/{category_id}", headers=JSON)
+        if xml_todo.status_code == 201:
+            warm_session.delete(f"{url}/todos/{xml_todo.json()['id']}", headers=JSON)
+
+def is_steady(round_times, window=None, tolerance=None):
+    """True when the median of the last window rounds is within tolerance of the window before."""
+    window = window or config.WARMUP_WINDOW
+    tolerance = config.WARMUP_TOLERANCE if tolerance is None else tolerance
+    if len(round_times) < 2 * window:
+        return False
+    previous = statistics.median(round_times[-2 * window:-window])
+    latest = statistics.median(round_times[-window:])
+    return abs(latest - previous) <= tolerance * previous
+
+def warm_up(url=None, writes=True, min_rounds=None, max_rounds=None, window=None, tolerance=None):
+    """
+    Drive the endpoint mix against url until round times are steady.
+
+    With writes=False only GET and HEAD requests are made, so the server's
+    data and id counters stay exactly as the jar started them. Returns a
+    WarmupReport; steady is False if max_rounds ran out first.
+    """
+    url = (url or config.BASE_URL).rstrip("/")
+    min_rounds = config.WARMUP_MIN_ROUNDS if min_rounds is None else min_rounds
+    max_rounds = max_rounds or config.WARMUP_MAX_ROUNDS
+    round_times = []
+    start = time.perf_counter()
+    with requests.Session() as warm_session:
+        seeded = tuple(_first_id(warm_session, url, entity_type)
+                       for entity_type in ("todos", "projects", "categories"))
+        steady = False
+        while len(round_times) < max_rounds:
+            round_start = time.perf_counter()
+            _read_round(warm_session, url, seeded)
+            if writes:
+                _write_round(warm_session, url)
+            round_times.append(time.perf_counter() - round_start)
+            if len(round_times) >= min_rounds and is_steady(round_times, window, tolerance):
+                steady = True
+                break
+    return WarmupReport(len(round_times), steady, time.perf_counter() - start, round_times)
@@ -20,6 +20,19 @@ Feature: Delete a Project Given an ID
       | method | id | remaining_ids |
       | DELETE | 2  | 1 and 3       |
 
+  # Alternate Flow
+  Scenario: Delete one task of a Project
+    Given the system contains the following todos
+      | id | title              | doneStatus | description             |
+      | 1  | "Draft wireframes" | false      | "Homepage and checkout" |
+      | 3  | "Review copy"      | false      | "Marketing pages"       |
+    And project 3 has the todo 3 as a task
+    And project 3 has the todo 1 as a task
+    When I send a DELETE request to "/projects/3/tasks/3"
+    Then the response status should be 200
+    And project 3 should not have the todo 3 as a task
+    And project 3 should have the todo 1 as a task
+
   # Alternate Flow
   Scenario Outline: Attempt to delete a Project with a valid but non-existent ID
     When I send a <method> request to "/projects/<id>"
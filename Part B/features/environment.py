@@ -1,64 +1,191 @@
 """
 Environment configuration for Behave tests.
 """
-import requests
+import glob
 import json
+import os
+import re
 import sys
-from time import sleep
+import time
+from behave.parser import parse_file
+from features.steps.test_utils import SEED_STEPS, SharedFixtures, session, table_rows
+from tests.utils.bulk import run_concurrently
+from tests.utils import inprocess, instrumentation, memory_server, recorder, server, server_pool, warmup
+from tests.utils.state_journal import StateJournal, payload
+
+# Longest after_scenario waits for deleted entities to disappear, in seconds
+TEARDOWN_TIMEOUT = 5
+
+FEATURES_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Steps that can change entities; a scenario with one gets its own copies of shared fixtures
+MUTATING_STEP = re.compile(r'\b(POST|PUT|DELETE|PATCH)\b|\b(amend|updat|delet|remov)', re.IGNORECASE)
 
 def before_all(context):
     """Run before all tests to check if the API is running."""
-    # Base URL of the API
-    context.base_url = "http://localhost:4567"
+    # Time every request per endpoint when run with -D endpoint_timings=true
+    context.route_stats = None
+    if context.config.userdata.getbool('endpoint_timings'):
+        context.route_stats = instrumentation.subscribe(instrumentation.RouteStats())
+    
+    # Record every request and response to NDJSON with -D record=true (or -D record=path)
+    context.recorder = None
+    record = context.config.userdata.get('record')
+    if record:
+        path = None if record.lower() in ('true', 'yes', '1', 'on') else record
+        context.recorder = instrumentation.subscribe(recorder.Recorder(path))
+    
+    # Base URL of the API: -D server_pool=N gives every scenario a server
+    # from N pre-warmed spares, restored and reused while restores succeed, -D start_server=true launches the
+    # bundled jar for this run, -D base_url=... pins one server, otherwise
+    # take exclusive use of a free one from -D base_urls=a,b,... or TODO_API_URLS.
+    # -D in_memory=true swaps the jar for the in-memory stand-in in the first two,
+    # and -D in_process=true calls the stand-in directly instead of over a socket
+    context.server = None
+    context.journal = None
+    context.shared_fixtures = None
+    context.server_lease = None
+    context.server_pool = None
+    context.scenario_server = None
+    context.pool_journals = {}
+    context.base_url = context.config.userdata.get('base_url')
+    pool_size = context.config.userdata.getint('server_pool', 0)
+    in_memory = context.config.userdata.getbool('in_memory')
+    if pool_size > 0:
+        if in_memory:
+            context.server_pool = server.WarmServerPool(pool_size, warm_up=None, factory=memory_server.MemoryServer)
+        else:
+            context.server_pool = server.WarmServerPool(pool_size)
+        print(f"Warming a pool of {pool_size} API servers")
+        return
+    elif context.config.userdata.getbool('in_process'):
+        context.base_url = inprocess.serve(memory_server.App())
+        print(f"Using an in-process API at {context.base_url}")
+        _start_journal(context)
+        _seed_shared_fixtures(context)
+        return
+    elif in_memory or context.config.userdata.getbool('start_server'):
+        try:
+            context.server = (memory_server.MemoryServer() if in_memory else server.ThingifierServer()).start()
+        except server.ServerStartError as e:
+            print(f"ERROR: Could not start the API server: {e}")
+            sys.exit(1)
+        context.base_url = context.server.url
+    elif not context.base_url:
+        urls = [url.strip() for url in context.config.userdata.get('base_urls', '').split(',') if url.strip()]
+        try:
+            context.server_lease = server_pool.acquire(urls or None, timeout=300)
+        except server_pool.PoolExhausted as e:
+            print(f"ERROR: {e}")
+            sys.exit(1)
+        context.base_url = context.server_lease.url
     
     try:
-        response = requests.get(f"{context.base_url}/todos", timeout=5)
+        server.wait_until_ready(context.base_url, timeout=5)
         print(f"Connected to API at {context.base_url}")
-        print(f"API Response Status: {response.status_code}")
-    except (requests.ConnectionError, requests.Timeout) as e:
+    except server.ServerStartError as e:
         print(f"ERROR: Could not connect to API at {context.base_url}")
-        print(f"Please ensure the API service is running before executing tests.")
+        print(f"Please ensure the API service is running before executing tests, or run with -D start_server=true.")
         sys.exit(1)  # Exit with error code - this will make the tests fail
-
-def before_scenario(context, scenario):
-    """Run before each scenario to reset the system state."""
-    context.original_state = {}
     
-    try:
-        # Get all todos
-        todos_response = requests.get(f"{context.base_url}/todos")
-        if todos_response.status_code == 200:
-            todos = todos_response.json()
-            if isinstance(todos, dict) and 'todos' in todos:
-                todos = todos['todos']
-            context.original_state['todos'] = todos
-        
-        # Get all categories
-        categories_response = requests.get(f"{context.base_url}/categories")
-        if categories_response.status_code == 200:
-            categories = categories_response.json()
-            if isinstance(categories, dict) and 'categories' in categories:
-                categories = categories['categories']
-            context.original_state['categories'] = categories
-        
-        # Get all projects
-        projects_response = requests.get(f"{context.base_url}/projects")
-        if projects_response.status_code == 200:
-            projects = projects_response.json()
-            if isinstance(projects, dict) and 'projects' in projects:
-                projects = projects['projects']
-            context.original_state['projects'] = projects
-            
-        # Capture relationships
-        context.original_state['relationships'] = {}
-        
-        print(f"Captured original state: {len(context.original_state.get('todos', []))} todos, " 
-              f"{len(context.original_state.get('categories', []))} categories, "
-              f"{len(context.original_state.get('projects', []))} projects")
+    # Warm a fresh JVM up before scenarios are timed (-D warmup=true for a server started by hand)
+    if (context.server and not in_memory) or context.config.userdata.getbool('warmup'):
+        report = warmup.warm_up(context.base_url)
+        print(f"Warmed up API in {report.rounds} rounds, {report.seconds:.1f}s"
+              f"{'' if report.steady else ' (latency not yet steady)'}")
     
+    _start_journal(context)
+    _seed_shared_fixtures(context)
+
+def _start_journal(context):
+    """Snapshot the server once; every mutating request from here on keeps the snapshot current."""
+    try:
+        context.journal = instrumentation.subscribe(StateJournal(context.base_url).capture())
     except Exception as e:
         print(f"Warning: Failed to capture original system state: {e}")
-        context.original_state = {'todos': [], 'categories': [], 'projects': []}
+        context.journal = instrumentation.subscribe(StateJournal(context.base_url))
+    print(f"Captured original state: {context.journal!r}")
+
+def _seed_shared_fixtures(context):
+    """Seed the union of every feature's static Background tables once, unless run with -D shared_fixtures=false."""
+    if not context.config.userdata.getbool('shared_fixtures', True):
+        return
+    tables = []
+    for path in sorted(glob.glob(os.path.join(FEATURES_DIR, '**', '*.feature'), recursive=True)):
+        feature = parse_file(path)
+        if feature is None or feature.background is None:
+            continue
+        for step in feature.background.steps:
+            entity_type = SEED_STEPS.get(step.name)
+            if entity_type and step.table:
+                tables.append((entity_type, table_rows(entity_type, step.table)))
+    try:
+        context.shared_fixtures = SharedFixtures.seed(context, tables)
+    except Exception as e:
+        print(f"Warning: Failed to seed shared fixtures, every scenario will seed its own: {e}")
+        return
+    print(f"Seeded {len(context.shared_fixtures)} shared Background entities "
+          f"({len(context.shared_fixtures.created)} created)")
+
+def after_all(context):
+    """Run after all tests to release the server, finish any recording and report per-endpoint timings."""
+    if context.shared_fixtures:
+        # Leave the server as the run found it
+        run_concurrently([lambda url=f"{context.base_url}/{entity_type}/{entity_id}": _delete(url)
+                          for entity_type, entity_id in context.shared_fixtures.created])
+    if context.server_pool:
+        for journal in context.pool_journals.values():
+            instrumentation.unsubscribe(journal)
+        context.server_pool.close()
+    if context.server:
+        context.server.stop()
+    if context.server_lease:
+        context.server_lease.release()
+    if context.journal:
+        instrumentation.unsubscribe(context.journal)
+        print(f"State journal: {context.journal.captures} full captures, "
+              f"{context.journal.refreshed} entities refreshed")
+    if context.recorder:
+        instrumentation.unsubscribe(context.recorder)
+        context.recorder.close()
+        print(f"Recorded {context.recorder.written} requests to {context.recorder.path}")
+    if context.route_stats is None:
+        return
+    instrumentation.unsubscribe(context.route_stats)
+    
+    print("\nSlowest endpoints:")
+    for (method, route), stats in context.route_stats.slowest(15):
+        count = stats['count']
+        print(f"{method:7} {route:40} {count:5}x  total {stats['total']:.3f}s  "
+              f"mean {stats['total'] / count * 1000:.1f}ms  "
+              f"(connect {stats['connect'] / count * 1000:.1f}ms, "
+              f"ttfb {stats['ttfb'] / count * 1000:.1f}ms, "
+              f"read {stats['read'] / count * 1000:.1f}ms)")
+
+def before_scenario(context, scenario):
+    """Run before each scenario to reset the system state."""
+    # Each pooled server keeps its own journal, captured the first time it is handed out
+    if context.server_pool:
+        try:
+            context.scenario_server = context.server_pool.acquire()
+        except server.ServerStartError as e:
+            print(f"ERROR: Could not get a server from the pool: {e}")
+            raise
+        context.base_url = context.scenario_server.url
+        context.journal = context.pool_journals.get(context.scenario_server)
+        if context.journal is None:
+            try:
+                journal = StateJournal(context.base_url).capture()
+            except Exception as e:
+                print(f"ERROR: Could not capture the pooled server's state: {e}")
+                context.server_pool.release(context.scenario_server)
+                context.scenario_server = None
+                raise
+            context.journal = context.pool_journals[context.scenario_server] = instrumentation.subscribe(journal)
+    _checkpoint_state(context)
+    
+    # Scenarios that only read share the run-wide fixtures; the rest seed private copies
+    context.copy_on_write = any(MUTATING_STEP.search(step.name) for step in scenario.steps)
     
     # Initialize test data tracking
     context.test_data = {
@@ -72,113 +199,155 @@ def before_scenario(context, scenario):
     
     print(f"\nExecuting scenario: {scenario.name}")
 
+def _checkpoint_state(context):
+    """Helper function to bring the journal up to date with the entities that exist before a scenario."""
+    try:
+        context.journal.checkpoint()
+    except Exception as e:
+        print(f"Warning: Failed to capture original system state: {e}")
+
 def after_scenario(context, scenario):
     """Run after each scenario to restore the system to its original state."""
     print("\nRestoring system to original state...")
     
-    # 1. First, clean up relationships created during tests
-    for rel_type, entity1, entity2, id1, id2 in context.test_data.get('relationships', []):
-        try:
-            # The endpoint format varies based on relationship type
-            if rel_type == 'category_todos':
-                # Delete relationship between category and todo
-                url = f"{context.base_url}/categories/{id1}/todos/{id2}"
-                response = requests.delete(url)
-                print(f"Deleted {entity1}-{entity2} relationship: {id1}-{id2}, status: {response.status_code}")
-            elif rel_type == 'category_projects':
-                # Delete relationship between category and project
-                url = f"{context.base_url}/categories/{id1}/projects/{id2}"
-                response = requests.delete(url)
-                print(f"Deleted {entity1}-{entity2} relationship: {id1}-{id2}, status: {response.status_code}")
-            elif rel_type == 'project_tasks':
-                # Delete relationship between project and todo (tasks)
-                url = f"{context.base_url}/projects/{id1}/tasks/{id2}"
-                response = requests.delete(url)
-                print(f"Deleted {entity1}-{entity2} relationship: {id1}-{id2}, status: {response.status_code}")
-            elif rel_type == 'todo_tasksof':
-                # Delete relationship between todo and project (tasksof)
-                url = f"{context.base_url}/todos/{id1}/tasksof/{id2}"
-                response = requests.delete(url)
-                print(f"Deleted {entity1}-{entity2} relationship: {id1}-{id2}, status: {response.status_code}")
-        except Exception as e:
-            print(f"Warning: Failed to delete relationship {entity1}-{entity2} {id1}-{id2}: {e}")
-    
-    # 2. Delete test entities in reverse order of dependency
-    # First todos
-    for todo_id in context.test_data.get('todos', []):
-        try:
-            response = requests.delete(f"{context.base_url}/todos/{todo_id}")
-            print(f"Deleted test todo with ID: {todo_id}, status: {response.status_code}")
-        except Exception as e:
-            print(f"Warning: Failed to delete test todo {todo_id}: {e}")
+    # Teardown runs in tiers: relationships first, then todos, projects and
+    # categories, with every delete inside a tier sent concurrently
+    relationship_urls = {
+        'category_todos': "categories/{}/todos/{}",
+        'category_projects': "categories/{}/projects/{}",
+        'project_tasks': "projects/{}/tasks/{}",
+        'todo_tasksof': "todos/{}/tasksof/{}",
+    }
+    tiers = [
+        [(f"{entity1}-{entity2} relationship: {id1}-{id2}",
+          f"{context.base_url}/{relationship_urls[rel_type].format(id1, id2)}")
+         for rel_type, entity1, entity2, id1, id2 in context.test_data.get('relationships', [])
+         if rel_type in relationship_urls],
+    ]
+    for entity_type in ['todos', 'projects', 'categories']:
+        tiers.append([(f"test {entity_type[:-1]} with ID: {entity_id}", f"{context.base_url}/{entity_type}/{entity_id}")
+                      for entity_id in context.test_data.get(entity_type, [])])
     
-    # Then projects
-    for project_id in context.test_data.get('projects', []):
-        try:
-            response = requests.delete(f"{context.base_url}/projects/{project_id}")
-            print(f"Deleted test project with ID: {project_id}, status: {response.status_code}")
-        except Exception as e:
-            print(f"Warning: Failed to delete test project {project_id}: {e}")
+    deleted_entities = []
+    for index, tier in enumerate(tiers):
+        for (name, url), outcome in zip(tier, run_concurrently([lambda url=url: _delete(url) for _, url in tier])):
+            if isinstance(outcome, Exception):
+                print(f"Warning: Failed to delete {name}: {outcome}")
+                continue
+            print(f"Deleted {name}, status: {outcome}")
+            if index > 0:
+                deleted_entities.append(url)
     
-    # Finally categories
-    for category_id in context.test_data.get('categories', []):
-        try:
-            response = requests.delete(f"{context.base_url}/categories/{category_id}")
-            print(f"Deleted test category with ID: {category_id}, status: {response.status_code}")
-        except Exception as e:
-            print(f"Warning: Failed to delete test category {category_id}: {e}")
+    # Confirm the deleted entities are gone before checking what needs restoring
+    _wait_until_gone(deleted_entities)
     
-    # 3. Check that original entities still exist and restore if needed
-    # Give the API a moment to process deletions
-    sleep(0.5)
+    _restore_entities(context)
     
-    # Restore todos if needed
-    _check_and_restore_entities(context, 'todos')
+    # A pooled server goes back to the pool only if it holds its seed data again, ids included
+    if context.server_pool and context.scenario_server:
+        restored = _at_checkpoint(context.journal)
+        if not restored:
+            print("Restore left the server changed, recycling it")
+            instrumentation.unsubscribe(context.pool_journals.pop(context.scenario_server))
+        context.server_pool.release(context.scenario_server, reusable=restored)
+        context.scenario_server = None
+        context.journal = None
     
-    # Restore categories if needed
-    _check_and_restore_entities(context, 'categories')
+    print("System restoration complete")
+
+def _delete(url):
+    """DELETE url, returning the status code or the exception that stopped it."""
+    try:
+        return session.delete(url).status_code
+    except Exception as e:
+        return e
+
+def _wait_until_gone(urls, timeout=TEARDOWN_TIMEOUT):
+    """Poll each url until it answers 404, backing off from 5ms, for at most timeout seconds."""
+    deadline = time.monotonic() + timeout
+    interval = 0.005
+    while urls:
+        statuses = run_concurrently([lambda url=url: _get_status(url) for url in urls])
+        urls = [url for url, status in zip(urls, statuses) if status != 404]
+        if not urls:
+            return
+        if time.monotonic() >= deadline:
+            print(f"Warning: {len(urls)} deleted entities still present after {timeout}s")
+            return
+        time.sleep(min(interval, max(0.0, deadline - time.monotonic())))
+        interval = min(interval * 2, 0.25)
+
+def _get_status(url):
+    try:
+        return session.get(url).status_code
+    except Exception:
+        return None
+
+def _restore_entities(context):
+    """Helper function to put back original entities and relationships the scenario changed and remove ones it left behind."""
+    try:
+        context.journal.sync()
+    except Exception as e:
+        print(f"Warning: Failed to read the current system state: {e}")
+        return
     
-    # Restore projects if needed
-    _check_and_restore_entities(context, 'projects')
+    # 1. Recreate deleted originals; they come back with new ids
+    recreate, amend, leftover = [], [], []
+    for entity_type in ['todos', 'categories', 'projects']:
+        changes = context.journal.diff(entity_type)
+        for original in changes.missing:
+            recreate.append(((entity_type, str(original['id'])),
+                             f"Created new {entity_type[:-1]} to replace original {original['id']}", session.post,
+                             f"{context.base_url}/{entity_type}", payload(entity_type, original)))
+        for original, _ in changes.modified:
+            amend.append((f"Amended {entity_type[:-1]} {original['id']} back to its original fields", session.post,
+                          f"{context.base_url}/{entity_type}/{original['id']}", payload(entity_type, original)))
+        for entity in changes.extra:
+            leftover.append((f"Deleted leftover {entity_type[:-1]} {entity['id']}", session.delete,
+                             f"{context.base_url}/{entity_type}/{entity['id']}", None))
+    ids = {}
+    for (key, *request), response in zip(recreate, _send_all([request for _, *request in recreate])):
+        if not isinstance(response, Exception) and response.status_code == 201:
+            ids[key] = str(response.json().get('id'))
+    if context.shared_fixtures and ids:
+        context.shared_fixtures.remap(ids)
     
-    # 4. Check original relationships (would be implemented for specific tests)
-    # This is complex and depends on the specific test case
+    # 2. Unlink relationships the scenario added, while both ends still exist
+    added, removed = context.journal.edge_diff(ids)
+    _send_all([(f"Unlinked {edge.collection}/{edge.id}/{edge.relationship}/{edge.target}", session.delete,
+                f"{context.base_url}/{edge.collection}/{edge.id}/{edge.relationship}/{edge.target}", None)
+               for edge in added], gone_ok=True)
     
-    print("System restoration complete")
+    # 3. Amend drifted fields back, delete entities nobody cleaned up and relink removed relationships
+    _send_all(amend + leftover + [
+        (f"Relinked {edge.collection}/{edge.id}/{edge.relationship}/{edge.target}", session.post,
+         f"{context.base_url}/{edge.collection}/{edge.id}/{edge.relationship}", {'id': edge.target})
+        for edge in removed])
 
-def _check_and_restore_entities(context, entity_type):
-    """Helper function to check if original entities exist and restore them if needed."""
-    # Get current entities
-    response = requests.get(f"{context.base_url}/{entity_type}")
-    if response.status_code != 200:
-        print(f"Warning: Failed to get current {entity_type}, status: {response.status_code}")
-        return
+def _at_checkpoint(journal):
+    """Whether the server matches the journal's last checkpoint, entities and relationships alike."""
+    try:
+        journal.sync()
+    except Exception as e:
+        print(f"Warning: Failed to read the current system state: {e}")
+        return False
+    return not any(any(journal.diff(entity_type)) for entity_type in journal.collections) and not any(journal.edge_diff())
+
+def _send_all(requests, gone_ok=False):
+    """Send (description, send, url, json body or None) requests concurrently, report each and return the responses."""
+    def send_one(send, url, body):
+        try:
+            return send(url, json=body) if body is not None else send(url)
+        except Exception as e:
+            return e
     
-    current_entities = response.json()
-    if isinstance(current_entities, dict) and entity_type in current_entities:
-        current_entities = current_entities[entity_type]
-    
-    current_ids = [str(entity.get('id')) for entity in current_entities if entity.get('id')]
-    
-    # Check original entities
-    for original_entity in context.original_state.get(entity_type, []):
-        original_id = str(original_entity.get('id'))
-        if original_id and original_id not in current_ids:
-            print(f"Original {entity_type[:-1]} {original_id} is missing, attempting to restore")
-            
-            # Create a copy of the entity data
-            entity_data = original_entity.copy()
-            # Remove the id if it exists - let the API generate a new one
-            if 'id' in entity_data:
-                del entity_data['id']
-            
-            # Try to create a new entity
-            try:
-                create_url = f"{context.base_url}/{entity_type}"
-                create_response = requests.post(create_url, json=entity_data)
-                if create_response.status_code in [200, 201]:
-                    print(f"Created new {entity_type[:-1]} to replace original {original_id}")
-                else:
-                    print(f"Failed to create new {entity_type[:-1]} to replace {original_id}, status: {create_response.status_code}")
-            except Exception as e:
-                print(f"Error creating new {entity_type[:-1]} to replace {original_id}: {e}")
\ No newline at end of file
+    responses = run_concurrently([lambda send=send, url=url, body=body: send_one(send, url, body)
+                                  for _, send, url, body in requests])
+    for (description, _, _, _), response in zip(requests, responses):
+        if isinstance(response, Exception):
+            print(f"Error: {description} failed: {response}")
+        elif response.status_code in [200, 201] or (gone_ok and response.status_code == 404):
+            print(description)
+        else:
+            print(f"Failed: {description}, status: {response.status_code}")
+    return responses
@@ -5,28 +5,26 @@ import json
 import requests
 from behave import given, then
 from hamcrest import assert_that, equal_to, has_length, greater_than_or_equal_to
+from features.steps.test_utils import stream_collection
 
 @given('the API contains todos data')
 def step_verify_api_has_data(context):
     url = context.base_url + "/todos"
-    response = requests.get(url)
-    
-    assert response.status_code == 200, f"API returned status {response.status_code}"
     
+    count = 0
     try:
-        data = response.json()
-    except json.JSONDecodeError:
+        for todo in stream_collection(url):
+            assert isinstance(todo, dict) and 'id' in todo, f"API returned a malformed todo: {todo!r}"
+            count += 1
+    except requests.HTTPError as e:
+        assert False, f"API returned status {e.response.status_code}"
+    except ValueError:
         assert False, "API response is not valid JSON"
         
-    if isinstance(data, dict) and 'todos' in data:
-        todos = data['todos']
-    else:
-        todos = data
-        
-    assert len(todos) > 0, "API returned empty todos list"
+    assert count > 0, "API returned empty todos list"
     
-    context.todos = todos
-    print(f"API has {len(todos)} todos available")
+    context.todo_count = count
+    print(f"API has {count} todos available")
 
 @given('a filter where "{filter_key}" equals "{filter_value}"')
 def step_set_filter(context, filter_key, filter_value):
@@ -2,93 +2,14 @@
 Step definitions specific to retrieving all Projects.
 """
 import json
-import requests
 from behave import given, then
 from hamcrest import assert_that, equal_to, has_item, contains_string
-from features.steps.test_utils import get_mapped_id
+from features.steps.test_utils import get_mapped_id, seed_table
 
 @given('the system contains the following projects')
 def step_setup_projects(context):
     """Set up test projects for the scenario."""
-    test_projects = []
-    for row in context.table:
-        test_project = {
-            'id': str(row['id']).strip(),
-            'title': row['title'].strip('"'),
-            'completed': row['completed'].lower() == 'true',
-            'active': row['active'].lower() == 'true',
-            'description': row['description'].strip('"')
-        }
-        test_projects.append(test_project)
-    
-    id_mapping = {}
-    
-    response = requests.get(f"{context.base_url}/projects")
-    existing_projects = []
-    
-    if response.status_code == 200:
-        try:
-            data = response.json()
-            if isinstance(data, dict) and 'projects' in data:
-                existing_projects = data['projects']
-            else:
-                existing_projects = data
-            print(f"Found {len(existing_projects)} existing projects")
-        except json.JSONDecodeError:
-            print("Error parsing existing projects response")
-            existing_projects = []
-    
-    for project in test_projects:
-        requested_id = str(project.get('id', '')).strip()
-        title = project.get('title', '').strip('"')
-        completed = project.get('completed', False)
-        active = project.get('active', True)
-        description = project.get('description', '').strip('"')
-        
-        matching_project = next(
-            (p for p in existing_projects if 
-             p.get('title') == title and 
-             str(p.get('completed')).lower() == str(completed).lower() and
-             str(p.get('active')).lower() == str(active).lower() and
-             p.get('description') == description),
-            None
-        )
-        
-        if matching_project:
-            actual_id = matching_project.get('id')
-            id_mapping[requested_id] = actual_id
-            print(f"Using existing project with ID {actual_id} for requested ID {requested_id}")
-            
-            if actual_id not in context.test_data['projects']:
-                context.test_data['projects'].append(actual_id)
-        else:
-            project_data = {
-                'title': title,
-                'completed': completed,
-                'active': active,
-                'description': description
-            }
-            
-            create_response = requests.post(f"{context.base_url}/projects", json=project_data)
-            
-            if create_response.status_code in [200, 201]:
-                try:
-                    created_project = create_response.json()
-                    actual_id = created_project.get('id')
-                    id_mapping[requested_id] = actual_id
-                    
-                    context.test_data['projects'].append(actual_id)
-                    print(f"Created new project with ID {actual_id} for requested ID {requested_id}")
-                except json.JSONDecodeError:
-                    print(f"Failed to parse response when creating project: {create_response.text}")
-            else:
-                print(f"Failed to create project: {create_response.status_code} - {create_response.text}")
-    
-    if not hasattr(context, 'id_mapping'):
-        context.id_mapping = {}
-    
-    for req_id, actual_id in id_mapping.items():
-        context.id_mapping[req_id] = actual_id
+    seed_table(context, 'projects', context.table)
 
 @then('the response JSON should include the following projects')
 def step_verify_specific_projects(context):
@@ -107,7 +28,7 @@ def step_verify_specific_projects(context):
     expected_projects = []
     for row in context.table:
         requested_id = row['id']
-        actual_id = get_mapped_id(context, requested_id)
+        actual_id = get_mapped_id(context, requested_id, 'projects')
         expected_project = {
             'id': actual_id,
             'title': row['title'].strip('"'),
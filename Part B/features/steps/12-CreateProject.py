@@ -5,6 +5,7 @@ import json
 import requests
 from behave import given, then, when
 from hamcrest import assert_that, equal_to, is_not, has_key, has_length, greater_than
+from features.steps.test_utils import session, stream_collection
 
 @given('I have the following project information')
 def step_create_valid_project_json(context):
@@ -42,7 +43,7 @@ def step_send_request_with_project_data(context, method, endpoint):
     
     print(f"Sending {method} request to {url} with body: {context.project_body}")
     
-    context.response = getattr(requests, method.lower())(url, json=context.project_body, headers=headers)
+    context.response = getattr(session, method.lower())(url, json=context.project_body, headers=headers)
     
     print(f"Response status: {context.response.status_code}")
     print(f"Response content: {context.response.text[:200]}...")
@@ -78,21 +79,15 @@ def step_verify_system_generated_id(context):
     step_verify_project_with_id(context)
     
     url = context.base_url + "/projects"
-    response = requests.get(url)
     
     try:
-        response_data = response.json()
-        if isinstance(response_data, dict) and 'projects' in response_data:
-            projects = response_data['projects']
-        else:
-            projects = response_data
-        
+        projects = stream_collection(url)
         existing_ids = [str(project["id"]) for project in projects if str(project["id"]) != str(context.response_data["id"])]
         
         assert str(context.response_data["id"]) not in existing_ids, "New ID matches an existing project ID"
         
         print(f"Verified ID {context.response_data['id']} is unique among {len(existing_ids)} existing projects")
-    except (json.JSONDecodeError, KeyError) as e:
+    except (ValueError, KeyError, requests.HTTPError) as e:
         assert False, f"Failed to verify unique ID: {e}"
 
 @then('the created project should have the provided information')
@@ -15,7 +15,7 @@ def step_verify_project_details(context):
             assert False, "Response is not valid JSON"
     
     row = context.table[0]
-    expected_id = get_mapped_id(context, row['id'])
+    expected_id = get_mapped_id(context, row['id'], 'projects')
     expected_title = row['title'].strip('"')
     expected_completed = row['completed'].lower()
     expected_active = row['active'].lower()
@@ -2,10 +2,9 @@
 Step definitions specific to amending a Project by ID.
 """
 import json
-import requests
 from behave import given, then, when
 from hamcrest import assert_that, equal_to
-from features.steps.test_utils import get_mapped_id, verify_error_message
+from features.steps.test_utils import get_mapped_id, verify_error_message, session
 
 @given('I have the following updated project information')
 def step_create_updated_project_json(context):
@@ -51,7 +50,7 @@ def step_create_valid_project_update(context):
 @when('I send a {method} request to "/projects/{id}" with this updated information')
 def step_send_update_request(context, method, id):
     """Send a request to update a project with specified ID."""
-    actual_id = get_mapped_id(context, id)
+    actual_id = get_mapped_id(context, id, 'projects')
     
     url = f"{context.base_url}/projects/{actual_id}"
     headers = {"Content-Type": "application/json"}
@@ -59,14 +58,14 @@ def step_send_update_request(context, method, id):
     print(f"Sending {method} request to {url} with body: {context.project_body}")
     
     try:
-        get_response = requests.get(url)
+        get_response = session.get(url)
         if get_response.status_code == 200:
             context.original_project = get_response.json()
             print(f"Stored original project: {context.original_project}")
     except Exception as e:
         print(f"Failed to retrieve original project: {e}")
     
-    context.response = getattr(requests, method.lower())(url, json=context.project_body, headers=headers)
+    context.response = getattr(session, method.lower())(url, json=context.project_body, headers=headers)
     
     print(f"Response status: {context.response.status_code}")
     print(f"Response content: {context.response.text[:200]}...")
@@ -80,12 +79,12 @@ def step_send_update_request(context, method, id):
 @when('I send a {method} request to "/projects/{id}" with this partial update')
 def step_send_partial_update_request(context, method, id):
     """Send a request to partially update a project."""
-    actual_id = get_mapped_id(context, id)
+    actual_id = get_mapped_id(context, id, 'projects')
     
     url = f"{context.base_url}/projects/{actual_id}"
     
     try:
-        get_response = requests.get(url)
+        get_response = session.get(url)
         if get_response.status_code == 200:
             response_json = get_response.json()
             if isinstance(response_json, dict) and 'projects' in response_json:
@@ -133,7 +132,7 @@ def step_send_partial_update_request(context, method, id):
         update_body = context.project_body
     
     headers = {"Content-Type": "application/json"}
-    context.response = getattr(requests, method.lower())(url, json=update_body, headers=headers)
+    context.response = getattr(session, method.lower())(url, json=update_body, headers=headers)
     
     print(f"Response status: {context.response.status_code}")
     print(f"Response content: {context.response.text[:200]}...")
@@ -151,7 +150,7 @@ def step_send_invalid_update_request(context, method, invalid_id):
     
     print(f"Sending {method} request to {url} with body: {context.project_body}")
     
-    context.response = getattr(requests, method.lower())(url, json=context.project_body, headers=headers)
+    context.response = getattr(session, method.lower())(url, json=context.project_body, headers=headers)
     
     print(f"Response status: {context.response.status_code}")
     print(f"Response content: {context.response.text[:200]}...")
@@ -192,10 +191,10 @@ def step_verify_updated_project_response(context):
 
 @then('the project with ID {id} should have all fields updated to the new values')
 def step_verify_all_fields_updated(context, id):
-    actual_id = get_mapped_id(context, id)
+    actual_id = get_mapped_id(context, id, 'projects')
     
     url = f"{context.base_url}/projects/{actual_id}"
-    response = requests.get(url)
+    response = session.get(url)
     
     assert response.status_code == 200, f"Failed to get updated project: {response.status_code}"
     
@@ -232,10 +231,10 @@ def step_verify_all_fields_updated(context, id):
 
 @then('the project with ID {id} should have the specified fields updated')
 def step_verify_specified_fields_updated(context, id):
-    actual_id = get_mapped_id(context, id)
+    actual_id = get_mapped_id(context, id, 'projects')
     
     url = f"{context.base_url}/projects/{actual_id}"
-    response = requests.get(url)
+    response = session.get(url)
     
     assert response.status_code == 200, f"Failed to get updated project: {response.status_code}"
     
@@ -272,10 +271,10 @@ def step_verify_specified_fields_updated(context, id):
 
 @then('the project with ID {id} should have unchanged values for other fields')
 def step_verify_other_fields_unchanged(context, id):
-    actual_id = get_mapped_id(context, id)
+    actual_id = get_mapped_id(context, id, 'projects')
     
     url = f"{context.base_url}/projects/{actual_id}"
-    response = requests.get(url)
+    response = session.get(url)
     
     assert response.status_code == 200, f"Failed to get updated project: {response.status_code}"
     
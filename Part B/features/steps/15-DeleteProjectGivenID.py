@@ -3,14 +3,14 @@ Step definitions specific to deleting a Project by ID.
 """
 import json
 import requests
-from behave import then
+from behave import given, then
 from hamcrest import assert_that, is_not, is_in
-from features.steps.test_utils import get_mapped_id
+from features.steps.test_utils import get_mapped_id, session
 
 @then('the response should not contain a project with ID {id}')
 def step_verify_project_deleted(context, id):
     """Verify that the specified project ID does not exist in the response."""
-    actual_id = get_mapped_id(context, id)
+    actual_id = get_mapped_id(context, id, 'projects')
     
     if not hasattr(context, 'response_data'):
         try:
@@ -33,7 +33,7 @@ def step_verify_project_deleted(context, id):
 def step_verify_remaining_projects(context, id_list):
     """Verify that projects with the specified IDs exist in the response."""
     id_parts = id_list.replace(' and ', ', ').replace(',', '').split()
-    expected_ids = [get_mapped_id(context, id_part) for id_part in id_parts]
+    expected_ids = [get_mapped_id(context, id_part, 'projects') for id_part in id_parts]
     
     if not hasattr(context, 'response_data'):
         try:
@@ -53,4 +53,35 @@ def step_verify_remaining_projects(context, id_list):
         assert str(expected_id) in project_ids, f"Expected project with ID {expected_id} is missing from the response"
         print(f"Verified project with ID {expected_id} is in the response")
     
-    print(f"Verified all expected projects are in the response")
\ No newline at end of file
+    print(f"Verified all expected projects are in the response")
+
+@given('project {project_id} has the todo {todo_id} as a task')
+def step_link_project_task(context, project_id, todo_id):
+    """Link a todo to a project, both given by their Gherkin IDs."""
+    actual_project_id = get_mapped_id(context, project_id, 'projects')
+    actual_todo_id = get_mapped_id(context, todo_id, 'todos')
+    response = session.post(f"{context.base_url}/projects/{actual_project_id}/tasks", json={'id': actual_todo_id})
+    assert response.status_code == 201, \
+        f"Failed to link todo {actual_todo_id} to project {actual_project_id}: {response.status_code}"
+    context.test_data['relationships'].append(('project_tasks', 'projects', 'todos', actual_project_id, actual_todo_id))
+    print(f"Linked todo {actual_todo_id} to project {actual_project_id}")
+
+def _task_ids(context, project_id):
+    actual_project_id = get_mapped_id(context, project_id, 'projects')
+    response = session.get(f"{context.base_url}/projects/{actual_project_id}/tasks")
+    assert response.status_code == 200, f"Could not read the tasks of project {project_id}: {response.status_code}"
+    return [str(todo.get('id')) for todo in response.json().get('todos', [])]
+
+@then('project {project_id} should not have the todo {todo_id} as a task')
+def step_verify_task_removed(context, project_id, todo_id):
+    """Verify that the project no longer lists the todo among its tasks."""
+    actual_todo_id = get_mapped_id(context, todo_id, 'todos')
+    assert_that(str(actual_todo_id), is_not(is_in(_task_ids(context, project_id))))
+    print(f"Verified todo {actual_todo_id} is no longer a task of project {project_id}")
+
+@then('project {project_id} should have the todo {todo_id} as a task')
+def step_verify_task_kept(context, project_id, todo_id):
+    """Verify that the project still lists the todo among its tasks."""
+    actual_todo_id = get_mapped_id(context, todo_id, 'todos')
+    assert_that(str(actual_todo_id), is_in(_task_ids(context, project_id)))
+    print(f"Verified todo {actual_todo_id} is still a task of project {project_id}")
@@ -1,9 +1,9 @@
 import json
-import requests
 import random
 import string
 from behave import given, then, when
 from hamcrest import assert_that, equal_to, is_not, contains_string, has_key, has_length, greater_than
+from features.steps.test_utils import session
 
 @given('the user has a valid JSON body for a new ToDo with')
 def step_create_valid_todo_json(context):
@@ -41,14 +41,14 @@ def step_create_invalid_todo_json(context, issue):
             "description": "This ToDo has an invalid doneStatus value"
         }
     elif issue == "bug: post to existing todo":
-        check_response = requests.get(f"{context.base_url}/todos/1")
+        check_response = session.get(f"{context.base_url}/todos/1")
         if check_response.status_code != 200:
             create_data = {
                 "title": "Test Todo for Bug Scenario",
                 "doneStatus": False,
                 "description": "This ToDo is created to test the POST to ID bug"
             }
-            create_response = requests.post(f"{context.base_url}/todos", json=create_data)
+            create_response = session.post(f"{context.base_url}/todos", json=create_data)
             if create_response.status_code in [200, 201]:
                 try:
                     created_todo = create_response.json()
@@ -81,7 +81,7 @@ def step_send_post_request_direct(context, endpoint):
     headers = {"Content-Type": "application/json"}
     
     print(f"Sending POST request to {url} with body: {context.todo_body}")
-    context.response = requests.post(url, json=context.todo_body, headers=headers)
+    context.response = session.post(url, json=context.todo_body, headers=headers)
     
     print(f"Response status: {context.response.status_code}")
     print(f"Response content: {context.response.text[:200]}...")
@@ -173,7 +173,7 @@ def step_verify_new_id(context):
     step_verify_unique_id(context)
     
     url = context.base_url + "/todos"
-    response = requests.get(url)
+    response = session.get(url)
     
     try:
         response_data = response.json()
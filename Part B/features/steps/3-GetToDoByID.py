@@ -1,22 +1,11 @@
 import json
-import requests
 from behave import given, then
 from hamcrest import assert_that, equal_to, is_in
-from features.steps.test_utils import setup_test_todos, get_mapped_id
+from features.steps.test_utils import seed_table, get_mapped_id, session
 
 @given('the system contains the following todos')
 def step_setup_todos(context):
-    test_todos = []
-    for row in context.table:
-        test_todo = {
-            'id': str(row['id']).strip(),
-            'title': row['title'].strip('"'),
-            'doneStatus': row['doneStatus'],
-            'description': row['description'].strip('"')
-        }
-        test_todos.append(test_todo)
-    
-    setup_test_todos(context, test_todos)
+    seed_table(context, 'todos', context.table)
 
 @given('a ToDo with ID equal to {id} does not exist or the ID format is invalid')
 def step_verify_todo_nonexistent(context, id):
@@ -24,12 +13,12 @@ def step_verify_todo_nonexistent(context, id):
         print(f"ID {id} is not a valid numeric format")
         return
     
-    actual_id = get_mapped_id(context, id)
+    actual_id = get_mapped_id(context, id, 'todos')
     
-    response = requests.get(f"{context.base_url}/todos/{actual_id}")
+    response = session.get(f"{context.base_url}/todos/{actual_id}")
     
     if response.status_code == 200:
-        delete_response = requests.delete(f"{context.base_url}/todos/{actual_id}")
+        delete_response = session.delete(f"{context.base_url}/todos/{actual_id}")
         assert delete_response.status_code in [200, 204], f"Failed to delete todo with ID {actual_id}"
         print(f"Deleted existing todo with ID {actual_id} for test setup")
 
@@ -42,7 +31,7 @@ def step_verify_todo_id(context, id):
         context.response_data = None
         assert False, "Response is not valid JSON"
     
-    actual_id = get_mapped_id(context, id)
+    actual_id = get_mapped_id(context, id, 'todos')
     
     if isinstance(context.response_data, dict) and 'todos' in context.response_data:
         todos = context.response_data['todos']
@@ -1,8 +1,7 @@
 import json
-import requests
 from behave import given, when, then
 from hamcrest import assert_that, equal_to
-from features.steps.test_utils import setup_test_todos, get_mapped_id, parse_todo_from_response
+from features.steps.test_utils import get_mapped_id, map_ids, parse_todo_from_response, session
 
 @given('the server is running')
 def step_verify_server_running(context):
@@ -10,7 +9,7 @@ def step_verify_server_running(context):
         context.id_mapping = {}
         
     url = context.base_url + "/todos"
-    response = requests.get(url)
+    response = session.get(url)
     assert response.status_code == 200, f"API returned status {response.status_code}, server may not be running"
     print("Server is running and API is accessible")
 
@@ -22,15 +21,13 @@ def step_ensure_todo_exists_with_details(context, id, title, doneStatus, descrip
         "description": description
     }
     
-    create_response = requests.post(f"{context.base_url}/todos", json=todo_data)
+    create_response = session.post(f"{context.base_url}/todos", json=todo_data)
     
     if create_response.status_code in [200, 201]:
         created_todo = create_response.json()
         actual_id = created_todo.get('id')
         
-        if not hasattr(context, 'id_mapping'):
-            context.id_mapping = {}
-        context.id_mapping[id] = actual_id
+        map_ids(context, 'todos', {id: actual_id})
         
         context.test_data['todos'].append(actual_id)
         print(f"Created todo with actual ID {actual_id} for requested ID {id}")
@@ -39,10 +36,10 @@ def step_ensure_todo_exists_with_details(context, id, title, doneStatus, descrip
 
 @given('a ToDo with ID equal to {id} exists')
 def step_ensure_todo_exists(context, id):
-    actual_id = get_mapped_id(context, id)
+    actual_id = get_mapped_id(context, id, 'todos')
     
     url = f"{context.base_url}/todos/{actual_id}"
-    response = requests.get(url)
+    response = session.get(url)
     
     assert response.status_code == 200, f"ToDo with ID {actual_id} does not exist"
     print(f"Verified ToDo with ID {actual_id} exists")
@@ -56,20 +53,20 @@ def step_ensure_todo_exists(context, id):
 @given('a ToDo with ID equal to {id} does not exist')
 def step_ensure_todo_does_not_exist(context, id):
     url = f"{context.base_url}/todos/{id}"
-    response = requests.get(url)
+    response = session.get(url)
     
     if response.status_code == 200:
-        delete_response = requests.delete(url)
+        delete_response = session.delete(url)
         assert delete_response.status_code in [200, 204], f"Failed to delete ToDo with ID {id}"
         print(f"Deleted existing ToDo with ID {id}")
     
-    response = requests.get(url)
+    response = session.get(url)
     assert response.status_code == 404, f"ToDo with ID {id} still exists"
     print(f"Verified ToDo with ID {id} does not exist")
 
 @when('the user requests to update the ToDo with id {id} setting title to "{title}", doneStatus to {doneStatus}, and description to "{description}"')
 def step_update_todo_full(context, id, title, doneStatus, description):
-    actual_id = get_mapped_id(context, id)
+    actual_id = get_mapped_id(context, id, 'todos')
     
     url = f"{context.base_url}/todos/{actual_id}"
     
@@ -80,7 +77,7 @@ def step_update_todo_full(context, id, title, doneStatus, description):
     }
     
     print(f"Updating ToDo {actual_id} with: {update_data}")
-    context.response = requests.put(url, json=update_data)
+    context.response = session.put(url, json=update_data)
     
     print(f"Update response status: {context.response.status_code}")
     print(f"Response content: {context.response.text[:200]}...")
@@ -93,7 +90,7 @@ def step_update_todo_full(context, id, title, doneStatus, description):
 
 @when('the user requests to update the ToDo with id {id} setting only description to "{description}"')
 def step_update_todo_partial(context, id, description):
-    actual_id = get_mapped_id(context, id)
+    actual_id = get_mapped_id(context, id, 'todos')
     
     url = f"{context.base_url}/todos/{actual_id}"
     
@@ -106,7 +103,7 @@ def step_update_todo_partial(context, id, description):
     }
     
     print(f"Partially updating ToDo {actual_id} with: {update_data}")
-    context.response = requests.put(url, json=update_data)
+    context.response = session.put(url, json=update_data)
     
     print(f"Update response status: {context.response.status_code}")
     print(f"Response content: {context.response.text[:200]}...")
@@ -126,7 +123,7 @@ def step_update_todo_invalid(context, id, title):
     }
     
     print(f"Attempting to update non-existent ToDo {id} with: {update_data}")
-    context.response = requests.put(url, json=update_data)
+    context.response = session.put(url, json=update_data)
     
     print(f"Update response status: {context.response.status_code}")
     print(f"Response content: {context.response.text[:200]}...")
@@ -139,10 +136,10 @@ def step_update_todo_invalid(context, id, title):
 
 @then('the ToDo with id {id} is updated with title "{title}", doneStatus {doneStatus}, and description "{description}"')
 def step_verify_todo_updated(context, id, title, doneStatus, description):
-    actual_id = get_mapped_id(context, id)
+    actual_id = get_mapped_id(context, id, 'todos')
     
     url = f"{context.base_url}/todos/{actual_id}"
-    response = requests.get(url)
+    response = session.get(url)
     
     assert response.status_code == 200, f"Failed to get updated ToDo with ID {actual_id}"
     
@@ -161,10 +158,10 @@ def step_verify_todo_updated(context, id, title, doneStatus, description):
 
 @then('the ToDo with id {id} retains its original title and doneStatus, and the description is updated to "{description}"')
 def step_verify_todo_partially_updated(context, id, description):
-    actual_id = get_mapped_id(context, id)
+    actual_id = get_mapped_id(context, id, 'todos')
     
     url = f"{context.base_url}/todos/{actual_id}"
-    response = requests.get(url)
+    response = session.get(url)
     
     assert response.status_code == 200, f"Failed to get updated ToDo with ID {actual_id}"
     
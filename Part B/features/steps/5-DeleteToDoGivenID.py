@@ -2,7 +2,7 @@ import json
 import requests
 from behave import given, when, then
 from hamcrest import assert_that, is_not, is_in
-from features.steps.test_utils import setup_test_todos, get_mapped_id, verify_todo_exists
+from features.steps.test_utils import seed_table, get_mapped_id, map_endpoint_id, verify_todo_exists, session, stream_collection
 
 @given('the system has been reset to its initial state')
 def step_reset_system(context):
@@ -10,33 +10,13 @@ def step_reset_system(context):
 
 @given('the system contains the following todos:')
 def step_setup_specific_todos(context):
-    test_todos = []
-    for row in context.table:
-        test_todo = {
-            'id': str(row['id']).strip(),
-            'title': row['title'].strip('"'),
-            'doneStatus': row['doneStatus'],
-            'description': row['description'].strip('"')
-        }
-        test_todos.append(test_todo)
-    
-    setup_test_todos(context, test_todos)
+    seed_table(context, 'todos', context.table)
 
 @when('the user sends a DELETE request to "{endpoint}"')
 def step_delete_request(context, endpoint):
-    if '/todos/' in endpoint:
-        parts = endpoint.split('/')
-        if len(parts) >= 3:
-            requested_id = parts[2]
-            actual_id = get_mapped_id(context, requested_id)
-            url = f"{context.base_url}/todos/{actual_id}"
-            print(f"Mapped DELETE endpoint from {endpoint} to /todos/{actual_id}")
-        else:
-            url = context.base_url + endpoint
-    else:
-        url = context.base_url + endpoint
+    url = context.base_url + map_endpoint_id(context, endpoint)
     
-    context.response = requests.delete(url)
+    context.response = session.delete(url)
     
     print(f"Sent DELETE request to {url}")
     print(f"Response status code: {context.response.status_code}")
@@ -50,28 +30,21 @@ def step_delete_request(context, endpoint):
 
 @then('the ToDo with id {id} is successfully deleted')
 def step_verify_todo_deleted(context, id):
-    actual_id = get_mapped_id(context, id)
+    actual_id = get_mapped_id(context, id, 'todos')
     
     url = f"{context.base_url}/todos/{actual_id}"
-    response = requests.get(url)
+    response = session.get(url)
     
     assert response.status_code == 404, f"ToDo with ID {actual_id} still exists"
     
-    all_todos_response = requests.get(f"{context.base_url}/todos")
-    assert all_todos_response.status_code == 200, "Failed to get all todos"
-    
     try:
-        todos_data = all_todos_response.json()
-        if isinstance(todos_data, dict) and 'todos' in todos_data:
-            todos = todos_data['todos']
-        else:
-            todos = todos_data
-            
-        todo_ids = [str(todo.get('id')) for todo in todos]
+        todo_ids = [str(todo.get('id')) for todo in stream_collection(f"{context.base_url}/todos")]
         assert_that(actual_id, is_not(is_in(todo_ids)))
         
         print(f"Verified ToDo with ID {actual_id} was successfully deleted")
-    except (json.JSONDecodeError, AssertionError) as e:
+    except requests.HTTPError:
+        assert False, "Failed to get all todos"
+    except (ValueError, AssertionError) as e:
         assert False, f"Failed to verify todo deletion: {e}"
 
 @then('the user is notified of the completion of the deletion operation')
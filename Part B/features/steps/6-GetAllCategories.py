@@ -2,20 +2,11 @@ import json
 import requests
 from behave import given, then
 from hamcrest import assert_that, equal_to, has_item, contains_string
-from features.steps.test_utils import get_mapped_id, setup_test_categories
+from features.steps.test_utils import get_mapped_id, seed_table
 
 @given('the system contains the following categories')
 def step_setup_categories(context):
-    test_categories = []
-    for row in context.table:
-        test_category = {
-            'id': str(row['id']).strip(),
-            'title': row['title'].strip('"'),
-            'description': row['description'].strip('"')
-        }
-        test_categories.append(test_category)
-    
-    setup_test_categories(context, test_categories)
+    seed_table(context, 'categories', context.table)
 
 @given('the user filters categories where "{filter_key}" equals "{filter_value}"')
 def step_filter_categories(context, filter_key, filter_value):
@@ -39,7 +30,7 @@ def step_verify_specific_categories(context):
     expected_categories = []
     for row in context.table:
         requested_id = row['id']
-        actual_id = get_mapped_id(context, requested_id)
+        actual_id = get_mapped_id(context, requested_id, 'categories')
         expected_category = {
             'id': actual_id,
             'title': row['title'].strip('"'),
@@ -1,7 +1,7 @@
 import json
-import requests
 from behave import given, then
 from hamcrest import assert_that, equal_to, is_not, has_key, has_length, greater_than
+from features.steps.test_utils import session
 
 @given('I have the following category data')
 def step_create_valid_category_json(context):
@@ -55,7 +55,7 @@ def step_verify_unique_category_id(context):
     print(f"Verified response contains unique ID: {context.response_data['id']}")
     
     url = context.base_url + "/categories"
-    response = requests.get(url)
+    response = session.get(url)
     
     try:
         response_data = response.json()
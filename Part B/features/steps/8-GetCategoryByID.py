@@ -8,7 +8,7 @@ from features.steps.test_utils import get_mapped_id
 
 @then('the response should contain the category with ID "{id}"')
 def step_verify_category_id(context, id):
-    actual_id = get_mapped_id(context, id)
+    actual_id = get_mapped_id(context, id, 'categories')
     
     if not hasattr(context, 'response_data'):
         try:
@@ -1,8 +1,7 @@
 import json
-import requests
 from behave import given, then
 from hamcrest import assert_that, equal_to
-from features.steps.test_utils import get_mapped_id
+from features.steps.test_utils import get_mapped_id, session
 
 @given('I have the following updated category data')
 def step_setup_updated_category_data(context):
@@ -29,7 +28,7 @@ def step_verify_updated_category(context):
     
     row = context.table[0]
     requested_id = row['id']
-    actual_id = get_mapped_id(context, requested_id)
+    actual_id = get_mapped_id(context, requested_id, 'categories')
     expected_title = row['title'].strip('"')
     expected_description = row['description'].strip('"')
     
@@ -41,7 +40,7 @@ def step_verify_updated_category(context):
         print(f"Verified updated category in response: {category}")
     else:
         url = f"{context.base_url}/categories/{actual_id}"
-        response = requests.get(url)
+        response = session.get(url)
         
         assert response.status_code == 200, f"Failed to get updated category with ID {actual_id}"
         
@@ -2,15 +2,14 @@
 Common step definitions shared across feature files.
 """
 import json
-import requests
 from behave import given, when, then
 from hamcrest import assert_that, equal_to, has_item, contains_string, has_key
-from features.steps.test_utils import get_mapped_id, map_endpoint_id, verify_error_message
+from features.steps.test_utils import get_mapped_id, map_endpoint_id, verify_error_message, session
 
 @given('the system is running')
 def step_verify_system_running(context):
     url = context.base_url + "/todos"
-    response = requests.get(url)
+    response = session.get(url)
     assert response.status_code == 200, f"API returned status {response.status_code}, system may not be running"
     print("System is running and API is accessible")
 
@@ -19,7 +18,7 @@ def step_send_get_request(context, endpoint):
     mapped_endpoint = map_endpoint_id(context, endpoint)
     
     url = context.base_url + mapped_endpoint
-    context.response = requests.get(url)
+    context.response = session.get(url)
     
     print(f"Sent GET request to {url}")
     print(f"Response status: {context.response.status_code}")
@@ -39,7 +38,7 @@ def step_send_get_request_to_endpoint(context, endpoint):
     
     print(f"Sending GET request to {url}")
     
-    context.response = requests.get(url)
+    context.response = session.get(url)
     
     print(f"Response status: {context.response.status_code}")
     print(f"Response content: {context.response.text[:100]}...")
@@ -59,7 +58,7 @@ def step_send_request_with_method(context, method, endpoint):
     
     print(f"Sending {method} request to {url}")
     
-    context.response = getattr(requests, method.lower())(url)
+    context.response = getattr(session, method.lower())(url)
     
     print(f"Response status: {context.response.status_code}")
     print(f"Response content: {context.response.text[:100]}...")
@@ -79,7 +78,7 @@ def step_send_delete_request(context, endpoint):
     
     print(f"Sending DELETE request to {url}")
     
-    context.response = requests.delete(url)
+    context.response = session.delete(url)
     
     print(f"Response status: {context.response.status_code}")
     print(f"Response content: {context.response.text[:100]}...")
@@ -100,7 +99,7 @@ def step_send_post_request_with_json(context, endpoint):
     
     json_body = context.todo_body if hasattr(context, 'todo_body') else context.category_body
     
-    context.response = requests.post(url, json=json_body, headers=headers)
+    context.response = session.post(url, json=json_body, headers=headers)
     
     print(f"POST to {url}")
     print(f"Request body: {json_body}")
@@ -126,7 +125,7 @@ def step_send_post_request_with_invalid_json(context, endpoint):
     
     json_body = context.todo_body if hasattr(context, 'todo_body') else context.category_body
     
-    context.response = requests.post(url, json=json_body, headers=headers)
+    context.response = session.post(url, json=json_body, headers=headers)
     
     print(f"POST to {url}")
     print(f"Request body: {json_body}")
@@ -151,7 +150,7 @@ def step_send_request_with_updated_data(context, method, endpoint):
     
     print(f"Sending {method} request to {url} with body: {json_body}")
     
-    context.response = getattr(requests, method.lower())(url, json=json_body, headers=headers)
+    context.response = getattr(session, method.lower())(url, json=json_body, headers=headers)
     
     print(f"Response status: {context.response.status_code}")
     print(f"Response content: {context.response.text[:200]}...")
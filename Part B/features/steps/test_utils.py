@@ -1,149 +1,285 @@
+import functools
+import os
+import re
+import sys
 import requests
 import json
 
-def setup_test_todos(context, test_todos):
-    id_mapping = {}
+# The HTTP utilities in Part A/tests/utils are shared with the behave harness.
+PART_A_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..', 'Part A'))
+if PART_A_DIR not in sys.path:
+    sys.path.append(PART_A_DIR)
+
+from tests.utils.api_client import session
+from tests.utils.bulk import bulk_create
+from tests.utils.instrumentation import ENTITY_OF
+from tests.utils.state_journal import BOOLEAN_FIELDS
+from tests.utils.streaming import stream_collection
+
+# Fields a Background table gives for each entity type; an existing entity
+# with the same values is reused instead of creating another
+MATCH_FIELDS = {
+    'todos': ('title', 'doneStatus', 'description'),
+    'categories': ('title', 'description'),
+    'projects': ('title', 'completed', 'active', 'description'),
+}
+
+# Text of the Background steps that seed a table through seed_table -> entity type
+SEED_STEPS = {
+    'the system contains the following todos': 'todos',
+    'the system contains the following todos:': 'todos',
+    'the system contains the following categories': 'categories',
+    'the system contains the following projects': 'projects',
+}
+
+SINGULAR = {'todos': 'todo', 'categories': 'category', 'projects': 'project'}
+
+class FixtureIndex:
+    """
+    Ids of the existing entities of one collection, keyed by their normalised match fields.
     
-    response = requests.get(f"{context.base_url}/todos")
-    existing_todos = []
+    Built from one fetch of the collection, so every row of a Background table
+    is matched with a dict lookup instead of a scan. Boolean fields compare as
+    "true"/"false" whichever form they arrive in; when several entities share a
+    key the first one fetched wins.
+    """
     
-    if response.status_code == 200:
-        try:
-            data = response.json()
-            if isinstance(data, dict) and 'todos' in data:
-                existing_todos = data['todos']
-            else:
-                existing_todos = data
-            print(f"Found {len(existing_todos)} existing todos")
-        except json.JSONDecodeError:
-            print("Error parsing existing todos response")
-            existing_todos = []
-    
-    for todo in test_todos:
-        requested_id = str(todo.get('id', '')).strip()
-        title = todo.get('title', '').strip('"')
-        done_status = todo.get('doneStatus', 'false').lower() == 'true'
-        description = todo.get('description', '').strip('"')
-        
-        matching_todo = next(
-            (t for t in existing_todos if 
-             t.get('title') == title and 
-             str(t.get('doneStatus')).lower() == str(done_status).lower() and
-             t.get('description') == description),
-            None
-        )
+    def __init__(self, entity_type, entities=(), exclude=()):
+        self.entity_type = entity_type
+        self.fields = MATCH_FIELDS[entity_type]
+        self._booleans = set(BOOLEAN_FIELDS.get(entity_type, ()))
+        self._ids = {}
+        for entity in entities:
+            if entity.get('id') not in exclude:
+                self.add(entity)
+    
+    @classmethod
+    def fetch(cls, context, entity_type, exclude=()):
+        """
+        Index every entity of entity_type on the server under test, except those whose id is in exclude.
         
-        if matching_todo:
-            actual_id = matching_todo.get('id')
-            id_mapping[requested_id] = actual_id
-            print(f"Using existing todo with ID {actual_id} for requested ID {requested_id}")
-            
-            if actual_id not in context.test_data['todos']:
-                context.test_data['todos'].append(actual_id)
+        An unreadable collection gives an empty index, so every row is created.
+        """
+        try:
+            index = cls(entity_type, stream_collection(f"{context.base_url}/{entity_type}"), exclude)
+            print(f"Found {len(index)} existing {entity_type}")
+            return index
+        except requests.HTTPError:
+            return cls(entity_type)
+        except ValueError:
+            print(f"Error parsing existing {entity_type} response")
+            return cls(entity_type)
+    
+    def key(self, fields):
+        return tuple(str(fields.get(name)).lower() if name in self._booleans else fields.get(name)
+                     for name in self.fields)
+    
+    def add(self, entity):
+        self._ids.setdefault(self.key(entity), entity.get('id'))
+    
+    def find(self, fields):
+        """
+        Id of an existing entity with the same match fields, or None.
+        """
+        return self._ids.get(self.key(fields))
+    
+    def __len__(self):
+        return len(self._ids)
+
+def seed_fields(entity_type, values):
+    """
+    The fields of entity_type taken from a Background row or dict of cell values.
+    
+    Text cells lose their surrounding quotes and boolean cells become True/False,
+    so the result can be both matched against existing entities and POSTed.
+    """
+    booleans = BOOLEAN_FIELDS.get(entity_type, ())
+    fields = {}
+    for name in MATCH_FIELDS[entity_type]:
+        value = values.get(name)
+        if name in booleans:
+            fields[name] = value if isinstance(value, bool) else str(value or 'false').strip().lower() == 'true'
         else:
-            todo_data = {
-                'title': title,
-                'doneStatus': done_status,
-                'description': description
-            }
-            
-            create_response = requests.post(f"{context.base_url}/todos", json=todo_data)
-            
-            if create_response.status_code in [200, 201]:
-                try:
-                    created_todo = create_response.json()
-                    actual_id = created_todo.get('id')
-                    id_mapping[requested_id] = actual_id
-                    
-                    context.test_data['todos'].append(actual_id)
-                    print(f"Created new todo with ID {actual_id} for requested ID {requested_id}")
-                except json.JSONDecodeError:
-                    print(f"Failed to parse response when creating todo: {create_response.text}")
-            else:
-                print(f"Failed to create todo: {create_response.status_code} - {create_response.text}")
+            fields[name] = str(value or '').strip().strip('"')
+    return fields
+
+def table_rows(entity_type, table):
+    """
+    [(requested id, fields)] for each row of a table of entity_type.
+    """
+    return [(str(row['id']).strip(), seed_fields(entity_type, row)) for row in table]
+
+def seed_table(context, entity_type, table):
+    """
+    Make sure an entity exists for every row of a Background table.
     
-    if not hasattr(context, 'id_mapping'):
-        context.id_mapping = {}
+    Rows seeded for the whole run (context.shared_fixtures) are mapped to the
+    shared entities without any request. A scenario that changes entities
+    (context.copy_on_write) gets private copies instead and never reuses a
+    shared one.
     
-    # Merge with existing mappings
-    for req_id, actual_id in id_mapping.items():
-        context.id_mapping[req_id] = actual_id
-        
+    Args:
+        context: The behave context
+        entity_type: 'todos', 'categories' or 'projects'
+        table: The step's table, with an id column plus the entity's fields
+    
+    Returns:
+        The mapping from each row's id to the id of the entity used for it
+    """
+    rows = table_rows(entity_type, table)
+    shared = getattr(context, 'shared_fixtures', None)
+    if shared is None:
+        return seed_entities(context, entity_type, rows)
+    if getattr(context, 'copy_on_write', True):
+        return seed_entities(context, entity_type, rows, exclude=shared.ids(entity_type))
+    
+    id_mapping, remaining = shared.resolve(entity_type, rows)
+    if remaining:
+        id_mapping.update(seed_entities(context, entity_type, remaining))
+    map_ids(context, entity_type, id_mapping)
+    print(f"Using {len(rows) - len(remaining)} shared {entity_type} from the run-wide fixtures")
     return id_mapping
 
-def setup_test_categories(context, test_categories):
+def map_ids(context, entity_type, id_mapping):
     """
-    Set up test categories and maintain ID mapping.
+    Record that the Gherkin ids in id_mapping stand for these actual ids of entity_type.
+    
+    context.typed_id_mapping keeps them per entity type, since a table of
+    todos and one of projects both start at id 1; context.id_mapping keeps the
+    latest mapping of each id whatever its type, for get_mapped_id callers
+    that do not say.
     """
-    id_mapping = {}
+    if not hasattr(context, 'id_mapping'):
+        context.id_mapping = {}
+    if not hasattr(context, 'typed_id_mapping'):
+        context.typed_id_mapping = {}
+    context.id_mapping.update(id_mapping)
+    context.typed_id_mapping.update(((entity_type, requested_id), actual_id)
+                                    for requested_id, actual_id in id_mapping.items())
+
+def seed_entities(context, entity_type, rows, exclude=()):
+    """
+    Match or create an entity for each (requested id, fields) pair and maintain ID mapping.
     
-    response = requests.get(f"{context.base_url}/categories")
-    existing_categories = []
+    The existing collection is read once and indexed (leaving out ids in
+    exclude), rows without a match are created concurrently, and
+    context.id_mapping is only updated once every row has been settled.
+    """
+    name = SINGULAR[entity_type]
+    existing = FixtureIndex.fetch(context, entity_type, exclude)
+    tracked = context.test_data[entity_type]
+    id_mapping = {}
     
-    if response.status_code == 200:
-        try:
-            data = response.json()
-            if isinstance(data, dict) and 'categories' in data:
-                existing_categories = data['categories']
-            else:
-                existing_categories = data
-            print(f"Found {len(existing_categories)} existing categories")
-        except json.JSONDecodeError:
-            print("Error parsing existing categories response")
-            existing_categories = []
-    
-    for category in test_categories:
-        requested_id = str(category.get('id', '')).strip()
-        title = category.get('title', '').strip('"')
-        description = category.get('description', '').strip('"')
-        
-        matching_category = next(
-            (c for c in existing_categories if 
-             c.get('title') == title and 
-             c.get('description') == description),
-            None
-        )
-        
-        if matching_category:
-            actual_id = matching_category.get('id')
+    to_create = []
+    for requested_id, fields in rows:
+        actual_id = existing.find(fields)
+        if actual_id:
             id_mapping[requested_id] = actual_id
-            print(f"Using existing category with ID {actual_id} for requested ID {requested_id}")
+            print(f"Using existing {name} with ID {actual_id} for requested ID {requested_id}")
             
-            if actual_id not in context.test_data['categories']:
-                context.test_data['categories'].append(actual_id)
+            if actual_id not in tracked:
+                tracked.append(actual_id)
         else:
-            category_data = {
-                'title': title,
-                'description': description
-            }
-            
-            create_response = requests.post(f"{context.base_url}/categories", json=category_data)
-            
-            if create_response.status_code in [200, 201]:
-                try:
-                    created_category = create_response.json()
-                    actual_id = created_category.get('id')
-                    id_mapping[requested_id] = actual_id
-                    
-                    context.test_data['categories'].append(actual_id)
-                    print(f"Created new category with ID {actual_id} for requested ID {requested_id}")
-                except json.JSONDecodeError:
-                    print(f"Failed to parse response when creating category: {create_response.text}")
-            else:
-                print(f"Failed to create category: {create_response.status_code} - {create_response.text}")
+            to_create.append((requested_id, fields))
     
-    if not hasattr(context, 'id_mapping'):
-        context.id_mapping = {}
+    results = bulk_create(entity_type, [fields for _, fields in to_create], base_url=context.base_url)
+    for (requested_id, _), result in zip(to_create, results):
+        if result.ok and result.id:
+            id_mapping[requested_id] = result.id
+            tracked.append(result.id)
+            print(f"Created new {name} with ID {result.id} for requested ID {requested_id}")
+        elif result.error is not None:
+            print(f"Failed to create {name}: {result.error}")
+        else:
+            print(f"Failed to create {name}: {result.status_code} - {result.entity}")
     
-    for req_id, actual_id in id_mapping.items():
-        context.id_mapping[req_id] = actual_id
+    map_ids(context, entity_type, id_mapping)
     
     return id_mapping
 
-def get_mapped_id(context, requested_id):
+class SharedFixtures:
+    """
+    Entities for static Background rows, seeded once and shared by every scenario that only reads them.
+    
+        shared = SharedFixtures.seed(context, [('projects', table_rows('projects', table)), ...])
+    
+    Identical rows from different features share one entity. Rows that match
+    an entity already on the server reuse it; the rest are created
+    concurrently and listed in created so they can be removed after the run.
+    """
+    
+    def __init__(self):
+        self.created = []
+        self._ids = {}
+        self._indexes = {entity_type: FixtureIndex(entity_type) for entity_type in MATCH_FIELDS}
+    
+    @classmethod
+    def seed(cls, context, tables):
+        shared = cls()
+        for entity_type, index in shared._indexes.items():
+            unique = {}
+            for table_type, rows in tables:
+                if table_type == entity_type:
+                    for _, fields in rows:
+                        unique.setdefault(index.key(fields), fields)
+            if not unique:
+                continue
+            existing = FixtureIndex.fetch(context, entity_type)
+            to_create = []
+            for key, fields in unique.items():
+                actual_id = existing.find(fields)
+                if actual_id:
+                    shared._ids[(entity_type, key)] = actual_id
+                else:
+                    to_create.append((key, fields))
+            results = bulk_create(entity_type, [fields for _, fields in to_create], base_url=context.base_url)
+            for (key, _), result in zip(to_create, results):
+                if result.ok and result.id:
+                    shared._ids[(entity_type, key)] = result.id
+                    shared.created.append((entity_type, result.id))
+                else:
+                    print(f"Failed to seed shared {SINGULAR[entity_type]}: {result.error or result.status_code}")
+        return shared
+    
+    def resolve(self, entity_type, rows):
+        """
+        ({requested id: shared id}, rows that have no shared entity).
+        """
+        index = self._indexes[entity_type]
+        id_mapping, remaining = {}, []
+        for requested_id, fields in rows:
+            actual_id = self._ids.get((entity_type, index.key(fields)))
+            if actual_id:
+                id_mapping[requested_id] = actual_id
+            else:
+                remaining.append((requested_id, fields))
+        return id_mapping, remaining
+    
+    def ids(self, entity_type):
+        return {actual_id for (name, _), actual_id in self._ids.items() if name == entity_type}
+    
+    def remap(self, ids):
+        """
+        Follow shared entities that were recreated under a new id; ids maps (entity_type, old id) to it.
+        """
+        for key, actual_id in self._ids.items():
+            if (key[0], actual_id) in ids:
+                self._ids[key] = ids[(key[0], actual_id)]
+        self.created = [(entity_type, ids.get((entity_type, actual_id), actual_id))
+                        for entity_type, actual_id in self.created]
+    
+    def __len__(self):
+        return len(self._ids)
+
+def get_mapped_id(context, requested_id, entity_type=None):
     """
-    Get the actual ID mapped from the requested ID.
+    Get the actual ID mapped from the requested ID, of entity_type when given.
+    
+    Steps that know which resource an id names should pass entity_type; the
+    untyped lookup returns whichever type last used the id.
     """
+    if entity_type is not None:
+        return getattr(context, 'typed_id_mapping', {}).get((entity_type, str(requested_id)), requested_id)
     if hasattr(context, 'id_mapping') and requested_id in context.id_mapping:
         return context.id_mapping[requested_id]
     return requested_id
@@ -163,9 +299,9 @@ def verify_entity_exists(context, entity_type, id):
     Raises:
         AssertionError: If the entity does not exist
     """
-    actual_id = get_mapped_id(context, id)
+    actual_id = get_mapped_id(context, id, entity_type)
     url = f"{context.base_url}/{entity_type}/{actual_id}"
-    response = requests.get(url)
+    response = session.get(url)
     
     assert response.status_code == 200, f"{entity_type.capitalize()[:-1]} with ID {actual_id} does not exist"
     
@@ -226,33 +362,88 @@ def parse_category_from_response(response_data, id=None):
     """
     return parse_entity_from_response(response_data, 'categories', id)
 
+# Endpoints the steps address; :id and :id2 are Gherkin ids mapped to real ones
+ROUTES = (
+    '/todos/:id', '/todos/:id/tasksof', '/todos/:id/tasksof/:id2',
+    '/todos/:id/categories', '/todos/:id/categories/:id2',
+    '/projects/:id', '/projects/:id/tasks', '/projects/:id/tasks/:id2',
+    '/projects/:id/categories', '/projects/:id/categories/:id2',
+    '/categories/:id', '/categories/:id/todos', '/categories/:id/todos/:id2',
+    '/categories/:id/projects', '/categories/:id/projects/:id2',
+    # Anything else under an instance only has its first id mapped
+    '/todos/:id/*', '/projects/:id/*', '/categories/:id/*',
+)
+
+def _compile_route(template):
+    """
+    (regex, (group number, entity type) for each id) for a route template.
+    
+    An id belongs to the collection its preceding segment names, so in
+    /projects/:id/tasks/:id2 the first is a project and the second a todo.
+    """
+    pattern, id_groups, group, previous = '', [], 0, None
+    for segment in template.strip('/').split('/'):
+        if segment == '*':
+            group += 1
+            pattern += '/(.*)'
+        elif segment.startswith(':'):
+            group += 1
+            id_groups.append((group, ENTITY_OF[previous]))
+            pattern += '/([^/?#]+)'
+        else:
+            pattern += '/' + re.escape(segment)
+        previous = segment
+    return re.compile(f'^{pattern}([?#].*)?$'), tuple(id_groups)
+
+_ROUTE_PATTERNS = [_compile_route(template) for template in ROUTES]
+
+def _literal(text):
+    return text.replace('{', '{{').replace('}', '}}')
+
+@functools.lru_cache(maxsize=1024)
+def parse_endpoint(endpoint):
+    """
+    (format string, ids) for an endpoint such as /projects/1/tasks/2?active=true.
+    
+    The format string has a {} where each id goes, so mapping an endpoint is a
+    single format call. ids holds an (entity type, Gherkin id) pair per {},
+    here (('projects', '1'), ('todos', '2')). Endpoints that match no route
+    give (None, ()).
+    """
+    for pattern, id_groups in _ROUTE_PATTERNS:
+        match = pattern.match(endpoint)
+        if not match:
+            continue
+        pieces, last = [], 0
+        for group, _ in id_groups:
+            pieces.append(_literal(endpoint[last:match.start(group)]) + '{}')
+            last = match.end(group)
+        pieces.append(_literal(endpoint[last:]))
+        return ''.join(pieces), tuple((entity_type, match.group(group)) for group, entity_type in id_groups)
+    return None, ()
+
 def map_endpoint_id(context, endpoint):
     """
-    Map the ID in an endpoint to the actual ID if needed.
+    Map the Gherkin IDs in an endpoint, at either level of a relationship route, to the actual IDs.
+    
+    Each id is looked up under the entity type its route segment names, so
+    /projects/1/tasks/1 maps project 1 and todo 1 separately.
     
     Args:
         context: The behave context
-        endpoint: The endpoint URL
+        endpoint: The endpoint path, optionally with a query string
     
     Returns:
         The mapped endpoint
     """
-    entity_types = ['todos', 'categories', 'projects']
-    
-    for entity_type in entity_types:
-        if f'/{entity_type}/' in endpoint:
-            parts = endpoint.split('/')
-            if len(parts) >= 3 and parts[2]:
-                requested_id = parts[2]
-                if hasattr(context, 'id_mapping') and requested_id in context.id_mapping:
-                    actual_id = context.id_mapping[requested_id]
-                    mapped_endpoint = f"/{entity_type}/{actual_id}"
-                    if len(parts) > 3:
-                        mapped_endpoint += '/' + '/'.join(parts[3:])
-                    print(f"Mapped endpoint from {endpoint} to {mapped_endpoint}")
-                    return mapped_endpoint
-    
-    return endpoint
+    template, ids = parse_endpoint(endpoint)
+    id_mapping = getattr(context, 'typed_id_mapping', None)
+    if not ids or not id_mapping:
+        return endpoint
+    mapped_endpoint = template.format(*(id_mapping.get(key, key[1]) for key in ids))
+    if mapped_endpoint != endpoint:
+        print(f"Mapped endpoint from {endpoint} to {mapped_endpoint}")
+    return mapped_endpoint
 
 def verify_error_message(context, expected_phrases):
     """